@@ -118,29 +118,6 @@ rec {
       }
     ) controlPlanes;
 
-  # Tag-based filtering functions (O(1) lookups after tagging)
-  filterByTag =
-    tag: taggedControlPlanes: filterAttrs (_: cp: cp.tags.${tag} or false) taggedControlPlanes;
-
-  # Tag-based storage filtering with conditions
-  filterByStorageTag =
-    {
-      taggedControlPlanes,
-      backend,
-      requireEnabled ? false,
-    }:
-    filterAttrs (
-      _: cp:
-      if backend == "aws" then
-        cp.tags.usesAws && (if requireEnabled then cp.tags.awsEnabled else true)
-      else if backend == "hcv" then
-        cp.tags.usesHcv
-      else if backend == "local" then
-        cp.tags.usesLocal
-      else
-        false
-    ) taggedControlPlanes;
-
   # Helper function to add provisioner and default labels
   addLabels =
     cp: defaultLabels:
@@ -153,91 +130,84 @@ rec {
   processControlPlanesWithLabels =
     cps: defaultLabels: mapAttrs (name: cp: addLabels cp defaultLabels) cps;
 
-  # Create all filtered collections for control planes using tagged approach (O(1) lookups)
-  createFilteredControlPlaneCollections =
-    taggedValidatedControlPlanes:
-    let
-      # O(1) tag-based filters - no more iterations!
-      pkiCertControlPlanes = filterByTag "pkiAndCert" taggedValidatedControlPlanes;
-      pinnedCertControlPlanes = filterByTag "pinnedAndCert" taggedValidatedControlPlanes;
+  # Membership predicates of the filtered control plane collections that are
+  # filtered from every control plane, keyed by collection name
+  controlPlaneCollectionPredicates = {
+    pkiCertControlPlanes = cp: cp.tags.pkiAndCert;
+    pinnedCertControlPlanes = cp: cp.tags.pinnedAndCert;
 
-      # Storage-based filters (still O(1) lookups)
-      hcvStorageControlPlanes = filterByStorageTag {
-        taggedControlPlanes = taggedValidatedControlPlanes;
-        backend = "hcv";
-      };
-      awsStorageControlPlanes = filterByStorageTag {
-        taggedControlPlanes = taggedValidatedControlPlanes;
-        backend = "aws";
-        requireEnabled = true;
-      };
-      localStorageControlPlanes = filterByStorageTag {
-        taggedControlPlanes = taggedValidatedControlPlanes;
-        backend = "local";
-      };
+    # Storage-based collections
+    hcvStorageControlPlanes = cp: cp.tags.usesHcv;
+    awsStorageControlPlanes = cp: cp.tags.usesAws && cp.tags.awsEnabled;
+    localStorageControlPlanes = cp: cp.tags.usesLocal;
 
-      # Individual system account filters
-      individualSystemAccountPlanes = filterByTag "systemAccountEnabled" taggedValidatedControlPlanes;
+    # Individual system account collection
+    individualSystemAccountPlanes = cp: cp.tags.systemAccountEnabled;
 
-      # Other O(1) filters
-      outputEnabledControlPlanes = filterAttrs (_: cp: cp.output or false) taggedValidatedControlPlanes;
-      storageRequiredControlPlanes = filterByTag "needsStorage" taggedValidatedControlPlanes;
+    outputEnabledControlPlanes = cp: cp.output or false;
+    storageRequiredControlPlanes = cp: cp.tags.needsStorage;
 
-      # AWS-specific filters (still O(1))
-      awsProviderRequiredControlPlanes = filterAttrs (
-        _: cp: cp.tags.usesAws || cp.tags.awsEnabled
-      ) taggedValidatedControlPlanes;
-      awsEnabledControlPlanes = filterByTag "awsEnabled" taggedValidatedControlPlanes;
-      awsEnabledWithStorage = filterByTag "awsStorageEnabled" taggedValidatedControlPlanes;
-
-      # HCV PKI backend filter (control planes that create certs with HCV PKI)
-      hcvPkiCertControlPlanes = filterByTag "hcvPkiAndCert" taggedValidatedControlPlanes;
-
-      # Combined storage + cert type filters (still O(1) - just chaining O(1) operations)
-      awsStoragePkiCertControlPlanes = filterByTag "pkiAndCert" awsStorageControlPlanes;
-      awsStoragePinnedCertControlPlanes = filterByTag "pinnedAndCert" awsStorageControlPlanes;
-      awsStorageSysAccountControlPlanes = filterByTag "systemAccountWithToken" awsStorageControlPlanes;
-      awsStorageClusterConfigOnlyControlPlanes = filterByTag "clusterConfigOnly" awsStorageControlPlanes;
-
-      hcvStoragePkiCertControlPlanes = filterByTag "pkiAndCert" hcvStorageControlPlanes;
-      hcvStoragePinnedCertControlPlanes = filterByTag "pinnedAndCert" hcvStorageControlPlanes;
-      hcvStorageSysAccountControlPlanes = filterByTag "systemAccountWithToken" hcvStorageControlPlanes;
-      hcvStorageClusterConfigOnlyControlPlanes = filterByTag "clusterConfigOnly" hcvStorageControlPlanes;
-
-      localStoragePkiCertControlPlanes = filterByTag "pkiAndCert" localStorageControlPlanes;
-      localStoragePinnedCertControlPlanes = filterByTag "pinnedAndCert" localStorageControlPlanes;
-      localStorageSysAccountControlPlanes = filterByTag "systemAccountWithToken" localStorageControlPlanes;
-      localStorageClusterConfigOnlyControlPlanes = filterByTag "clusterConfigOnly" localStorageControlPlanes;
+    # AWS-specific collections
+    awsProviderRequiredControlPlanes = cp: cp.tags.usesAws || cp.tags.awsEnabled;
+    awsEnabledControlPlanes = cp: cp.tags.awsEnabled;
+    awsEnabledWithStorage = cp: cp.tags.awsStorageEnabled;
+
+    # Control planes that create certs with HCV PKI
+    hcvPkiCertControlPlanes = cp: cp.tags.hcvPkiAndCert;
+  };
+
+  # Storage + cert type collections: the members of a storage collection
+  # that have a cert type tag
+  storageCertCollections =
+    let
+      inStorage = storage: tag: { inherit storage tag; };
     in
     {
-      inherit
-        pkiCertControlPlanes
-        pinnedCertControlPlanes
-        hcvStorageControlPlanes
-        awsStorageControlPlanes
-        localStorageControlPlanes
-        individualSystemAccountPlanes
-        outputEnabledControlPlanes
-        storageRequiredControlPlanes
-        awsProviderRequiredControlPlanes
-        awsEnabledControlPlanes
-        awsEnabledWithStorage
-        awsStoragePkiCertControlPlanes
-        awsStoragePinnedCertControlPlanes
-        awsStorageSysAccountControlPlanes
-        awsStorageClusterConfigOnlyControlPlanes
-        hcvPkiCertControlPlanes
-        hcvStoragePkiCertControlPlanes
-        hcvStoragePinnedCertControlPlanes
-        hcvStorageSysAccountControlPlanes
-        hcvStorageClusterConfigOnlyControlPlanes
-        localStoragePkiCertControlPlanes
-        localStoragePinnedCertControlPlanes
-        localStorageSysAccountControlPlanes
-        localStorageClusterConfigOnlyControlPlanes
-        ;
+      awsStoragePkiCertControlPlanes = inStorage "awsStorageControlPlanes" "pkiAndCert";
+      awsStoragePinnedCertControlPlanes = inStorage "awsStorageControlPlanes" "pinnedAndCert";
+      awsStorageSysAccountControlPlanes = inStorage "awsStorageControlPlanes" "systemAccountWithToken";
+      awsStorageClusterConfigOnlyControlPlanes = inStorage "awsStorageControlPlanes" "clusterConfigOnly";
+
+      hcvStoragePkiCertControlPlanes = inStorage "hcvStorageControlPlanes" "pkiAndCert";
+      hcvStoragePinnedCertControlPlanes = inStorage "hcvStorageControlPlanes" "pinnedAndCert";
+      hcvStorageSysAccountControlPlanes = inStorage "hcvStorageControlPlanes" "systemAccountWithToken";
+      hcvStorageClusterConfigOnlyControlPlanes = inStorage "hcvStorageControlPlanes" "clusterConfigOnly";
+
+      localStoragePkiCertControlPlanes = inStorage "localStorageControlPlanes" "pkiAndCert";
+      localStoragePinnedCertControlPlanes = inStorage "localStorageControlPlanes" "pinnedAndCert";
+      localStorageSysAccountControlPlanes = inStorage "localStorageControlPlanes" "systemAccountWithToken";
+      localStorageClusterConfigOnlyControlPlanes = inStorage "localStorageControlPlanes" "clusterConfigOnly";
     };
 
+  # Membership predicates of every filtered control plane collection. A
+  # storage + cert type collection needs both its storage predicate and its
+  # cert type tag.
+  collectionPredicates =
+    controlPlaneCollectionPredicates
+    // mapAttrs (
+      _:
+      { storage, tag }:
+      cp: controlPlaneCollectionPredicates.${storage} cp && cp.tags.${tag}
+    ) storageCertCollections;
+
+  # Create all filtered collections for control planes in one pass: each
+  # control plane's collections are worked out once, and zipAttrsWith buckets
+  # the control planes by collection. A bucket's attrset is only built when
+  # its collection is read, and collections without members are empty.
+  createFilteredControlPlaneCollections =
+    taggedValidatedControlPlanes:
+    let
+      collectionNames = attrNames collectionPredicates;
+      memberships = mapAttrsToList (
+        name: cp:
+        genAttrs (filter (collection: collectionPredicates.${collection} cp) collectionNames) (
+          _: nameValuePair name cp
+        )
+      ) taggedValidatedControlPlanes;
+      buckets = zipAttrsWith (_: listToAttrs) memberships;
+    in
+    mapAttrs (collection: _: buckets.${collection} or { }) collectionPredicates;
+
   # Core control plane processing functions
   flattenControlPlanes =
     regionCfg:
@@ -256,22 +226,33 @@ rec {
       )
     );
 
+  # Index control planes by original name, built once so member lookups are
+  # attribute accesses instead of a scan over every control plane.
+  # listToAttrs keeps the first of duplicate names, so a name used in several
+  # regions resolves to the first region in attribute order.
+  indexByOriginalName =
+    controlPlanes:
+    listToAttrs (
+      map (cp: {
+        name = cp.originalName or "";
+        value = cp;
+      }) (attrValues controlPlanes)
+    );
+
   # ============================================================================
   # Group Validation - Prevent groups from referencing other groups
   # ============================================================================
 
   # Simple validation: Control plane groups can only reference individual control planes
-  validateNoGroupReferences =
-    allControlPlanes:
-    let
-      # Helper to find a control plane by original name
-      findByOriginalName =
-        originalName:
-        let
-          matches = filterAttrs (n: cp: (cp.originalName or "") == originalName) allControlPlanes;
-        in
-        if matches == { } then { } else head (attrValues matches);
+  validateNoGroupReferences = allControlPlanes: validateNoGroupReferencesWith { inherit allControlPlanes; };
 
+  # Same, reusing an index from indexByOriginalName when the caller has one
+  validateNoGroupReferencesWith =
+    {
+      allControlPlanes,
+      controlPlanesByOriginalName ? indexByOriginalName allControlPlanes,
+    }:
+    let
       findGroupReferences = mapAttrsToList (
         name: cp:
         if cp.cluster_type == clusterTypes.controlPlaneGroup then
@@ -279,7 +260,7 @@ rec {
             invalidMembers = filter (
               member:
               let
-                memberCP = findByOriginalName member;
+                memberCP = controlPlanesByOriginalName.${member} or { };
               in
               hasAttr "cluster_type" memberCP && memberCP.cluster_type == clusterTypes.controlPlaneGroup
             ) (cp.members or [ ]);
@@ -309,11 +290,11 @@ rec {
     {
       name,
       cp,
-      allControlPlanes, # Fixed: Pass the full attrset, not just names
+      allControlPlanes ? throw "validateControlPlaneLocal needs allControlPlanes or controlPlanesByOriginalName",
+      # Shared index from indexByOriginalName, built from allControlPlanes when not given
+      controlPlanesByOriginalName ? indexByOriginalName allControlPlanes,
     }:
     let
-      # Extract original names from flattened control planes for validation
-      allControlPlaneNames = map (cp: cp.originalName or cp.name) (attrValues allControlPlanes);
       isGroup = cp.cluster_type == clusterTypes.controlPlaneGroup;
       hasMembers = cp.members != [ ];
 
@@ -321,25 +302,17 @@ rec {
       membersTypeValid = !hasMembers || isGroup;
 
       # Validation 2: All members must be defined in the control planes list
-      undefinedMembers = filter (member: !(elem member allControlPlaneNames)) cp.members;
+      undefinedMembers = filter (member: !(controlPlanesByOriginalName ? ${member})) cp.members;
       membersDefined = undefinedMembers == [ ];
 
       # Validation 3: Members of control plane groups must not have create_certificates = true or store_cluster_config = true
-      # Helper to find a control plane by original name
-      findByOriginalName =
-        originalName:
-        let
-          matches = filterAttrs (n: cp: (cp.originalName or "") == originalName) allControlPlanes;
-        in
-        if matches == { } then { } else head (attrValues matches);
-
       invalidCertMembers = filter (
-        member: (findByOriginalName member).create_certificate or false
+        member: controlPlanesByOriginalName.${member}.create_certificate or false
       ) cp.members;
       membersCertValid = invalidCertMembers == [ ];
 
       invalidStoreConfigMembers = filter (
-        member: (findByOriginalName member).store_cluster_config or false
+        member: controlPlanesByOriginalName.${member}.store_cluster_config or false
       ) cp.members;
       membersStoreConfigValid = invalidStoreConfigMembers == [ ];
 
@@ -428,11 +401,13 @@ rec {
     {
       name,
       cp,
-      allControlPlanes, # Fixed: Pass full attrset
+      allControlPlanes ? throw "validateControlPlane needs allControlPlanes or controlPlanesByOriginalName",
+      # Shared index from indexByOriginalName, built from allControlPlanes when not given
+      controlPlanesByOriginalName ? indexByOriginalName allControlPlanes,
       defaults ? config.kontfix.defaults, # Default to config but allow override
     }:
     let
-      locallyValidated = validateControlPlaneLocal { inherit name cp allControlPlanes; };
+      locallyValidated = validateControlPlaneLocal { inherit name cp controlPlanesByOriginalName; };
     in
     validateControlPlaneWithDefaults {
       inherit name defaults;
@@ -487,19 +462,29 @@ rec {
       allControlPlaneNames = map (cp: cp.originalName) (builtins.attrValues flattenedControlPlanes);
       controlPlanesWithLabels = processControlPlanesWithLabels flattenedControlPlanes defaultLabels;
 
+      # Built once and shared by every member lookup during validation
+      controlPlanesByOriginalName = indexByOriginalName flattenedControlPlanes;
+
       # Apply validation if requested (simple group validation first!)
       validatedControlPlanes =
         if validation then
           let
             # First, validate that groups don't reference other groups
-            planesWithoutGroupReferences = validateNoGroupReferences controlPlanesWithLabels;
+            planesWithoutGroupReferences = validateNoGroupReferencesWith {
+              allControlPlanes = controlPlanesWithLabels;
+              inherit controlPlanesByOriginalName;
+            };
 
             # Then apply individual control plane validation
             individuallyValidated = mapAttrs (
               name: cp:
               validateControlPlane {
-                inherit name cp defaults;
-                allControlPlanes = planesWithoutGroupReferences; # Fixed: Pass full attrset
+                inherit
+                  name
+                  cp
+                  defaults
+                  controlPlanesByOriginalName
+                  ;
               }
             ) planesWithoutGroupReferences;
           in
@@ -47,6 +47,62 @@
         in
         map (file: nixpkgs.lib.removeSuffix ".nix" file) errorCaseFiles;
 
+      # Control plane counts of the generated evaluation-time scaling cases
+      scalingSizes = [
+        1000
+        2000
+        4000
+      ];
+
+      # Generated case with thousands of control planes and group members
+      createScalingConfiguration =
+        { system, controlPlanes }:
+        kontfix.lib.kontfixConfiguration {
+          inherit system;
+          modules = [
+            (import ./scaling {
+              inherit (nixpkgs) lib;
+              inherit controlPlanes;
+            })
+          ];
+        };
+
+      # Time the evaluation of each scaling case; per control plane cost
+      # should stay roughly flat as the count grows. With a git revision as
+      # argument, kontfix at that revision is timed alongside for comparison.
+      createBenchEvalApp =
+        { pkgs, system }:
+        {
+          type = "app";
+          program = toString (
+            pkgs.writers.writeBash "bench-eval" ''
+              baseline="''${1:-}"
+              time_eval() {
+                local start
+                start=$(date +%s%N)
+                if ! nix eval --no-eval-cache --raw "$@" > /dev/null; then
+                  echo "❌ Evaluation failed: nix eval $*" >&2
+                  exit 1
+                fi
+                echo $(( ($(date +%s%N) - start) / 1000000 ))
+              }
+
+              echo "⏱️  Evaluating generated scaling cases..."
+              for size in ${nixpkgs.lib.concatMapStringsSep " " toString scalingSizes}; do
+                ms=$(time_eval ".#scaling-$size.drvPath") || exit 1
+                line="  $size control planes: $ms ms ($(( ms * 1000 / size )) µs per control plane)"
+                if [[ -n "$baseline" ]]; then
+                  rev=$(git rev-parse "$baseline")
+                  base_ms=$(time_eval ".#scaling-$size.drvPath" \
+                    --override-input kontfix "git+file://$(git rev-parse --show-toplevel)?rev=$rev") || exit 1
+                  line="$line, $baseline: $base_ms ms"
+                fi
+                echo "$line"
+              done
+            ''
+          );
+        };
+
       # Generic function to create a test configuration
       createTestConfiguration =
         {
@@ -168,8 +224,8 @@
           # Python validator script with enhanced dependencies (no linting)
           pythonWithDeps = pkgs.python3.withPackages (
             ps: with ps; [
-              deepdiff
               colorama
+              orjson
             ]
           );
           validator = pkgs.writeScriptBin "validator" ''
@@ -207,142 +263,48 @@
           );
         };
 
-      # Create a test-all-builds app that builds and tests regular configurations
-      createTestAllBuildsApp =
-        { pkgs, system }:
+      # Python test runner: builds cases on a job pool, runs each error build
+      # once and validates the outputs in the same process
+      createTestRunner =
+        { pkgs }:
         let
-          # Python validator script with enhanced dependencies (no linting)
           pythonWithDeps = pkgs.python3.withPackages (
             ps: with ps; [
-              deepdiff
               colorama
+              orjson
             ]
           );
-          validator = pkgs.writeScriptBin "validator" ''
-            #!${pythonWithDeps}/bin/python3
-            ${builtins.readFile ./validators/main.py}
-          '';
+        in
+        pkgs.writeShellScriptBin "test-runner" ''
+          exec ${pythonWithDeps}/bin/python3 ${./validators}/runner.py "$@"
+        '';
+
+      # Create a test-all-builds app that builds and tests regular configurations
+      createTestAllBuildsApp =
+        { pkgs, system }:
+        let
+          runner = createTestRunner { inherit pkgs; };
         in
         {
           type = "app";
           program = toString (
             pkgs.writers.writeBash "test-all-builds" ''
-              echo "🚀 Building all test configurations..."
-
-              # Build all configurations sequentially
-              for config in ${nixpkgs.lib.concatStringsSep " " testConfigurations}; do
-                echo "🔨 Building $config..."
-                if ! nix run .#build-$config; then
-                  echo "❌ Build failed for $config"
-                  exit 1
-                fi
-              done
-
-              echo ""
-              echo "✅ All builds completed"
-              echo ""
-              echo "🧪 Running all tests..."
-
-              # Run all tests sequentially
-              TEST_FAILED=0
-              for config in ${nixpkgs.lib.concatStringsSep " " testConfigurations}; do
-                echo ""
-                echo "🧪 Testing $config..."
-
-                # Check if required files exist
-                if [[ ! -f "$config.tf.json" ]]; then
-                  echo "❌ $config.tf.json not found."
-                  TEST_FAILED=1
-                  continue
-                fi
-
-                if [[ ! -f "./expected-results/$config.json" ]]; then
-                  echo "❌ ./expected-results/$config.json not found."
-                  TEST_FAILED=1
-                  continue
-                fi
-
-                # Run the Python validator
-                if ${validator}/bin/validator "$config" --test-dir .; then
-                  echo "✅ $config test passed"
-                else
-                  echo "❌ $config test failed"
-                  TEST_FAILED=1
-                fi
-              done
-
-              echo ""
-              if [[ $TEST_FAILED -eq 0 ]]; then
-                echo "🎉 All builds and tests passed!"
-                exit 0
-              else
-                echo "💥 Some tests failed!"
-                exit 1
-              fi
+              exec ${runner}/bin/test-runner builds --test-dir . "$@"
             ''
           );
         };
 
-      # Create a test-all-errors app that tests all error case configurations sequentially
+      # Create a test-all-errors app that tests all error case configurations
       createTestAllErrorsApp =
         { pkgs, system }:
+        let
+          runner = createTestRunner { inherit pkgs; };
+        in
         {
           type = "app";
           program = toString (
             pkgs.writers.writeBash "test-all-errors" ''
-              echo "🚀 Testing all error case configurations..."
-
-              if [[ -z "${nixpkgs.lib.concatStringsSep " " errorTestConfigurations}" ]]; then
-                echo "✅ No error cases to test"
-                exit 0
-              fi
-
-              # Test all error case configurations sequentially
-              TEST_FAILED=0
-              for config in ${nixpkgs.lib.concatStringsSep " " errorTestConfigurations}; do
-                echo ""
-                echo "🧪 Testing error case: $config..."
-
-                # Check if expected error file exists
-                if [[ ! -f "./expected-errors/$config.txt" ]]; then
-                  echo "❌ ./expected-errors/$config.txt not found."
-                  TEST_FAILED=1
-                  continue
-                fi
-
-                expected_error=$(cat "./expected-errors/$config.txt")
-
-                # Try to build (should fail)
-                echo "🔨 Attempting to build $config (expecting failure)..."
-                build_output=$(nix run .#build-error-$config 2>&1 || true)
-
-                # Check if build actually failed
-                if nix run .#build-error-$config 2>/dev/null; then
-                  echo "❌ Build succeeded but should have failed!"
-                  TEST_FAILED=1
-                  continue
-                fi
-
-                # Check if error message contains expected text
-                if echo "$build_output" | grep -qF "$expected_error"; then
-                  echo "✅ $config error test passed"
-                else
-                  echo "❌ $config error test failed"
-                  echo "   Expected error: $expected_error"
-                  echo "   Actual output:"
-                  echo "$build_output"
-                  TEST_FAILED=1
-                fi
-              done
-
-              echo ""
-              if [[ $TEST_FAILED -eq 0 ]]; then
-                echo "🎉 All error case tests passed!"
-                exit 0
-              else
-                echo "💥 Some error case tests failed!"
-                exit 1
-              fi
+              exec ${runner}/bin/test-runner errors --test-dir . "$@"
             ''
           );
         };
@@ -351,133 +313,13 @@
       createTestAllApp =
         { pkgs, system }:
         let
-          # Python validator script with enhanced dependencies (no linting)
-          pythonWithDeps = pkgs.python3.withPackages (
-            ps: with ps; [
-              deepdiff
-              colorama
-            ]
-          );
-          validator = pkgs.writeScriptBin "validator" ''
-            #!${pythonWithDeps}/bin/python3
-            ${builtins.readFile ./validators/main.py}
-          '';
+          runner = createTestRunner { inherit pkgs; };
         in
         {
           type = "app";
           program = toString (
             pkgs.writers.writeBash "test-all" ''
-              echo "🚀 Running comprehensive test suite..."
-
-              echo ""
-              echo "📋 Part 1: Building and testing regular configurations..."
-
-              # Build all regular configurations sequentially
-              for config in ${nixpkgs.lib.concatStringsSep " " testConfigurations}; do
-                echo "🔨 Building $config..."
-                if ! nix run .#build-$config; then
-                  echo "❌ Build failed for $config"
-                  exit 1
-                fi
-              done
-
-              echo ""
-              echo "✅ All regular builds completed"
-
-              # Run regular tests with Python validator (direct call for performance)
-              if [[ ! -f "./validators/main.py" ]]; then
-                echo "❌ ./validators/main.py not found, skipping regular tests"
-              else
-                echo ""
-                echo "🧪 Running regular tests..."
-
-                TEST_FAILED=0
-                for config in ${nixpkgs.lib.concatStringsSep " " testConfigurations}; do
-                  echo ""
-                  echo "🧪 Testing $config..."
-
-                  # Check if required files exist
-                  if [[ ! -f "$config.tf.json" ]]; then
-                    echo "❌ $config.tf.json not found."
-                    TEST_FAILED=1
-                    continue
-                  fi
-
-                  if [[ ! -f "./expected-results/$config.json" ]]; then
-                    echo "⚠️  ./expected-results/$config.json not found, skipping validation for $config"
-                    continue
-                  fi
-
-                  # Run the Python validator directly (fast approach)
-                  if ${validator}/bin/validator "$config" --test-dir .; then
-                    echo "✅ $config test passed"
-                  else
-                    echo "❌ $config test failed"
-                    TEST_FAILED=1
-                  fi
-                done
-
-                if [[ $TEST_FAILED -ne 0 ]]; then
-                  echo ""
-                  echo "💥 Some regular tests failed!"
-                  exit 1
-                fi
-              fi
-
-              echo ""
-              echo "📋 Part 2: Testing error case configurations..."
-
-              if [[ -z "${nixpkgs.lib.concatStringsSep " " errorTestConfigurations}" ]]; then
-                echo "✅ No error cases to test"
-              else
-                # Test all error case configurations (optimized approach)
-                ERROR_TEST_FAILED=0
-                for config in ${nixpkgs.lib.concatStringsSep " " errorTestConfigurations}; do
-                  echo ""
-                  echo "🧪 Testing error case: $config..."
-
-                  # Check if expected error file exists
-                  if [[ ! -f "./expected-errors/$config.txt" ]]; then
-                    echo "❌ ./expected-errors/$config.txt not found."
-                    ERROR_TEST_FAILED=1
-                    continue
-                  fi
-
-                  expected_error=$(cat "./expected-errors/$config.txt")
-
-                  # Try to build (should fail)
-                  echo "🔨 Attempting to build $config (expecting failure)..."
-                  build_output=$(nix run .#build-error-$config 2>&1 || true)
-
-                  # Check if build actually failed
-                  if nix run .#build-error-$config 2>/dev/null; then
-                    echo "❌ Build succeeded but should have failed!"
-                    ERROR_TEST_FAILED=1
-                    continue
-                  fi
-
-                  # Check if error message contains expected text
-                  if echo "$build_output" | grep -qF "$expected_error"; then
-                    echo "✅ $config error test passed"
-                  else
-                    echo "❌ $config error test failed"
-                    echo "   Expected error: $expected_error"
-                    echo "   Actual output:"
-                    echo "$build_output"
-                    ERROR_TEST_FAILED=1
-                  fi
-                done
-
-                if [[ $ERROR_TEST_FAILED -ne 0 ]]; then
-                  echo ""
-                  echo "💥 Some error case tests failed!"
-                  exit 1
-                fi
-              fi
-
-              echo ""
-              echo "🎉 All tests passed! (Regular + Error Cases)"
-              exit 0
+              exec ${runner}/bin/test-runner all --test-dir . "$@"
             ''
           );
         };
@@ -549,12 +391,26 @@
           testAllErrorsApp = {
             test-all-errors = createTestAllErrorsApp { inherit pkgs system; };
           };
+
+          benchEvalApp = {
+            bench-eval = createBenchEvalApp { inherit pkgs system; };
+          };
         in
-        individualApps // buildAllApp // testApps // testAllBuildsApp // testAllApp // errorBuildApps // errorTestApps // testAllErrorsApp;
+        individualApps // buildAllApp // testApps // testAllBuildsApp // testAllApp // errorBuildApps // errorTestApps // testAllErrorsApp // benchEvalApp;
     in
     {
       apps = forEachSystem ({ system, pkgs }: generateBuildApps { inherit pkgs system; });
 
+      packages = forEachSystem (
+        { system, pkgs }:
+        nixpkgs.lib.listToAttrs (
+          map (controlPlanes: {
+            name = "scaling-${toString controlPlanes}";
+            value = createScalingConfiguration { inherit system controlPlanes; };
+          }) scalingSizes
+        )
+      );
+
       devShells = forEachSystem (
         { system, pkgs }:
         let
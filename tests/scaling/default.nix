@@ -0,0 +1,78 @@
+# Generated case for evaluation-time scaling tests: `controlPlanes` control
+# planes spread round-robin over the allowed regions. Every other control
+# plane is a plain one, and every `groupSize` plain control planes of a region
+# are joined in a control plane group. The rest cycle through certificate,
+# storage, system account and output settings, so every filtered collection
+# has members.
+{
+  lib,
+  controlPlanes,
+  groupSize ? 50,
+}:
+let
+  regions = [
+    "au"
+    "us"
+    "sg"
+    "me"
+    "eu"
+    "in"
+  ];
+
+  # Settings of the control planes that aren't group members
+  profiles = [
+    {
+      create_certificate = true;
+      storage_backend = [ "aws" ];
+      aws = {
+        enable = true;
+        tags.owner = "kontfix";
+      };
+    }
+    {
+      storage_backend = [ "hcv" ];
+      system_account = {
+        enable = true;
+        generate_token = true;
+      };
+    }
+    {
+      storage_backend = [ "local" ];
+      store_cluster_config = true;
+    }
+    {
+      output = true;
+      system_account.enable = true;
+    }
+  ];
+
+  generated = lib.genList (i: {
+    region = lib.elemAt regions (lib.mod i (lib.length regions));
+    name = "cp-${toString i}";
+    config = if lib.mod i 2 == 0 then { } else lib.elemAt profiles (lib.mod (i / 2) (lib.length profiles));
+  }) controlPlanes;
+
+  regionControlPlanes =
+    region: cps:
+    let
+      members = map (cp: cp.name) (lib.filter (cp: cp.config == { }) cps);
+      groupCount = (lib.length members + groupSize - 1) / groupSize;
+      groups = lib.genList (index: {
+        name = "${region}-group-${toString index}";
+        value = {
+          cluster_type = "CLUSTER_TYPE_CONTROL_PLANE_GROUP";
+          members = lib.sublist (index * groupSize) groupSize members;
+        };
+      }) groupCount;
+    in
+    lib.listToAttrs (map (cp: lib.nameValuePair cp.name cp.config) cps) // lib.listToAttrs groups;
+in
+{
+  kontfix = {
+    defaults.storage.hcv = {
+      address = "https://vault.example.com";
+      auth_method = "token";
+    };
+    controlPlanes = lib.mapAttrs regionControlPlanes (lib.groupBy (cp: cp.region) generated);
+  };
+}
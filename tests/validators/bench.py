@@ -0,0 +1,697 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the partial JSON validator.
+Run from the tests directory, e.g. `python validators/bench.py startup`.
+"""
+
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import types
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+VALIDATOR = Path(__file__).resolve().parent / "main.py"
+REPO_ROOT = VALIDATOR.parents[2]
+HISTORY_FILE = VALIDATOR.parent / ".bench-history.jsonl"
+
+sys.path.insert(0, str(VALIDATOR.parent))
+
+import main as validator  # noqa: E402
+
+
+def time_call(func: Callable[[], object], repeat: int) -> List[float]:
+    """Wall time in seconds of each of `repeat` calls"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def format_timings(label: str, timings: List[float]) -> str:
+    """One benchmark table row in milliseconds"""
+    return (f"{label:<32} min {min(timings) * 1000:9.2f} ms   "
+            f"median {statistics.median(timings) * 1000:9.2f} ms")
+
+
+def validator_at_revision(revision: str, workdir: Path) -> Path:
+    """Write main.py as of a git revision into workdir"""
+    source = subprocess.run(
+        ["git", "show", f"{revision}:tests/validators/main.py"],
+        cwd=REPO_ROOT, check=True, capture_output=True, text=True
+    ).stdout
+    path = workdir / f"main-{revision.replace('/', '_')}.py"
+    path.write_text(source)
+    return path
+
+
+def validator_module_at_revision(revision: str) -> types.ModuleType:
+    """Import main.py as of a git revision as a standalone module"""
+    source = subprocess.run(
+        ["git", "show", f"{revision}:tests/validators/main.py"],
+        cwd=REPO_ROOT, check=True, capture_output=True, text=True
+    ).stdout
+    module = types.ModuleType(f"validator_{revision}")
+    exec(compile(source, f"main.py@{revision}", "exec"), module.__dict__)
+    return module
+
+
+def write_passing_case(test_dir: Path, name: str = "bench-startup") -> str:
+    """Write a small config and expectations that validate cleanly"""
+    actual = {
+        "provider": {"konnect": [{"alias": "au",
+                                  "server_url": "https://au.api.konghq.com"}]},
+        "resource": {"konnect_gateway_control_plane": {
+            "au-test": {"name": "test", "provider": "konnect.au",
+                        "cluster_type": "CLUSTER_TYPE_CONTROL_PLANE"}
+        }},
+        "variable": {"cp_admin_token": {"type": "string"}},
+    }
+    expected = {
+        "providers": [{"provider": "konnect", "alias": "au"}],
+        "control_planes": [{"resource_name": "au-test", "name": "test"}],
+        "variables": [{"variable_name": "cp_admin_token", "type": "string"}],
+    }
+    (test_dir / "expected-results").mkdir(parents=True, exist_ok=True)
+    (test_dir / f"{name}.tf.json").write_text(json.dumps(actual))
+    (test_dir / "expected-results" / f"{name}.json").write_text(
+        json.dumps(expected))
+    return name
+
+
+def startup_command(script: Path, test_dir: Path,
+                    config_name: str) -> List[str]:
+    """Validator command line for a cold start, bypassing the result cache"""
+    command = [sys.executable, str(script), config_name,
+               "--test-dir", str(test_dir)]
+    # Revisions before the cache have no flag, and nothing to replay
+    if "--no-cache" in script.read_text(encoding="utf-8"):
+        command.append("--no-cache")
+    return command
+
+
+def bench_startup(args) -> None:
+    """Cold-start time of the validator CLI on an all-passing config"""
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        config_name = write_passing_case(workdir)
+
+        scripts: Dict[str, Path] = {}
+        if args.baseline:
+            scripts[f"before ({args.baseline})"] = validator_at_revision(
+                args.baseline, workdir)
+        scripts["after (working tree)"] = VALIDATOR
+
+        print(f"Cold start, {args.repeat} runs each "
+              f"({sys.executable})")
+        for label, script in scripts.items():
+            command = startup_command(script, workdir, config_name)
+            timings = time_call(
+                lambda: subprocess.run(command, check=True,
+                                       stdout=subprocess.DEVNULL),
+                args.repeat
+            )
+            print(format_timings(label, timings))
+
+
+def naive_is_subset(expected: Any, actual: Any) -> bool:
+    """Reference is_subset with the original pairwise list scan"""
+    if expected is None or actual is None:
+        return expected == actual
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        return all(key in actual and naive_is_subset(expected[key], actual[key])
+                   for key in expected)
+    if isinstance(expected, list) and isinstance(actual, list):
+        return all(any(naive_is_subset(exp_item, act_item)
+                       for act_item in actual)
+                   for exp_item in expected)
+    return expected == actual
+
+
+def membership_lists(size: int, seed: int = 0):
+    """Expected/actual members and tags shaped like a large CP group"""
+    rng = random.Random(seed)
+    members = [
+        {"id": f"${{konnect_gateway_control_plane.au-cp-{i}.id}}",
+         "labels": {"env": rng.choice(["dev", "prod"]), "team": f"t{i % 7}"}}
+        for i in range(size)
+    ]
+    tags = [f"tag-{i}" for i in range(size)]
+    actual = {"members": members, "tags": tags}
+    expected = {
+        "members": [{"id": member["id"]} for member in reversed(members)],
+        "tags": list(reversed(tags)),
+    }
+    return expected, actual
+
+
+def bench_is_subset(args) -> None:
+    """is_subset on membership and tag lists, naive scan vs indexed"""
+    print(f"is_subset, {args.repeat} runs each")
+    for size in args.sizes:
+        expected, actual = membership_lists(size)
+        indexed = time_call(lambda: validator.is_subset(expected, actual),
+                            args.repeat)
+        print(format_timings(f"{size:>6} items, indexed", indexed))
+        if size > args.naive_limit:
+            print(f"{size:>6} items, naive scan       skipped "
+                  f"(> --naive-limit {args.naive_limit})")
+            continue
+        results = []
+        naive = time_call(
+            lambda: results.append(naive_is_subset(expected, actual)),
+            args.repeat
+        )
+        print(format_timings(f"{size:>6} items, naive scan", naive))
+        assert results[-1] == validator.is_subset(expected, actual)
+
+
+def synthetic_expectations(entries: int):
+    """Expected/actual configs with `entries` expected entries in total"""
+    per_section = entries // 4
+    expected: Dict[str, List[Dict]] = {
+        "providers": [], "control_planes": [], "resources": [],
+        "variables": [],
+    }
+    actual: Dict[str, Dict] = {
+        "provider": {"konnect": []},
+        "resource": {"konnect_gateway_control_plane": {},
+                     "konnect_system_account": {}},
+        "variable": {},
+    }
+    for i in range(per_section):
+        alias = f"region-{i}"
+        actual["provider"]["konnect"].append({
+            "alias": alias,
+            "server_url": f"https://{alias}.api.konghq.com",
+        })
+        expected["providers"].append({"provider": "konnect", "alias": alias})
+
+        cp_name = f"{alias}-cp"
+        actual["resource"]["konnect_gateway_control_plane"][cp_name] = {
+            "name": cp_name, "provider": f"konnect.{alias}",
+            "cluster_type": "CLUSTER_TYPE_CONTROL_PLANE",
+        }
+        expected["control_planes"].append({
+            "resource_name": cp_name,
+            "cluster_type": "CLUSTER_TYPE_CONTROL_PLANE",
+        })
+
+        actual["resource"]["konnect_system_account"][cp_name] = {
+            "name": f"{cp_name}-system-account",
+            "provider": "konnect.id_admin",
+        }
+        expected["resources"].append({
+            "resource_type": "konnect_system_account",
+            "resource_name": cp_name,
+            "provider": "konnect.id_admin",
+        })
+
+        actual["variable"][f"{alias}_token"] = {"type": "string"}
+        expected["variables"].append({"variable_name": f"{alias}_token",
+                                      "type": "string"})
+    return expected, actual
+
+
+def compile_expectations(module: types.ModuleType, expected: Dict) -> Dict:
+    """Compiled sections where the module supports plans, else raw ones"""
+    if hasattr(module, "compile_plan"):
+        return module.compile_plan(expected).sections
+    return expected
+
+
+def run_section_validators(module: types.ModuleType, expected: Dict,
+                           actual: Dict) -> bool:
+    """Run the four section validators the way validate_config does"""
+    index = (module.ConfigIndex(actual) if hasattr(module, "ConfigIndex")
+             else None)
+    extra = (index,) if index is not None else ()
+    sections = [
+        module.validate_providers(expected["providers"], actual, *extra),
+        module.validate_control_planes(expected["control_planes"], actual,
+                                       *extra),
+        module.validate_generic_resources(expected["resources"], actual,
+                                          *extra),
+        module.validate_variables(expected["variables"], actual, *extra),
+    ]
+    return all(section.all_found for section in sections)
+
+
+def bench_sections(args) -> None:
+    """Section validators over a synthetic expectations file"""
+    expected, actual = synthetic_expectations(args.entries)
+
+    modules: Dict[str, types.ModuleType] = {}
+    if args.baseline:
+        modules[f"before ({args.baseline})"] = validator_module_at_revision(
+            args.baseline)
+    modules["after (working tree)"] = validator
+
+    print(f"Section validators, {args.entries} expected entries, "
+          f"{args.repeat} runs each")
+    for label, module in modules.items():
+        if hasattr(module, "compile_plan"):
+            timings = time_call(lambda: module.compile_plan(expected),
+                                args.repeat)
+            print(format_timings(f"{label} compile", timings))
+        sections = compile_expectations(module, expected)
+        timings = time_call(
+            lambda: run_section_validators(module, sections, actual),
+            args.repeat
+        )
+        assert run_section_validators(module, sections, actual)
+        print(format_timings(label, timings))
+
+
+# Mirrors allowedRegions and supportedStorageBackends in lib/utils.nix
+REGIONS = ("au", "us", "sg", "me", "eu", "in")
+STORAGE_BACKENDS = ("aws", "hcv", "local")
+
+
+def kontfix_output(control_planes: int, group_size: int = 50
+                   ) -> Tuple[Dict, Dict]:
+    """Synthetic terranix output and expectations shaped like kontfix's
+
+    Control planes are spread round-robin over all allowed regions, each
+    with a pinned client certificate, a system account with token and
+    role, and its cluster config stored in AWS, HCV or a local file.
+    Every `group_size` control planes of a region form a control plane
+    group with a membership listing them. The expectations assert on
+    every block, with membership members in reverse order.
+    """
+    actual: Dict[str, Dict] = {
+        "provider": {
+            "konnect": [
+                {"alias": region,
+                 "personal_access_token": "${var.cp_admin_token}",
+                 "server_url": f"https://{region}.api.konghq.com"}
+                for region in REGIONS
+            ] + [{"alias": "id_admin",
+                  "personal_access_token": "${var.id_admin_token}",
+                  "server_url": "https://global.api.konghq.com"}],
+            "aws": [],
+            "vault": [{"alias": "storage",
+                       "address": "https://vault.example.com"}],
+        },
+        "resource": {},
+        "variable": {"cp_admin_token": {"type": "string"},
+                     "id_admin_token": {"type": "string"},
+                     "vault_token": {"type": "string"}},
+    }
+    resources = actual["resource"]
+
+    def add(resource_type: str, name: str, block: Dict) -> None:
+        resources.setdefault(resource_type, {})[name] = block
+
+    add("time_rotating", "token", {"rotation_days": 30})
+
+    members: Dict[str, List[str]] = {region: [] for region in REGIONS}
+    for i in range(control_planes):
+        region = REGIONS[i % len(REGIONS)]
+        name = f"cp-{i}"
+        cp = f"{region}-{name}"
+        cp_id = f"${{konnect_gateway_control_plane.{cp}.id}}"
+        members[region].append(cp)
+
+        add("konnect_gateway_control_plane", cp, {
+            "name": name,
+            "provider": f"konnect.{region}",
+            "auth_type": "pinned_client_certs",
+            "cluster_type": "CLUSTER_TYPE_CONTROL_PLANE",
+            "description": f"Synthetic control plane {name}",
+            "labels": {"generated_by": "kontfix", "team": f"team-{i % 7}"},
+        })
+        add("tls_private_key", cp, {"algorithm": "RSA", "rsa_bits": 2048})
+        add("tls_self_signed_cert", cp, {
+            "private_key_pem": f"${{tls_private_key.{cp}.private_key_pem}}",
+            "subject": [{"common_name": f"konnect-{cp}"}],
+            "validity_period_hours": 2160,
+            "allowed_uses": ["digital_signature", "key_encipherment",
+                             "client_auth"],
+            "depends_on": [f"tls_private_key.{cp}"],
+        })
+        add("konnect_gateway_data_plane_client_certificate", cp, {
+            "control_plane_id": cp_id,
+            "cert": f"${{tls_self_signed_cert.{cp}.cert_pem}}",
+            "provider": f"konnect.{region}",
+        })
+        add("konnect_system_account", cp, {
+            "name": f"{cp}-system-account",
+            "description": f"System account for {cp}",
+            "konnect_managed": False,
+            "provider": "konnect.id_admin",
+        })
+        add("konnect_system_account_access_token", cp, {
+            "name": f"{cp}-token",
+            "account_id": f"${{konnect_system_account.{cp}.id}}",
+            "expires_at": "${time_rotating.token.rotation_rfc3339}",
+            "provider": "konnect.id_admin",
+        })
+        add("konnect_system_account_role", f"{cp}-admin-role", {
+            "account_id": f"${{konnect_system_account.{cp}.id}}",
+            "entity_id": cp_id,
+            "entity_region": region,
+            "entity_type_name": "Control Planes",
+            "role_name": "Admin",
+            "provider": "konnect.id_admin",
+        })
+
+        backend = STORAGE_BACKENDS[i % len(STORAGE_BACKENDS)]
+        config = f"${{jsonencode({{\"cluster\": {cp_id}}})}}"
+        if backend == "aws":
+            actual["provider"]["aws"].append(
+                {"alias": cp, "region": "ap-southeast-2"})
+            add("aws_secretsmanager_secret", f"{cp}_cluster_config", {
+                "name": f"konnect/{region}/{name}/cluster-config",
+                "tags": {"owner": "kontfix"},
+                "provider": f"aws.{cp}",
+            })
+            add("aws_secretsmanager_secret_version", f"{cp}_cluster_config", {
+                "secret_id": (f"${{aws_secretsmanager_secret."
+                              f"{cp}_cluster_config.id}}"),
+                "secret_string": config,
+                "provider": f"aws.{cp}",
+            })
+        elif backend == "hcv":
+            add("vault_kv_secret_v2", f"{cp}_cluster_config", {
+                "mount": "konnect",
+                "name": f"{region}/{name}/cluster-config",
+                "data_json": config,
+                "provider": "vault.storage",
+            })
+        else:
+            add("local_file", f"{cp}_cluster_config", {
+                "filename": f"${{path.module}}/configs/{cp}.json",
+                "content": config,
+            })
+
+    for region, names in members.items():
+        for start in range(0, len(names), group_size):
+            group = f"{region}-group-{start // group_size}"
+            add("konnect_gateway_control_plane", group, {
+                "name": group,
+                "provider": f"konnect.{region}",
+                "auth_type": "pinned_client_certs",
+                "cluster_type": "CLUSTER_TYPE_CONTROL_PLANE_GROUP",
+            })
+            add("konnect_gateway_control_plane_membership", group, {
+                "id": f"${{konnect_gateway_control_plane.{group}.id}}",
+                "members": [
+                    {"id": f"${{konnect_gateway_control_plane.{cp}.id}}"}
+                    for cp in names[start:start + group_size]
+                ],
+                "provider": f"konnect.{region}",
+            })
+
+    expected: Dict[str, List[Dict]] = {
+        "providers": [
+            dict(block, provider=provider)
+            for provider, blocks in actual["provider"].items()
+            for block in blocks
+        ],
+        "control_planes": [
+            dict(block, resource_name=name)
+            for name, block in resources[
+                "konnect_gateway_control_plane"].items()
+        ],
+        "resources": [],
+        "variables": [
+            dict(block, variable_name=name)
+            for name, block in actual["variable"].items()
+        ],
+    }
+    for resource_type, blocks in resources.items():
+        if resource_type == "konnect_gateway_control_plane":
+            continue
+        for name, block in blocks.items():
+            entry = dict(block, resource_type=resource_type,
+                         resource_name=name)
+            if "members" in entry:
+                entry["members"] = entry["members"][::-1]
+            expected["resources"].append(entry)
+
+    return expected, actual
+
+
+def write_kontfix_case(test_dir: Path, control_planes: int,
+                       group_size: int = 50) -> str:
+    """Write a synthetic case into test_dir and return its config name"""
+    name = f"synthetic-{control_planes}"
+    expected, actual = kontfix_output(control_planes, group_size)
+    (test_dir / "expected-results").mkdir(parents=True, exist_ok=True)
+    with open(test_dir / f"{name}.tf.json", "w") as f:
+        json.dump(actual, f, indent=2)
+    with open(test_dir / "expected-results" / f"{name}.json", "w") as f:
+        json.dump(expected, f, indent=2)
+    return name
+
+
+def bench_generate(args) -> None:
+    """Write synthetic kontfix outputs and expectations"""
+    args.out.mkdir(parents=True, exist_ok=True)
+    for size in args.sizes:
+        name = write_kontfix_case(args.out, size, args.group_size)
+        size_mb = (args.out / f"{name}.tf.json").stat().st_size / 1e6
+        print(f"{name}: {size} control planes, {size_mb:.1f} MB")
+
+
+def edited_copy(actual: Dict, edits: int, seed: int = 0) -> Dict:
+    """Deep copy of a kontfix output with `edits` resources changed, one
+    added and one removed"""
+    edited = json.loads(json.dumps(actual))
+    resources = [(kind, name)
+                 for kind, blocks in edited["resource"].items()
+                 for name in blocks]
+    kind, name = resources.pop()
+    del edited["resource"][kind][name]
+    rng = random.Random(seed)
+    for kind, name in rng.sample(resources, edits):
+        edited["resource"][kind][name]["bench_edit"] = True
+    edited["resource"].setdefault("bench_added", {})["added"] = {}
+    return edited
+
+
+def bench_diff(args) -> None:
+    """diff_configs between synthetic outputs and edited copies"""
+    for size in args.sizes:
+        _, actual = kontfix_output(size, args.group_size)
+        edited = edited_copy(actual, args.edits)
+        resources = sum(len(blocks) for blocks in actual["resource"].values())
+        print(f"{size} control planes ({resources} resources), "
+              f"{args.repeat} runs each")
+
+        diff = validator.diff_configs(actual, edited)
+        assert (len(diff.changed), len(diff.added), len(diff.removed)) == (
+            args.edits, 1, 1), diff
+        for label, other in (("identical", actual), ("edited", edited)):
+            runs = time_call(lambda: validator.diff_configs(actual, other),
+                             args.repeat)
+            print(format_timings(f"  diff {label}", runs))
+
+
+def current_revision() -> str:
+    """Short HEAD revision, marked dirty if the validators have changes"""
+    def git(*command: str) -> str:
+        return subprocess.run(["git", *command], cwd=REPO_ROOT,
+                              capture_output=True, text=True).stdout.strip()
+
+    revision = git("rev-parse", "--short", "HEAD") or "unknown"
+    if git("status", "--porcelain", "--", str(VALIDATOR.parent)):
+        revision += "-dirty"
+    return revision
+
+
+def previous_record(history: Path, revision: str) -> Optional[Dict]:
+    """Most recent recorded run from another revision"""
+    if not history.is_file():
+        return None
+    previous = None
+    with open(history) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("revision") != revision:
+                previous = record
+    return previous
+
+
+def stage_timings(test_dir: Path, config_name: str,
+                  repeat: int) -> Dict[str, float]:
+    """Median milliseconds per validate_config phase, from --profile"""
+    runs: Dict[str, List[float]] = {}
+    for _ in range(repeat):
+        profiler = validator.enable_profiling()
+        try:
+            validator.validate_config(config_name, test_dir,
+                                      references=True)
+        finally:
+            validator.disable_profiling()
+        for phase, (elapsed, _) in profiler.phases.items():
+            runs.setdefault(phase, []).append(elapsed * 1000)
+    return {phase: statistics.median(times) for phase, times in runs.items()}
+
+
+def bench_scaling(args) -> None:
+    """validate_config end to end and per stage on synthetic outputs"""
+    revision = current_revision()
+    results: Dict[str, Dict[str, float]] = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_dir = Path(tmp)
+        for size in args.sizes:
+            config_name = write_kontfix_case(test_dir, size, args.group_size)
+            size_mb = (test_dir / f"{config_name}.tf.json").stat().st_size / 1e6
+            print(f"{size} control planes ({size_mb:.1f} MB), "
+                  f"{args.repeat} runs each")
+
+            timings = {}
+            for label, options in (
+                    ("end to end", {}),
+                    ("end to end --stream", {"stream": True}),
+                    ("end to end --check-references", {"references": True})):
+                runs = time_call(
+                    lambda: validator.validate_config(config_name, test_dir,
+                                                      **options),
+                    args.repeat
+                )
+                print(format_timings(f"  {label}", runs))
+                timings[label] = statistics.median(runs) * 1000
+            assert validator.validate_config(config_name, test_dir,
+                                             references=True)[0]
+
+            default_backend = validator.JSON_BACKEND
+            for backend in validator.JSON_BACKENDS:
+                try:
+                    validator.use_json_backend(backend)
+                except ValueError:
+                    continue
+                runs = time_call(
+                    lambda: validator.load_json_file(
+                        test_dir / f"{config_name}.tf.json"),
+                    args.repeat
+                )
+                label = f"load actual ({backend})"
+                print(format_timings(f"  {label}", runs))
+                timings[label] = statistics.median(runs) * 1000
+            validator.use_json_backend(default_backend)
+
+            for phase, ms in stage_timings(test_dir, config_name,
+                                           args.repeat).items():
+                print(f"  {phase:<30} median {ms:9.2f} ms")
+                timings[phase] = ms
+            results[str(size)] = timings
+
+    if args.no_record:
+        return
+
+    previous = previous_record(args.history, revision)
+    if previous is not None:
+        print(f"\nChange vs {previous['revision']} (end to end):")
+        for size, timings in results.items():
+            before = previous["results"].get(size, {}).get("end to end")
+            if before:
+                change = (timings["end to end"] - before) / before * 100
+                print(f"  {size:>6} control planes  {before:9.2f} ms -> "
+                      f"{timings['end to end']:9.2f} ms  ({change:+.1f}%)")
+
+    record = {
+        "revision": revision,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "repeat": args.repeat,
+        "group_size": args.group_size,
+        "results": results,
+    }
+    with open(args.history, "a") as f:
+        f.write(json.dumps(record) + "\n")
+    print(f"\nRecorded in {args.history}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """CLI entry point"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Validator benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    startup = subparsers.add_parser("startup", help=bench_startup.__doc__)
+    startup.add_argument("--repeat", type=int, default=20)
+    startup.add_argument(
+        "--baseline",
+        metavar="REV",
+        help="Git revision of main.py to compare against (e.g. HEAD~1)"
+    )
+    startup.set_defaults(func=bench_startup)
+
+    subset = subparsers.add_parser("is-subset", help=bench_is_subset.__doc__)
+    subset.add_argument("--repeat", type=int, default=1)
+    subset.add_argument("--sizes", type=int, nargs="+",
+                        default=[10, 1_000, 10_000])
+    subset.add_argument(
+        "--naive-limit",
+        type=int,
+        default=1_000,
+        help=("Skip the quadratic reference above this size; it takes "
+              "minutes at 10_000 items (default: 1_000)")
+    )
+    subset.set_defaults(func=bench_is_subset)
+
+    sections = subparsers.add_parser("sections", help=bench_sections.__doc__)
+    sections.add_argument("--repeat", type=int, default=5)
+    sections.add_argument("--entries", type=int, default=5_000)
+    sections.add_argument(
+        "--baseline",
+        metavar="REV",
+        help="Git revision of main.py to compare against (e.g. HEAD~1)"
+    )
+    sections.set_defaults(func=bench_sections)
+
+    generate = subparsers.add_parser("generate", help=bench_generate.__doc__)
+    generate.add_argument("--out", type=Path, required=True)
+    generate.add_argument("--sizes", type=int, nargs="+", default=[1_000],
+                          metavar="CONTROL_PLANES")
+    generate.add_argument("--group-size", type=int, default=50)
+    generate.set_defaults(func=bench_generate)
+
+    diff = subparsers.add_parser("diff", help=bench_diff.__doc__)
+    diff.add_argument("--repeat", type=int, default=3)
+    diff.add_argument("--sizes", type=int, nargs="+", default=[5_000],
+                      metavar="CONTROL_PLANES")
+    diff.add_argument("--group-size", type=int, default=50)
+    diff.add_argument("--edits", type=int, default=10,
+                      help="Resources changed in the edited copy")
+    diff.set_defaults(func=bench_diff)
+
+    scaling = subparsers.add_parser("scaling", help=bench_scaling.__doc__)
+    scaling.add_argument("--repeat", type=int, default=3)
+    scaling.add_argument("--sizes", type=int, nargs="+",
+                         default=[100, 1_000, 5_000],
+                         metavar="CONTROL_PLANES")
+    scaling.add_argument("--group-size", type=int, default=50)
+    scaling.add_argument(
+        "--history",
+        type=Path,
+        default=HISTORY_FILE,
+        help=("JSON-lines file results are appended to and compared "
+              f"against (default: {HISTORY_FILE.name})")
+    )
+    scaling.add_argument("--no-record", action="store_true",
+                         help="Don't append this run to the history")
+    scaling.set_defaults(func=bench_scaling)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
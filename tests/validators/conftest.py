@@ -0,0 +1,12 @@
+"""Fixtures shared by the validator tests"""
+
+import pytest
+
+from derived_cases import validator
+
+
+@pytest.fixture
+def plain_output(monkeypatch):
+    """Reports use the dependency-free, uncolored output"""
+    monkeypatch.setattr(validator, "ENHANCED_MODE", False)
+    monkeypatch.setattr(validator, "_COLORS", {})
@@ -0,0 +1,148 @@
+"""
+Validator cases derived from the expected results in tests/cases, shared
+by the validator tests. The generated .tf.json files are build outputs,
+so each case's actual config is derived from its expected results: once
+matching, and once broken so every failure path is rendered. A third
+variant changes only the last item of each list, for the list
+diagnostics.
+"""
+
+import copy
+import importlib.util
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+VALIDATORS_DIR = Path(__file__).resolve().parent
+TESTS_DIR = VALIDATORS_DIR.parent
+REPORTS_DIR = VALIDATORS_DIR / "reports"
+
+sys.path.insert(0, str(VALIDATORS_DIR))
+
+import main as validator  # noqa: E402
+
+CASES = sorted(
+    path.stem for path in (TESTS_DIR / "cases").glob("*.nix")
+    if (TESTS_DIR / "expected-results" / f"{path.stem}.json").is_file()
+)
+
+JSON_BACKENDS = [backend for backend in validator.JSON_BACKENDS
+                 if importlib.util.find_spec(backend) is not None]
+
+RESOURCE_META = ("resource_name", "resource_type", "count_only")
+
+
+def strip(entry: Dict, keys: Tuple[str, ...]) -> Dict:
+    return {k: v for k, v in entry.items() if k not in keys}
+
+
+def derive_case(expected: Dict, broken: bool) -> Tuple[Dict, Dict]:
+    """Build an actual config satisfying expected (or deliberately not)"""
+    expected = copy.deepcopy(expected)
+    actual: Dict[str, Dict] = {"provider": {}, "resource": {}, "variable": {}}
+
+    for entry in expected.get("providers", []):
+        block = dict(strip(entry, ("provider",)), version="1.0")
+        actual["provider"].setdefault(entry["provider"], []).append(block)
+
+    for entry in expected.get("control_planes", []):
+        actual["resource"].setdefault("konnect_gateway_control_plane", {})[
+            entry["resource_name"]] = dict(strip(entry, RESOURCE_META),
+                                           description="generated")
+
+    for entry in expected.get("resources", []):
+        actual["resource"].setdefault(entry["resource_type"], {})[
+            entry["resource_name"]] = strip(entry, RESOURCE_META)
+
+    for entry in expected.get("variables", []):
+        if not entry.get("should_not_exist"):
+            actual["variable"][entry["variable_name"]] = strip(
+                entry, ("variable_name", "count_only", "should_not_exist"))
+
+    if not broken:
+        return expected, actual
+
+    # One failure of each kind the validators report
+    for blocks in actual["provider"].values():
+        blocks.pop()
+        break
+    for resources in actual["resource"].values():
+        for name, block in resources.items():
+            for key in block:
+                block[key] = "unexpected"
+                break
+            if isinstance(block.get("members"), list):
+                block["members"] = block["members"][:-1]
+        resources.pop(next(reversed(resources)))
+    for name in list(actual["variable"])[:1]:
+        del actual["variable"][name]
+    for entry in expected.get("variables", []):
+        if entry.get("should_not_exist"):
+            actual["variable"][entry["variable_name"]] = {"type": "string"}
+
+    expected.setdefault("providers", []).extend(
+        [{"alias": "orphan"}, {"provider": "google"}])
+    expected.setdefault("control_planes", []).append({"name": "orphan"})
+    expected.setdefault("resources", []).extend(
+        [{"resource_name": "orphan"},
+         {"resource_type": "konnect_system_account"}])
+    expected.setdefault("variables", []).append({"type": "string"})
+
+    return expected, actual
+
+
+def near_miss(item):
+    """A list item that almost, but not quite, matches the original"""
+    if isinstance(item, str):
+        return f"{item}-v2"
+    if isinstance(item, dict):
+        for key, value in item.items():
+            if isinstance(value, str):
+                return dict(item, **{key: f"{value}-v2"})
+    return item
+
+
+def derive_list_case(expected: Dict) -> Tuple[Dict, Dict]:
+    """Build an actual config whose last list items narrowly miss expected"""
+    expected, actual = derive_case(expected, broken=False)
+    # Blocks share their lists with the expected entries, which must stay
+    # untouched
+    actual = copy.deepcopy(actual)
+    for resources in actual["resource"].values():
+        for block in resources.values():
+            for value in block.values():
+                if isinstance(value, list) and value:
+                    value[-1] = near_miss(value[-1])
+    return expected, actual
+
+
+def render_case(case: str, tmp_dir: Path) -> str:
+    """Validation reports for the matching and broken variants of a case"""
+    expected = json.loads(
+        (TESTS_DIR / "expected-results" / f"{case}.json").read_text())
+
+    reports: List[str] = []
+    for variant in ("matching", "broken"):
+        name = f"{case}-{variant}"
+        case_expected, actual = derive_case(expected, variant == "broken")
+        (tmp_dir / "expected-results").mkdir(exist_ok=True)
+        (tmp_dir / "expected-results" / f"{name}.json").write_text(
+            json.dumps(case_expected))
+        (tmp_dir / f"{name}.tf.json").write_text(json.dumps(actual))
+
+        passed, output = validator.validate_config(name, tmp_dir)
+        reports.append(f"exit: {0 if passed else 1}\n{output}")
+
+    return "\n".join(reports)
+
+
+def write_broken_case(case: str, tmp_dir: Path, name: str = "case") -> None:
+    """Write the broken variant of a case into tmp_dir as `name`"""
+    expected = json.loads(
+        (TESTS_DIR / "expected-results" / f"{case}.json").read_text())
+    case_expected, actual = derive_case(expected, broken=True)
+    (tmp_dir / "expected-results").mkdir(exist_ok=True)
+    (tmp_dir / "expected-results" / f"{name}.json").write_text(
+        json.dumps(case_expected))
+    (tmp_dir / f"{name}.tf.json").write_text(json.dumps(actual))
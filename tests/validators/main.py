@@ -4,20 +4,31 @@ Partial JSON validator with detailed diagnostics.
 Validates that expected config is a subset of actual config.
 """
 
+import contextlib
+import fnmatch
+import functools
+import hashlib
+import importlib.util
 import json
+import mmap
+import os
+import pickle
+import re
 import sys
+import tempfile
+import time
+from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
-from dataclasses import dataclass
+from typing import (Any, Callable, Dict, FrozenSet, Iterator, List, Mapping,
+                    Optional, Pattern, Tuple)
+from dataclasses import dataclass, field
 from enum import Enum
 
-try:
-    from deepdiff import DeepDiff
-    from colorama import Fore, Style, init as colorama_init
-    ENHANCED_MODE = True
-    colorama_init(autoreset=True)
-except ImportError:
-    ENHANCED_MODE = False
+# Enhanced mode only needs colorama, which is imported on the first colored
+# write to a terminal.
+ENHANCED_MODE = importlib.util.find_spec("colorama") is not None
+
+_COLORS: Optional[Dict[str, str]] = None
 
 
 class ValidationStatus(Enum):
@@ -25,29 +36,262 @@ class ValidationStatus(Enum):
     FAILED = "❌"
 
 
+def load_colors() -> Dict[str, str]:
+    """Import colorama on first use when stdout is a terminal"""
+    global _COLORS
+    if _COLORS is None:
+        _COLORS = {}
+        if ENHANCED_MODE and sys.stdout.isatty():
+            try:
+                from colorama import Fore, Style, init as colorama_init
+            except ImportError:
+                return _COLORS
+            colorama_init(autoreset=True)
+            _COLORS = {
+                'green': Fore.GREEN,
+                'red': Fore.RED,
+                'yellow': Fore.YELLOW,
+                'blue': Fore.BLUE,
+                'cyan': Fore.CYAN,
+                'reset': Style.RESET_ALL,
+            }
+    return _COLORS
+
+
 def colorize(text: str, color: str) -> str:
     """Colorize text if enhanced mode is available"""
-    if not ENHANCED_MODE:
+    colors = load_colors()
+    if not colors:
         return text
-    
-    colors = {
-        'green': Fore.GREEN,
-        'red': Fore.RED,
-        'yellow': Fore.YELLOW,
-        'blue': Fore.BLUE,
-        'cyan': Fore.CYAN,
-    }
-    return f"{colors.get(color, '')}{text}{Style.RESET_ALL}"
+
+    return f"{colors.get(color, '')}{text}{colors['reset']}"
+
+
+class Profiler:
+    """Wall times per phase and subset-check counters for --profile.
+
+    Phases are aggregated by name across configs; every expected entry is
+    also timed individually so the slowest ones can be listed. Snapshots
+    are plain dicts, so worker processes can send theirs back to be merged.
+    """
+
+    def __init__(self):
+        self.config = ""
+        self.phases: Dict[str, List[float]] = {}
+        self.configs: Dict[str, float] = {}
+        self.entries: List[Tuple[float, str, str, str]] = []
+        self.subset_calls = 0
+        self.max_depth = 0
+        self.depth = 0
+
+    def record(self, phase: str, elapsed: float) -> None:
+        totals = self.phases.setdefault(phase, [0.0, 0])
+        totals[0] += elapsed
+        totals[1] += 1
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "phases": self.phases,
+            "configs": self.configs,
+            "entries": self.entries,
+            "subset_calls": self.subset_calls,
+            "max_depth": self.max_depth,
+        }
+
+    def merge(self, snapshot: Dict[str, Any]) -> None:
+        for phase, (elapsed, calls) in snapshot["phases"].items():
+            totals = self.phases.setdefault(phase, [0.0, 0])
+            totals[0] += elapsed
+            totals[1] += calls
+        self.configs.update(snapshot["configs"])
+        self.entries.extend(map(tuple, snapshot["entries"]))
+        self.subset_calls += snapshot["subset_calls"]
+        self.max_depth = max(self.max_depth, snapshot["max_depth"])
+
+    def summary(self, top: int = 10) -> Dict[str, Any]:
+        """Aggregated phases plus the slowest configs and entries"""
+        return {
+            "configs": len(self.configs),
+            "total_ms": sum(self.configs.values()) * 1000,
+            "phases": [
+                {"phase": phase, "calls": calls, "total_ms": elapsed * 1000,
+                 "mean_ms": elapsed * 1000 / calls}
+                for phase, (elapsed, calls) in sorted(
+                    self.phases.items(), key=lambda item: -item[1][0])
+            ],
+            "subset_calls": self.subset_calls,
+            "max_depth": self.max_depth,
+            "slowest_configs": [
+                {"config": config, "ms": elapsed * 1000}
+                for config, elapsed in sorted(
+                    self.configs.items(), key=lambda item: -item[1])[:top]
+            ],
+            "slowest_entries": [
+                {"config": config, "section": section, "subject": subject,
+                 "ms": elapsed * 1000}
+                for elapsed, config, section, subject in sorted(
+                    self.entries, reverse=True)[:top]
+            ],
+        }
+
+    def format_table(self, top: int = 10) -> str:
+        summary = self.summary(top)
+        header = (f"⏱️  Profile: {summary['configs']} configs, "
+                  f"{summary['total_ms']:.1f} ms validating")
+        lines = [header, "=" * len(header),
+                 f"{'Phase':<28}{'Calls':>8}{'Total ms':>12}{'Mean ms':>10}"]
+        lines.extend(
+            f"{row['phase']:<28}{row['calls']:>8}"
+            f"{row['total_ms']:>12.2f}{row['mean_ms']:>10.3f}"
+            for row in summary["phases"]
+        )
+        lines.append("")
+        lines.append(f"is_subset checks: {summary['subset_calls']} "
+                     f"(max recursion depth {summary['max_depth']})")
+        lines.append("")
+        lines.append("Slowest configs:")
+        lines.extend(f"{row['ms']:>10.2f} ms  {row['config']}"
+                     for row in summary["slowest_configs"])
+        lines.append("")
+        lines.append("Slowest entries:")
+        lines.extend(
+            f"{row['ms']:>10.2f} ms  {row['config']}  {row['section']}  "
+            f"{row['subject']}"
+            for row in summary["slowest_entries"]
+        )
+        lines.append("")
+        return "\n".join(lines)
+
+
+PROFILER: Optional[Profiler] = None
+
+_NO_PHASE = contextlib.nullcontext()
+
+
+def profile_phase(name: str) -> Any:
+    """Context manager timing a phase when profiling is enabled"""
+    return _NO_PHASE if PROFILER is None else PROFILER.phase(name)
+
+
+def _counted(check: Callable) -> Callable:
+    """Wrap a recursive subset check to count calls and nesting depth"""
+    @functools.wraps(check)
+    def counted(*args):
+        profiler = PROFILER
+        profiler.subset_calls += 1
+        profiler.depth += 1
+        if profiler.depth > profiler.max_depth:
+            profiler.max_depth = profiler.depth
+        try:
+            return check(*args)
+        finally:
+            profiler.depth -= 1
+    return counted
+
+
+def enable_profiling() -> Profiler:
+    """Start a fresh profile, instrumenting is_subset and the matchers
+
+    The subset checks are only wrapped while profiling, so normal runs
+    pay nothing for the counters.
+    """
+    global PROFILER, is_subset
+    if PROFILER is None:
+        is_subset = _counted(is_subset)
+        for matcher in MATCHER_TYPES:
+            matcher.matches = _counted(matcher.matches)
+    PROFILER = Profiler()
+    return PROFILER
+
+
+def disable_profiling() -> None:
+    """Stop profiling and restore the uninstrumented subset checks"""
+    global PROFILER, is_subset
+    if PROFILER is not None:
+        is_subset = is_subset.__wrapped__
+        for matcher in MATCHER_TYPES:
+            matcher.matches = matcher.matches.__wrapped__
+    PROFILER = None
 
 
-@dataclass
 class ValidationResult:
-    """Result of a single validation check"""
-    found: bool
-    message: str
-    detail: Optional[str] = None
-    expected: Optional[Any] = None
-    actual: Optional[Any] = None
+    """Result of a single validation check.
+
+    Results produced by the section engine keep only structured data
+    (outcome, section spec, key fields, expected and actual blocks); the
+    report ``message`` and ``detail`` are rendered on first access, so
+    pass/fail callers never format JSON dumps or run mismatch diagnostics.
+    """
+    __slots__ = ("found", "outcome", "spec", "fields", "expected", "actual",
+                 "strict_lists", "_message", "_detail", "_reason")
+
+    def __init__(self, found: bool, message: Optional[str] = None,
+                 detail: Optional[str] = None,
+                 expected: Optional[Any] = None, actual: Optional[Any] = None,
+                 outcome: str = "", spec: Optional[Any] = None,
+                 fields: Optional[Dict[str, Any]] = None,
+                 strict_lists: bool = False):
+        self.found = found
+        self.outcome = outcome or ("found" if found else "failed")
+        self.spec = spec
+        self.fields = fields
+        self.expected = expected
+        self.actual = actual
+        self.strict_lists = strict_lists
+        self._message = message
+        self._detail = detail
+        self._reason: Optional[str] = None
+
+    @property
+    def subject(self) -> Optional[str]:
+        return self.fields["subject"] if self.fields else None
+
+    @property
+    def message(self) -> str:
+        if self._message is None and self.spec is not None:
+            self._message = self.spec.message(self.outcome, self.fields)
+        return self._message or ""
+
+    @property
+    def reason(self) -> Optional[str]:
+        """Mismatch diagnostics (None unless properties don't match)"""
+        if self.outcome not in ("mismatch", "unmatched"):
+            return None
+        if self._reason is None:
+            with profile_phase("mismatch diagnostics"):
+                self._reason = get_mismatch_reason(
+                    self.expected, self.actual, strict=self.strict_lists)
+        return self._reason
+
+    @property
+    def detail(self) -> Optional[str]:
+        if self._detail is None and self.spec is not None:
+            if self.outcome == "mismatch":
+                self._detail = (
+                    f"Expected:\n{format_json_compact(self.expected)}\n"
+                    f"Actual:\n{format_json_compact(self.actual)}\n"
+                    f"Reason: {self.reason}"
+                )
+            elif self.outcome == "present":
+                self._detail = self.spec.message(
+                    "present_detail", self.fields,
+                    actual=format_json_compact(self.actual))
+            elif self.outcome == "missing":
+                self._detail = self.spec.message("missing_detail",
+                                                 self.fields)
+            elif self.outcome == "unmatched":
+                self._detail = self.spec.message("unmatched_detail",
+                                                 self.fields,
+                                                 reason=self.reason)
+        return self._detail
 
 
 @dataclass
@@ -58,86 +302,396 @@ class SectionValidation:
     summary: str
 
 
-def is_subset(expected: Any, actual: Any) -> bool:
-    """Check if expected is a subset of actual (recursive)"""
+# Below this many pairwise comparisons a plain scan beats building an index
+LIST_INDEX_THRESHOLD = 64
+
+SCALAR_TYPES = (str, int, float, bool)
+
+
+def is_hashable_scalar(value: Any) -> bool:
+    """True for scalars whose hash lookup agrees with == (excludes NaN)"""
+    return isinstance(value, SCALAR_TYPES) and value == value
+
+
+class ListIndex:
+    """Actual list items bucketed by cheap fingerprints for is_subset.
+
+    Scalars are bucketed by value and dicts by the values of the expected
+    dict's scalar keys, so each expected item is only compared with items
+    that can possibly match it. Buckets hold positions in the actual list
+    and are built lazily, shared by all expected items of the same shape.
+    """
+
+    def __init__(self, items: List[Any]):
+        self.items = items
+        self._scalars: Optional[Dict[Any, List[int]]] = None
+        self._dicts: Optional[List[int]] = None
+        self._buckets: Dict[Tuple[str, ...], Dict[Tuple, List[int]]] = {}
+
+    def scalar_positions(self, value: Any) -> List[int]:
+        if self._scalars is None:
+            self._scalars = {}
+            for position, item in enumerate(self.items):
+                if item is None or is_hashable_scalar(item):
+                    self._scalars.setdefault(item, []).append(position)
+        return self._scalars.get(value, [])
+
+    def dict_positions(self, expected: Dict) -> List[int]:
+        if self._dicts is None:
+            self._dicts = [position for position, item
+                           in enumerate(self.items)
+                           if isinstance(item, dict)]
+
+        keys = tuple(key for key, value in expected.items()
+                     if is_hashable_scalar(value))
+        if not keys:
+            return self._dicts
+
+        buckets = self._buckets.get(keys)
+        if buckets is None:
+            buckets = {}
+            items = self.items
+            for position in self._dicts:
+                try:
+                    fingerprint = tuple(items[position][key] for key in keys)
+                    buckets.setdefault(fingerprint, []).append(position)
+                except (KeyError, TypeError):
+                    # Missing or non-scalar values can never match
+                    continue
+            self._buckets[keys] = buckets
+
+        return buckets.get(tuple(expected[key] for key in keys), [])
+
+    def candidates(self, expected: Any, strict: bool = False) -> List[int]:
+        """Positions of the actual items that have expected as a subset"""
+        if expected is None or is_hashable_scalar(expected):
+            return self.scalar_positions(expected)
+
+        if isinstance(expected, dict):
+            positions = self.dict_positions(expected)
+        else:
+            positions = range(len(self.items))
+
+        items = self.items
+        return [position for position in positions
+                if is_subset(expected, items[position], strict)]
+
+    def contains(self, expected: Any) -> bool:
+        """True if some actual item has expected as a subset"""
+        if expected is None or is_hashable_scalar(expected):
+            return bool(self.scalar_positions(expected))
+
+        if isinstance(expected, dict):
+            items = self.items
+            return any(is_subset(expected, items[position])
+                       for position in self.dict_positions(expected))
+
+        return any(is_subset(expected, item) for item in self.items)
+
+
+def hopcroft_karp(adjacency: List[List[int]],
+                  right_size: int) -> List[int]:
+    """Maximum bipartite matching of left vertices to right vertices
+
+    ``adjacency[u]`` lists the right vertices left vertex ``u`` may be
+    paired with. Returns the right vertex matched to each left vertex, or
+    -1 where none is. Runs in O(E * sqrt(V)); augmenting paths are
+    followed with an explicit stack so long chains don't hit the
+    recursion limit.
+    """
+    match_left = [-1] * len(adjacency)
+    match_right = [-1] * right_size
+
+    # Greedy start: most vertices of a fingerprint-pruned graph have a
+    # single candidate, which leaves little for the phases below. Left
+    # vertices sharing one candidate list resume where the previous one
+    # stopped, since the positions it skipped stay taken.
+    resume: Dict[int, int] = {}
+    for u, edges in enumerate(adjacency):
+        k = resume.get(id(edges), 0)
+        while k < len(edges) and match_right[edges[k]] != -1:
+            k += 1
+        if k < len(edges):
+            match_left[u] = edges[k]
+            match_right[edges[k]] = u
+            k += 1
+        resume[id(edges)] = k
+
+    while True:
+        # Layer the graph by BFS from the free left vertices
+        layer = [-1] * len(adjacency)
+        queue = [u for u, v in enumerate(match_left) if v == -1]
+        for u in queue:
+            layer[u] = 0
+        reachable_free = False
+        for u in queue:
+            for v in adjacency[u]:
+                w = match_right[v]
+                if w == -1:
+                    reachable_free = True
+                elif layer[w] == -1:
+                    layer[w] = layer[u] + 1
+                    queue.append(w)
+        if not reachable_free:
+            return match_left
+
+        # Augment along vertex-disjoint shortest paths
+        next_edge = [0] * len(adjacency)
+        for root, matched in enumerate(match_left):
+            if matched != -1:
+                continue
+            stack, path = [root], []
+            while stack:
+                u = stack[-1]
+                edges = adjacency[u]
+                while next_edge[u] < len(edges):
+                    v = edges[next_edge[u]]
+                    next_edge[u] += 1
+                    w = match_right[v]
+                    if w == -1:
+                        path.append(v)
+                        for left, right in zip(stack, path):
+                            match_left[left] = right
+                            match_right[right] = left
+                        stack = []
+                        break
+                    if layer[w] == layer[u] + 1:
+                        path.append(v)
+                        stack.append(w)
+                        break
+                else:
+                    # Dead end: drop u from this phase and backtrack
+                    layer[u] = -1
+                    stack.pop()
+                    if path:
+                        path.pop()
+
+
+def share_key(item: Any) -> Any:
+    """Hashable key equal for identical container items"""
+    if isinstance(item, dict):
+        key = tuple(item.items())
+        try:
+            hash(key)
+            return key
+        except TypeError:
+            pass
+    return json.dumps(item, sort_keys=True, default=repr)
+
+
+def list_assignment(expected: List[Any], actual: List[Any]) -> List[int]:
+    """One-to-one assignment of expected items to actual items
+
+    Returns the actual position assigned to each expected item, or -1.
+    Scalars, dicts and lists can only match items of their own kind, so
+    scalars are assigned by counting equal values and only the other kinds
+    go through Hopcroft-Karp, over candidates pruned by ListIndex
+    fingerprints. Identical expected items share one candidate list.
+    """
+    index = ListIndex(actual)
+    assignment = [-1] * len(expected)
+    scalar_used: Dict[Any, int] = {}
+    containers: List[int] = []
+    adjacency: List[List[int]] = []
+    shared: Dict[str, List[int]] = {}
+
+    for i, item in enumerate(expected):
+        if item is None or is_hashable_scalar(item):
+            positions = index.scalar_positions(item)
+            used = scalar_used.get(item, 0)
+            if used < len(positions):
+                assignment[i] = positions[used]
+                scalar_used[item] = used + 1
+        elif isinstance(item, (dict, list)):
+            key = share_key(item)
+            candidates = shared.get(key)
+            if candidates is None:
+                candidates = shared[key] = index.candidates(item, strict=True)
+            containers.append(i)
+            adjacency.append(candidates)
+
+    for i, position in zip(containers,
+                           hopcroft_karp(adjacency, len(actual))):
+        assignment[i] = position
+    return assignment
+
+
+def is_subset(expected: Any, actual: Any, strict: bool = False) -> bool:
+    """Check if expected is a subset of actual (recursive)
+
+    With ``strict`` every expected list item needs its own actual item;
+    otherwise several expected items may match the same one.
+    """
     if expected is None or actual is None:
         return expected == actual
     
     if isinstance(expected, dict) and isinstance(actual, dict):
         return all(
-            key in actual and is_subset(expected[key], actual[key])
+            key in actual and is_subset(expected[key], actual[key], strict)
             for key in expected
         )
     
     if isinstance(expected, list) and isinstance(actual, list):
+        if strict:
+            return (len(expected) <= len(actual)
+                    and -1 not in list_assignment(expected, actual))
+
         # For lists: each expected item must match at least one actual item
-        return all(
-            any(is_subset(exp_item, act_item) for act_item in actual)
-            for exp_item in expected
-        )
+        if len(expected) * len(actual) <= LIST_INDEX_THRESHOLD:
+            return all(
+                any(is_subset(exp_item, act_item) for act_item in actual)
+                for exp_item in expected
+            )
+
+        index = ListIndex(actual)
+        return all(index.contains(exp_item) for exp_item in expected)
     
     return expected == actual
 
 
-def get_mismatch_reason(expected: Any, actual: Any,
-                        path: str = "") -> Optional[str]:
-    """Return human-readable reason for mismatch (None if matches)"""
-    if expected == actual:
-        return None
+# Unmatched list items described per mismatch; the rest are only counted
+LIST_MISMATCH_LIMIT = 3
 
-    # Use DeepDiff for enhanced mode
-    if ENHANCED_MODE:
-        diff = DeepDiff(expected, actual, ignore_order=False, view='tree')
-        if not diff:
-            return None
+# Longest rendering of an unmatched list item in a mismatch reason
+DESCRIBE_LIMIT = 80
 
-        reasons = []
-        if 'dictionary_item_added' in diff:
-            added = [str(item) for item in diff['dictionary_item_added']]
-            reasons.append(f"extra keys in actual: {', '.join(added)}")
-
-        if 'dictionary_item_removed' in diff:
-            removed = [str(item)
-                       for item in diff['dictionary_item_removed']]
-            reasons.append(f"missing keys: {', '.join(removed)}")
-
-        if 'values_changed' in diff:
-            for item in diff['values_changed']:
-                old_val = item.t1
-                new_val = item.t2
-                reasons.append(
-                    f"at {item.path()}: expected {old_val!r}, got {new_val!r}"
-                )
+JSON_TYPE_NAMES = ((bool, "boolean"), ((int, float), "number"),
+                   (str, "string"), (list, "array"), (dict, "object"))
+
+
+def json_type(value: Any) -> str:
+    """JSON name of a value's type"""
+    if value is None:
+        return "null"
+    return next((name for types, name in JSON_TYPE_NAMES
+                 if isinstance(value, types)), type(value).__name__)
+
+
+def describe(value: Any) -> str:
+    """Short single-line JSON rendering of a value"""
+    text = json.dumps(value, sort_keys=True, default=str)
+    if len(text) > DESCRIBE_LIMIT:
+        return text[:DESCRIBE_LIMIT - 1] + "…"
+    return text
+
+
+def similarity(expected: Any, actual: Any) -> float:
+    """How close actual comes to containing expected, from 0 to 1"""
+    if isinstance(expected, dict):
+        if not isinstance(actual, dict) or not expected:
+            return 0.0
+        score = 0.0
+        for key, value in expected.items():
+            if key not in actual:
+                continue
+            if is_subset(value, actual[key]):
+                score += 1.0
+            else:
+                score += 0.25 + 0.5 * similarity(value, actual[key])
+        return score / len(expected)
+    if isinstance(expected, str) and isinstance(actual, str):
+        # Shared prefix and suffix: linear, and a good fit for references
+        # and names that differ in one segment
+        longest = max(len(expected), len(actual))
+        if not longest:
+            return 1.0
+        prefix = len(os.path.commonprefix((expected, actual)))
+        suffix = len(os.path.commonprefix((expected[prefix:][::-1],
+                                           actual[prefix:][::-1])))
+        return (prefix + suffix) / longest
+    return 0.5 if json_type(expected) == json_type(actual) else 0.0
 
-        if 'type_changes' in diff:
-            for item in diff['type_changes']:
-                reasons.append(f"at {item.path()}: type mismatch")
 
-        return "; ".join(reasons) if reasons else "structures differ"
+def closest_candidate(expected: Any, actual: List[Any]) -> int:
+    """Index of the actual item most similar to expected"""
+    return max(range(len(actual)),
+               key=lambda i: similarity(expected, actual[i]))
+
+
+def list_mismatch_reasons(expected: List[Any], actual: List[Any],
+                          path: str, strict: bool = False) -> Iterator[str]:
+    """Report the expected items without a match and their closest peers"""
+    owners: Dict[int, int] = {}
+    if strict:
+        index = ListIndex(actual)
+        assignment = list_assignment(expected, actual)
+        owners = {position: i for i, position in enumerate(assignment)
+                  if position != -1}
+        unmatched = [i for i, position in enumerate(assignment)
+                     if position == -1]
+    elif len(expected) * len(actual) <= LIST_INDEX_THRESHOLD:
+        unmatched = [i for i, item in enumerate(expected)
+                     if not any(is_subset(item, act) for act in actual)]
+    else:
+        index = ListIndex(actual)
+        unmatched = [i for i, item in enumerate(expected)
+                     if not index.contains(item)]
+
+    for i in unmatched[:LIST_MISMATCH_LIMIT]:
+        item = expected[i]
+        reason = f"{path}[{i}] {describe(item)} has no match"
+        if strict:
+            taken = index.candidates(item, strict=True)
+            if taken:
+                yield (f"{path}[{i}] {describe(item)} has no unused match; "
+                       f"{path}[{taken[0]}] is already matched by "
+                       f"{path}[{owners[taken[0]]}]")
+                continue
+        if not actual:
+            yield f"{reason} (actual list is empty)"
+            continue
+        j = closest_candidate(item, actual)
+        closest = get_mismatch_reason(item, actual[j], f"{path}[{j}]",
+                                      strict)
+        yield f"{reason}; closest is {path}[{j}]: {closest}"
+
+    if len(unmatched) > LIST_MISMATCH_LIMIT:
+        yield (f"{len(unmatched) - LIST_MISMATCH_LIMIT} more unmatched "
+               f"items in {path or 'list'}")
+
+
+def mismatch_reasons(expected: Any, actual: Any, path: str,
+                     strict: bool = False) -> Iterator[str]:
+    """Divergences along the expected keys, for a failed subset check"""
+    location = f" at {path}" if path else ""
 
-    # Fallback to basic comparison
     if isinstance(expected, dict) and isinstance(actual, dict):
-        mismatched = []
-        for key in expected:
+        for key, value in expected.items():
             key_path = f"{path}.{key}" if path else key
             if key not in actual:
-                mismatched.append(f"'{key_path}' missing")
-            elif (reason := get_mismatch_reason(expected[key],
-                                                actual[key], key_path)):
-                mismatched.append(reason)
-
-        return "; ".join(mismatched) if mismatched else None
+                yield f"'{key_path}' missing"
+            elif not is_subset(value, actual[key], strict):
+                yield from mismatch_reasons(value, actual[key], key_path,
+                                            strict)
+        return
 
     if isinstance(expected, list) and isinstance(actual, list):
-        return (f"list content mismatch at {path}" if path
-                else "list content mismatch")
+        yield from list_mismatch_reasons(expected, actual, path, strict)
+        return
+
+    if isinstance(expected, (dict, list)) or isinstance(actual, (dict, list)):
+        yield (f"expected {json_type(expected)}, "
+               f"got {json_type(actual)}{location}")
+        return
 
     exp_str = (json.dumps(expected) if not isinstance(expected, str)
                else f"'{expected}'")
     act_str = (json.dumps(actual) if not isinstance(actual, str)
                else f"'{actual}'")
-    location = f" at {path}" if path else ""
-    return f"expected {exp_str}, got {act_str}{location}"
+    yield f"expected {exp_str}, got {act_str}{location}"
+
+
+def get_mismatch_reason(expected: Any, actual: Any, path: str = "",
+                        strict: bool = False) -> Optional[str]:
+    """Return human-readable reason for mismatch (None if matches)
+
+    Only the expected keys are walked and each branch stops at its first
+    divergence, so keys the subset check ignores are never reported.
+    ``strict`` explains failures of the one-to-one list check.
+    """
+    if is_subset(expected, actual, strict):
+        return None
+    return "; ".join(mismatch_reasons(expected, actual, path, strict))
 
 
 def format_json_compact(obj: Any, indent: int = 2) -> str:
@@ -145,387 +699,1414 @@ def format_json_compact(obj: Any, indent: int = 2) -> str:
     return json.dumps(obj, indent=indent, sort_keys=True)
 
 
-def validate_variables(expected_vars: List[Dict],
-                       actual_config: Dict) -> SectionValidation:
-    """Validate variables section"""
-    actual_vars = actual_config.get("variable", {})
-    results = []
-    
-    for expected in expected_vars:
-        # Validate required fields in expected config
-        if "variable_name" not in expected:
-            results.append(ValidationResult(
-                found=False,
-                message=("❌ Invalid test configuration: "
-                        "missing 'variable_name'"),
-                detail=(f"Expected variable config: "
-                       f"{format_json_compact(expected)}")
-            ))
-            continue
-        
-        var_name = expected["variable_name"]
-        count_only = expected.get("count_only", False)
-        should_not_exist = expected.get("should_not_exist", False)
-        actual_var = actual_vars.get(var_name)
-        
-        expected_props = {
-            k: v for k, v in expected.items()
-            if k not in ["variable_name", "count_only", "should_not_exist"]
-        }
-        
-        if should_not_exist:
-            found = actual_var is None
-            message = (
-                f"✅ Variable {var_name} does not exist as expected"
-                if found else
-                f"❌ Variable {var_name} exists but should not"
+class LookupMiss:
+    """A section lookup that failed with a section-specific report"""
+    __slots__ = ("outcome", "message", "detail")
+
+    def __init__(self, outcome: str, message: str,
+                 detail: Optional[str] = None):
+        self.outcome = outcome
+        self.message = message
+        self.detail = detail
+
+
+SUPPORTED_PROVIDERS = ["konnect", "aws", "vault"]
+
+
+def lookup_provider(index: "ConfigIndex",
+                    expected: "CompiledExpectation") -> Any:
+    """Alias-aware provider lookup"""
+    provider_name, = expected.keys
+
+    if provider_name not in SUPPORTED_PROVIDERS:
+        return LookupMiss("unsupported",
+                          f"❌ Unsupported provider '{provider_name}'. "
+                          f"Supported: {', '.join(SUPPORTED_PROVIDERS)}")
+
+    provider_configs = index.provider_blocks(provider_name)
+    if provider_configs is None:
+        return None
+
+    # Prefer matching by alias if expected has one
+    expected_alias = expected.props.get("alias")
+    if expected_alias:
+        best_match = index.provider_with_alias(provider_name, expected_alias)
+    else:
+        best_match = provider_configs[0] if provider_configs else None
+
+    if best_match is None:
+        alias_msg = f" (alias: {expected_alias})" if expected_alias else ""
+        return LookupMiss(
+            "missing",
+            (f"❌ Provider '{provider_name}' with expected "
+             "configuration missing"),
+            (f"No matching provider instance found{alias_msg}"
+             if expected_alias else "No provider instances found")
+        )
+
+    return best_match
+
+
+# Report wording per outcome; formatted with the entry's key fields,
+# ``subject`` and, where relevant, the compact JSON of the ``actual`` block.
+DEFAULT_MESSAGES = {
+    "found": "✅ {subject} found with matching properties",
+    "mismatch": "❌ {subject} missing (properties don't match)",
+    "missing": "❌ {subject} missing (resource not found)",
+    "missing_detail": "{subject} not found in actual config",
+    "exists": "✅ {subject} exists",
+    "absent": "✅ {subject} does not exist as expected",
+    "present": "❌ {subject} exists but should not",
+    "present_detail": "{subject} found: {actual}",
+    "matched": "✅ All {matched} matches of {subject} have matching properties",
+    "unmatched": ("❌ {failed}/{matched} matches of {subject} don't match "
+                  "expected properties"),
+    "unmatched_detail": "Not matching: {names}\nReason for {first}: {reason}",
+    "counted": "✅ {count} matches of {subject} have expected properties "
+               "({bound})",
+    "miscounted": ("❌ {count} matches of {subject} have expected properties, "
+                   "expected {bound}"),
+}
+
+
+@dataclass(frozen=True)
+class SectionSpec:
+    """Declarative description of one expected-results section.
+
+    ``path`` locates the actual block, with ``$field`` parts taken from
+    the entry's key fields. ``lookup`` replaces the plain path lookup and
+    may return a LookupMiss. Sections with the ``patterns`` mode accept
+    glob or /regex/ names for the last path part, checked against every
+    block they match. Sections with ``always_report`` unset only appear in
+    reports when the expected file uses them.
+    """
+    name: str
+    label: str
+    config_label: str
+    key_fields: Tuple[str, ...]
+    meta_keys: Tuple[str, ...]
+    path: Tuple[str, ...]
+    subject: str
+    modes: FrozenSet[str] = frozenset()
+    messages: Mapping[str, str] = field(default_factory=dict)
+    lookup: Optional[Callable[["ConfigIndex", "CompiledExpectation"],
+                              Any]] = None
+    always_report: bool = True
+
+    def __post_init__(self):
+        object.__setattr__(self, "templates",
+                           {**DEFAULT_MESSAGES, **self.messages})
+
+    def message(self, outcome: str, fields: Dict[str, Any],
+                **extra: Any) -> str:
+        return self.templates[outcome].format_map(
+            {**fields, **extra} if extra else fields)
+
+
+# Meta keys every section accepts on top of its own
+ENTRY_OPTIONS = ("strict_lists",)
+
+# Count assertions of pattern entries: exactly, at least, at most
+MATCH_COUNT_KEYS = ("matches", "min_matches", "max_matches")
+
+SECTION_SPECS = (
+    SectionSpec(
+        name="providers",
+        label="providers",
+        config_label="provider",
+        key_fields=("provider",),
+        meta_keys=("provider",),
+        path=("provider", "$provider"),
+        subject="Provider '{provider}'",
+        messages={
+            "found": "✅ {subject} with expected configuration found",
+            "mismatch": "❌ {subject} with expected configuration missing",
+            "missing": "❌ {subject} not found",
+            "missing_detail": ("No provider block for '{provider}' "
+                               "in actual config"),
+        },
+        lookup=lookup_provider,
+    ),
+    SectionSpec(
+        name="control_planes",
+        label="control planes",
+        config_label="control plane",
+        key_fields=("resource_name",),
+        meta_keys=("resource_name", "resource_type", "count_only",
+                   *MATCH_COUNT_KEYS),
+        path=("resource", "konnect_gateway_control_plane", "$resource_name"),
+        subject="Control plane {resource_name}",
+        modes=frozenset({"count_only", "patterns"}),
+        messages={
+            "missing_detail": ("Control plane resource '{resource_name}' "
+                               "not found in actual config"),
+        },
+    ),
+    SectionSpec(
+        name="resources",
+        label="resources",
+        config_label="resource",
+        key_fields=("resource_type", "resource_name"),
+        meta_keys=("resource_name", "resource_type", "count_only",
+                   *MATCH_COUNT_KEYS),
+        path=("resource", "$resource_type", "$resource_name"),
+        subject="{resource_type}.{resource_name}",
+        modes=frozenset({"count_only", "patterns"}),
+        messages={
+            "missing_detail": "Resource {subject} not found in actual config",
+        },
+    ),
+    SectionSpec(
+        name="variables",
+        label="variables",
+        config_label="variable",
+        key_fields=("variable_name",),
+        meta_keys=("variable_name", "count_only", "should_not_exist"),
+        path=("variable", "$variable_name"),
+        subject="Variable {variable_name}",
+        modes=frozenset({"count_only", "should_not_exist"}),
+        messages={
+            "missing": "❌ {subject} missing (variable not found)",
+            "missing_detail": "Variable not found in actual config",
+            "present_detail": "Variable found: {actual}",
+        },
+    ),
+    SectionSpec(
+        name="data_sources",
+        label="data sources",
+        config_label="data source",
+        key_fields=("resource_type", "resource_name"),
+        meta_keys=("resource_name", "resource_type", "count_only",
+                   "should_not_exist"),
+        path=("data", "$resource_type", "$resource_name"),
+        subject="data.{resource_type}.{resource_name}",
+        modes=frozenset({"count_only", "should_not_exist"}),
+        messages={
+            "missing": "❌ {subject} missing (data source not found)",
+            "missing_detail": ("Data source {subject} not found "
+                               "in actual config"),
+        },
+        always_report=False,
+    ),
+    SectionSpec(
+        name="outputs",
+        label="outputs",
+        config_label="output",
+        key_fields=("output_name",),
+        meta_keys=("output_name", "count_only", "should_not_exist"),
+        path=("output", "$output_name"),
+        subject="Output {output_name}",
+        modes=frozenset({"count_only", "should_not_exist"}),
+        messages={
+            "missing": "❌ {subject} missing (output not found)",
+            "missing_detail": "Output not found in actual config",
+            "present_detail": "Output found: {actual}",
+        },
+        always_report=False,
+    ),
+)
+
+SECTIONS = {spec.name: spec for spec in SECTION_SPECS}
+
+
+def block_depths(specs: Tuple[SectionSpec, ...] = SECTION_SPECS
+                 ) -> Dict[str, int]:
+    """Nesting depth of the blocks under each top-level key"""
+    depths: Dict[str, int] = {}
+    for spec in specs:
+        if spec.lookup is None:
+            depths[spec.path[0]] = len(spec.path) - 1
+    return depths
+
+
+class ConfigIndex:
+    """Lookup tables over an actual config, built in a single pass.
+
+    Shared by all section validators so every expected entry is resolved
+    with a dict lookup instead of re-walking the actual config.
+    """
+
+    def __init__(self, actual_config: Dict,
+                 depths: Optional[Dict[str, int]] = None):
+        self.providers: Dict[str, List[Dict]] = {}
+        self.provider_aliases: Dict[Tuple[str, Any], Dict] = {}
+        for name, blocks in actual_config.get("provider", {}).items():
+            blocks = blocks if isinstance(blocks, list) else [blocks]
+            self.providers[name] = blocks
+            for block in blocks:
+                try:
+                    self.provider_aliases.setdefault(
+                        (name, block.get("alias")), block)
+                except TypeError:
+                    continue
+
+        self.blocks: Dict[Tuple, Any] = {}
+        # Block names under each parent path, e.g. per resource type
+        self.names: Dict[Tuple, List[Any]] = {}
+        self._matches: Dict[Tuple[Tuple, str], List[Any]] = {}
+        for root, depth in (depths or BLOCK_DEPTHS).items():
+            if root in actual_config:
+                self._index(actual_config[root], (root,), depth)
+
+    def _index(self, node: Any, path: Tuple, depth: int) -> None:
+        if depth == 0:
+            self.blocks[path] = node
+            self.names.setdefault(path[:-1], []).append(path[-1])
+        elif isinstance(node, dict):
+            for key, child in node.items():
+                self._index(child, path + (key,), depth - 1)
+
+    def provider_blocks(self, name: str) -> Optional[List[Dict]]:
+        """All blocks of a provider (None if the provider is absent)"""
+        return self.providers.get(name)
+
+    def provider_with_alias(self, name: str, alias: Any) -> Optional[Dict]:
+        """First block of a provider with the given alias"""
+        try:
+            return self.provider_aliases.get((name, alias))
+        except TypeError:
+            return next((block for block in self.providers.get(name, [])
+                         if block.get("alias") == alias), None)
+
+    def matching_names(self, parent: Tuple,
+                       pattern: Pattern) -> List[Any]:
+        """Names under a parent path that match a compiled pattern"""
+        key = (parent, pattern.pattern)
+        try:
+            return self._matches[key]
+        except KeyError:
+            pass
+        except TypeError:
+            return []
+        names = [name for name in self.names.get(parent, ())
+                 if isinstance(name, str) and pattern.fullmatch(name)]
+        self._matches[key] = names
+        return names
+
+    def block(self, path: Tuple) -> Optional[Any]:
+        """Block at a path such as ("resource", type, name)"""
+        try:
+            return self.blocks.get(path)
+        except TypeError:
+            return None
+
+    def resource(self, resource_type: str,
+                 resource_name: str) -> Optional[Dict]:
+        return self.block(("resource", resource_type, resource_name))
+
+    def variable(self, name: str) -> Optional[Dict]:
+        return self.block(("variable", name))
+
+
+BLOCK_DEPTHS = block_depths()
+
+
+class Matcher(ABC):
+    """Compiled form of an expected value; matches() mirrors is_subset"""
+    __slots__ = ()
+
+    @abstractmethod
+    def matches(self, actual: Any) -> bool:
+        """Whether actual contains the compiled expected value"""
+
+
+class ScalarMatcher(Matcher):
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def matches(self, actual: Any) -> bool:
+        return self.value == actual
+
+
+class DictMatcher(Matcher):
+    __slots__ = ("items",)
+
+    def __init__(self, items: Tuple[Tuple[str, Matcher], ...]):
+        self.items = items
+
+    def matches(self, actual: Any) -> bool:
+        if not isinstance(actual, dict):
+            return False
+        for key, matcher in self.items:
+            if key not in actual or not matcher.matches(actual[key]):
+                return False
+        return True
+
+
+class ListMatcher(Matcher):
+    __slots__ = ("values", "matchers")
+
+    def __init__(self, values: List[Any], matchers: Tuple[Matcher, ...]):
+        self.values = values
+        self.matchers = matchers
+
+    def matches(self, actual: Any) -> bool:
+        if not isinstance(actual, list):
+            return False
+        if len(self.matchers) * len(actual) <= LIST_INDEX_THRESHOLD:
+            return all(
+                any(matcher.matches(item) for item in actual)
+                for matcher in self.matchers
             )
-            detail = (None if found
-                      else f"Variable found: {format_json_compact(actual_var)}")
-        elif actual_var is None:
-            found = False
-            message = f"❌ Variable {var_name} missing (variable not found)"
-            detail = "Variable not found in actual config"
-        elif count_only:
-            found = True
-            message = f"✅ Variable {var_name} exists"
-            detail = None
-        else:
-            found = is_subset(expected_props, actual_var)
-            if found:
-                message = (f"✅ Variable {var_name} found with matching "
-                           "properties")
-                detail = None
-            else:
-                message = (f"❌ Variable {var_name} missing "
-                           "(properties don't match)")
-                reason = get_mismatch_reason(expected_props, actual_var)
-                detail = (
-                    f"Expected:\n{format_json_compact(expected_props)}\n"
-                    f"Actual:\n{format_json_compact(actual_var)}\n"
-                    f"Reason: {reason}"
-                )
+        index = ListIndex(actual)
+        return all(index.contains(value) for value in self.values)
 
-        results.append(ValidationResult(
-            found=found,
-            message=message,
-            detail=detail,
-            expected=(expected_props if not should_not_exist
-                      and not count_only else None),
-            actual=actual_var
+
+class StrictListMatcher(Matcher):
+    """List matcher that needs a distinct actual item per expected item"""
+    __slots__ = ("values",)
+
+    def __init__(self, values: List[Any]):
+        self.values = values
+
+    def matches(self, actual: Any) -> bool:
+        return (isinstance(actual, list)
+                and is_subset(self.values, actual, True))
+
+
+MATCHER_TYPES = (ScalarMatcher, DictMatcher, ListMatcher, StrictListMatcher)
+
+
+def compile_matcher(expected: Any, strict: bool = False) -> Matcher:
+    """Build a matcher tree specialized for scalar, dict and list checks"""
+    if isinstance(expected, dict):
+        return DictMatcher(tuple(
+            (key, compile_matcher(value, strict))
+            for key, value in expected.items()
         ))
-    
-    found_count = sum(1 for r in results if r.found)
-    return SectionValidation(
-        all_found=all(r.found for r in results),
-        results=results,
-        summary=f"{found_count}/{len(results)} expected variables found"
+    if isinstance(expected, list):
+        if strict:
+            return StrictListMatcher(expected)
+        return ListMatcher(expected, tuple(map(compile_matcher, expected)))
+    return ScalarMatcher(expected)
+
+
+@dataclass
+class CompiledExpectation:
+    """An expected entry with meta fields split from its properties"""
+    raw: Dict
+    missing: Optional[str]
+    keys: Tuple = ()
+    fields: Optional[Dict[str, Any]] = None
+    path: Tuple = ()
+    props: Optional[Dict] = None
+    matcher: Optional[Matcher] = None
+    count_only: Any = False
+    should_not_exist: Any = False
+    strict_lists: Any = False
+    pattern: Optional[Pattern] = None
+    # (at least, at most) matches for count assertions
+    match_count: Optional[Tuple[Optional[int], Optional[int]]] = None
+    invalid: Optional[str] = None
+
+
+@dataclass
+class ExpectationPlan:
+    """Compiled expected-results file, ready to validate against"""
+    sections: Dict[str, List[CompiledExpectation]]
+    selection: Dict
+
+
+GLOB_CHARACTERS = re.compile(r"[*?\[]")
+
+
+def compile_name_pattern(name: Any) -> Optional[Pattern]:
+    """Pattern for a /regex/ or glob name, None for a literal name
+
+    Terraform names can't contain glob characters, so any name that does
+    is a pattern.
+    """
+    if not isinstance(name, str):
+        return None
+    if len(name) > 1 and name.startswith("/") and name.endswith("/"):
+        return re.compile(name[1:-1])
+    if GLOB_CHARACTERS.search(name):
+        return re.compile(fnmatch.translate(name))
+    return None
+
+
+def match_count_bounds(expected: Dict
+                       ) -> Optional[Tuple[Optional[int], Optional[int]]]:
+    """(at least, at most) from an entry's count keys, None without any"""
+    if not any(key in expected for key in MATCH_COUNT_KEYS):
+        return None
+    for key in MATCH_COUNT_KEYS:
+        value = expected.get(key, 0)
+        if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+            raise ValueError(f"'{key}' must be a non-negative integer")
+    if "matches" in expected:
+        if "min_matches" in expected or "max_matches" in expected:
+            raise ValueError("'matches' can't be combined with "
+                             "'min_matches' or 'max_matches'")
+        return expected["matches"], expected["matches"]
+    low, high = expected.get("min_matches"), expected.get("max_matches")
+    if low is not None and high is not None and low > high:
+        raise ValueError("'min_matches' is greater than 'max_matches'")
+    return low, high
+
+
+def describe_bounds(low: Optional[int], high: Optional[int]) -> str:
+    if low == high:
+        return f"exactly {low}"
+    if high is None:
+        return f"at least {low}"
+    if low is None:
+        return f"at most {high}"
+    return f"between {low} and {high}"
+
+
+def compile_expectation(spec: SectionSpec,
+                        expected: Dict) -> CompiledExpectation:
+    """Split an expected entry into key fields, modes and a matcher"""
+    missing = next((key for key in spec.key_fields
+                    if key not in expected), None)
+    if missing:
+        return CompiledExpectation(raw=expected, missing=missing)
+
+    pattern = match_count = None
+    if "patterns" in spec.modes:
+        name = expected[spec.path[-1][1:]]
+        try:
+            pattern = compile_name_pattern(name)
+            match_count = match_count_bounds(expected)
+        except re.error as e:
+            return CompiledExpectation(
+                raw=expected, missing=None,
+                invalid=f"bad pattern {name!r}: {e}")
+        except ValueError as e:
+            return CompiledExpectation(raw=expected, missing=None,
+                                       invalid=str(e))
+        if match_count is not None and pattern is None:
+            pattern = re.compile(re.escape(str(name)))
+
+    props = {k: v for k, v in expected.items()
+             if k not in spec.meta_keys and k not in ENTRY_OPTIONS}
+    strict_lists = expected.get("strict_lists", False)
+    keys = tuple(expected[key] for key in spec.key_fields)
+    fields = dict(zip(spec.key_fields, keys))
+    fields["subject"] = spec.subject.format_map(fields)
+    path = tuple(expected[part[1:]] if part.startswith("$") else part
+                 for part in spec.path)
+    return CompiledExpectation(
+        raw=expected,
+        missing=None,
+        keys=keys,
+        fields=fields,
+        # Pattern entries look up the parent of the blocks they match
+        path=path if pattern is None else path[:-1],
+        props=props,
+        matcher=compile_matcher(props, bool(strict_lists)),
+        count_only=("count_only" in spec.modes
+                    and expected.get("count_only", False)),
+        should_not_exist=("should_not_exist" in spec.modes
+                          and expected.get("should_not_exist", False)),
+        strict_lists=strict_lists,
+        pattern=pattern,
+        match_count=match_count,
     )
 
 
-def validate_providers(expected_providers: List[Dict],
-                       actual_config: Dict) -> SectionValidation:
-    """Validate providers section with alias-aware matching"""
-    supported_providers = ["konnect", "aws", "vault"]
-    actual_providers = actual_config.get("provider", {})
-    results = []
-    
-    for expected in expected_providers:
-        # Validate required fields in expected config
-        if "provider" not in expected:
-            results.append(ValidationResult(
-                found=False,
-                message=("❌ Invalid test configuration: "
-                        "missing 'provider'"),
-                detail=(f"Expected provider config: "
-                       f"{format_json_compact(expected)}")
-            ))
-            continue
-        
-        provider_name = expected["provider"]
-        
-        if provider_name not in supported_providers:
-            results.append(ValidationResult(
-                found=False,
-                message=(f"❌ Unsupported provider '{provider_name}'. "
-                         f"Supported: {', '.join(supported_providers)}"),
-                detail=None
-            ))
-            continue
-        
-        actual_provider_config = actual_providers.get(provider_name)
-        
-        if actual_provider_config is None:
-            results.append(ValidationResult(
-                found=False,
-                message=f"❌ Provider '{provider_name}' not found",
-                detail=(f"No provider block for '{provider_name}' "
-                        "in actual config")
-            ))
-            continue
+def compile_section(spec: SectionSpec,
+                    entries: List[Any]) -> List[CompiledExpectation]:
+    """Compile raw expected entries, passing compiled ones through"""
+    return [
+        entry if isinstance(entry, CompiledExpectation)
+        else compile_expectation(spec, entry)
+        for entry in entries
+    ]
+
+
+def plan_selection(sections: Dict[str, List[CompiledExpectation]]) -> Dict:
+    """Paths of the actual config that compiled expectations assert on"""
+    selection: Dict[str, Any] = {}
+    for entries in sections.values():
+        for entry in entries:
+            if entry.missing or entry.invalid:
+                continue
+            node = selection
+            try:
+                for part in entry.path[:-1]:
+                    node = node.setdefault(part, {})
+                    if node is True:
+                        break
+                else:
+                    node[entry.path[-1]] = True
+            except TypeError:
+                continue
+    return selection
 
-        # Normalize to list
-        provider_configs = (
-            actual_provider_config
-            if isinstance(actual_provider_config, list)
-            else [actual_provider_config]
+
+def compile_plan(expected_config: Dict) -> ExpectationPlan:
+    """Compile a parsed expected-results file"""
+    sections = {
+        spec.name: compile_section(spec, expected_config.get(spec.name, []))
+        for spec in SECTION_SPECS
+    }
+    return ExpectationPlan(sections=sections,
+                           selection=plan_selection(sections))
+
+
+def check_expectation(spec: SectionSpec, expected: CompiledExpectation,
+                      index: ConfigIndex) -> ValidationResult:
+    """Validate one compiled entry of a section"""
+    # Validate required fields in expected config
+    if expected.missing:
+        return ValidationResult(
+            found=False,
+            outcome="invalid",
+            message=("❌ Invalid test configuration: "
+                     f"missing '{expected.missing}'"),
+            detail=(f"Expected {spec.config_label} config: "
+                    f"{format_json_compact(expected.raw)}")
+        )
+    if expected.invalid:
+        return ValidationResult(
+            found=False,
+            outcome="invalid",
+            message=f"❌ Invalid test configuration: {expected.invalid}",
+            detail=(f"Expected {spec.config_label} config: "
+                    f"{format_json_compact(expected.raw)}")
         )
-        
-        expected_props = {k: v for k, v in expected.items() if k != "provider"}
-        expected_alias = expected_props.get("alias")
-        
-        # Prefer matching by alias if expected has one
-        if expected_alias:
-            candidates = [p for p in provider_configs
-                          if p.get("alias") == expected_alias]
-        else:
-            candidates = provider_configs
 
-        if not candidates:
-            alias_msg = (f" (alias: {expected_alias})" if expected_alias
-                         else "")
-            results.append(ValidationResult(
-                found=False,
-                message=(f"❌ Provider '{provider_name}' with expected "
-                         "configuration missing"),
-                detail=(f"No matching provider instance found{alias_msg}"
-                        if expected_alias else "No provider instances found")
-            ))
-            continue
-        
-        best_match = candidates[0]
-        found = is_subset(expected_props, best_match)
-        
-        if found:
-            results.append(ValidationResult(
-                found=True,
-                message=(f"✅ Provider '{provider_name}' with expected "
-                        "configuration found"),
-                detail=None
-            ))
+    if expected.pattern is not None:
+        return check_pattern(spec, expected, index)
+
+    if spec.lookup is not None:
+        actual = spec.lookup(index, expected)
+    else:
+        actual = index.block(expected.path)
+
+    if isinstance(actual, LookupMiss):
+        return ValidationResult(found=False, outcome=actual.outcome,
+                                message=actual.message, detail=actual.detail,
+                                spec=spec, fields=expected.fields)
+
+    if expected.should_not_exist:
+        found = actual is None
+        outcome = "absent" if found else "present"
+    elif actual is None:
+        found, outcome = False, "missing"
+    elif expected.count_only:
+        found, outcome = True, "exists"
+    elif expected.matcher.matches(actual):
+        found, outcome = True, "found"
+    else:
+        found, outcome = False, "mismatch"
+
+    return ValidationResult(found=found, outcome=outcome, spec=spec,
+                            fields=expected.fields, expected=expected.props,
+                            actual=actual,
+                            strict_lists=bool(expected.strict_lists))
+
+
+def check_pattern(spec: SectionSpec, expected: CompiledExpectation,
+                  index: ConfigIndex) -> ValidationResult:
+    """Validate a pattern entry against every block whose name matches"""
+    names = index.matching_names(expected.path, expected.pattern)
+    fields = dict(expected.fields, matched=len(names))
+
+    if expected.match_count is not None:
+        if expected.count_only:
+            count = len(names)
         else:
-            reason = get_mismatch_reason(expected_props, best_match)
-            results.append(ValidationResult(
-                found=False,
-                message=(f"❌ Provider '{provider_name}' with expected "
-                        "configuration missing"),
-                detail=(
-                    f"Expected:\n{format_json_compact(expected_props)}\n"
-                    f"Actual:\n{format_json_compact(best_match)}\n"
-                    f"Reason: {reason}"
-                )
-            ))
-    
+            count = sum(1 for name in names if expected.matcher.matches(
+                index.block(expected.path + (name,))))
+        low, high = expected.match_count
+        found = ((low is None or count >= low)
+                 and (high is None or count <= high))
+        fields.update(count=count, bound=describe_bounds(low, high))
+        return ValidationResult(found=found,
+                                outcome="counted" if found else "miscounted",
+                                spec=spec, fields=fields)
+
+    if not names:
+        return ValidationResult(found=False, outcome="missing", spec=spec,
+                                fields=fields)
+    if expected.count_only:
+        return ValidationResult(found=True, outcome="exists", spec=spec,
+                                fields=fields)
+
+    failing = [name for name in names if not expected.matcher.matches(
+        index.block(expected.path + (name,)))]
+    if not failing:
+        return ValidationResult(found=True, outcome="matched", spec=spec,
+                                fields=fields)
+
+    shown = ", ".join(failing[:LIST_MISMATCH_LIMIT])
+    if len(failing) > LIST_MISMATCH_LIMIT:
+        shown += f" and {len(failing) - LIST_MISMATCH_LIMIT} more"
+    fields.update(failed=len(failing), names=shown, first=failing[0])
+    return ValidationResult(found=False, outcome="unmatched", spec=spec,
+                            fields=fields, expected=expected.props,
+                            actual=index.block(expected.path + (failing[0],)),
+                            strict_lists=bool(expected.strict_lists))
+
+
+def validate_section(spec: SectionSpec, expected_entries: List[Any],
+                     index: ConfigIndex) -> SectionValidation:
+    """Validate every entry of one section"""
+    entries = compile_section(spec, expected_entries)
+    if PROFILER is None:
+        results = [check_expectation(spec, expected, index)
+                   for expected in entries]
+    else:
+        results = profile_section(spec, entries, index)
+
     found_count = sum(1 for r in results if r.found)
     return SectionValidation(
         all_found=all(r.found for r in results),
         results=results,
-        summary=f"{found_count}/{len(results)} expected providers found"
+        summary=f"{found_count}/{len(results)} expected {spec.label} found"
     )
 
 
-def validate_control_planes(expected_cps: List[Dict],
-                            actual_config: Dict) -> SectionValidation:
-    """Validate control planes section"""
-    actual_cps = actual_config.get("resource", {}).get(
-        "konnect_gateway_control_plane", {}
-    )
+def profile_section(spec: SectionSpec, entries: List[CompiledExpectation],
+                    index: ConfigIndex) -> List[ValidationResult]:
+    """check_expectation over a section, timing each entry"""
     results = []
-    
-    for expected in expected_cps:
-        # Validate required fields in expected config
-        if "resource_name" not in expected:
-            results.append(ValidationResult(
-                found=False,
-                message=("❌ Invalid test configuration: "
-                        "missing 'resource_name'"),
-                detail=(f"Expected control plane config: "
-                       f"{format_json_compact(expected)}")
+    with PROFILER.phase(f"section {spec.name}"):
+        for expected in entries:
+            start = time.perf_counter()
+            results.append(check_expectation(spec, expected, index))
+            PROFILER.entries.append((
+                time.perf_counter() - start, PROFILER.config, spec.name,
+                (expected.fields or {}).get("subject")
+                or format_json_compact(expected.raw, indent=None)
             ))
-            continue
-        
-        resource_name = expected["resource_name"]
-        count_only = expected.get("count_only", False)
-        actual_cp = actual_cps.get(resource_name)
-        
-        expected_props = {
-            k: v for k, v in expected.items()
-            if k not in ["resource_name", "resource_type", "count_only"]
-        }
-        
-        if actual_cp is None:
-            found = False
-            message = (f"❌ Control plane {resource_name} missing "
-                      "(resource not found)")
-            detail = (f"Control plane resource '{resource_name}' "
-                     "not found in actual config")
-        elif count_only:
-            found = True
-            message = f"✅ Control plane {resource_name} exists"
-            detail = None
-        else:
-            found = is_subset(expected_props, actual_cp)
-            if found:
-                message = (f"✅ Control plane {resource_name} found with "
-                          "matching properties")
-                detail = None
-            else:
-                message = (f"❌ Control plane {resource_name} missing "
-                          "(properties don't match)")
-                reason = get_mismatch_reason(expected_props, actual_cp)
-                detail = (
-                    f"Expected:\n{format_json_compact(expected_props)}\n"
-                    f"Actual:\n{format_json_compact(actual_cp)}\n"
-                    f"Reason: {reason}"
-                )
-        
-        results.append(ValidationResult(
-            found=found,
-            message=message,
-            detail=detail
-        ))
-    
-    found_count = sum(1 for r in results if r.found)
-    return SectionValidation(
-        all_found=all(r.found for r in results),
-        results=results,
-        summary=f"{found_count}/{len(results)} expected control planes found"
-    )
+    return results
+
+
+def run_sections(plan: ExpectationPlan, index: ConfigIndex
+                 ) -> List[Tuple[SectionSpec, SectionValidation]]:
+    """Validate all sections of a plan in one pass, in report order"""
+    return [
+        (spec, validate_section(spec, plan.sections.get(spec.name, []),
+                                index))
+        for spec in SECTION_SPECS
+        if spec.always_report or plan.sections.get(spec.name)
+    ]
+
+
+def validate_variables(expected_vars: List[Any], actual_config: Dict,
+                       index: Optional[ConfigIndex] = None
+                       ) -> SectionValidation:
+    """Validate variables section"""
+    return validate_section(SECTIONS["variables"], expected_vars,
+                            index or ConfigIndex(actual_config))
+
+
+def validate_providers(expected_providers: List[Any], actual_config: Dict,
+                       index: Optional[ConfigIndex] = None
+                       ) -> SectionValidation:
+    """Validate providers section with alias-aware matching"""
+    return validate_section(SECTIONS["providers"], expected_providers,
+                            index or ConfigIndex(actual_config))
+
+
+def validate_control_planes(expected_cps: List[Any], actual_config: Dict,
+                            index: Optional[ConfigIndex] = None
+                            ) -> SectionValidation:
+    """Validate control planes section"""
+    return validate_section(SECTIONS["control_planes"], expected_cps,
+                            index or ConfigIndex(actual_config))
 
 
-def validate_generic_resources(expected_resources: List[Dict],
-                               actual_config: Dict) -> SectionValidation:
+def validate_generic_resources(expected_resources: List[Any],
+                               actual_config: Dict,
+                               index: Optional[ConfigIndex] = None
+                               ) -> SectionValidation:
     """Validate generic resources section"""
+    return validate_section(SECTIONS["resources"], expected_resources,
+                            index or ConfigIndex(actual_config))
+
+
+# One token scanner for interpolation strings. Template text, nested
+# string literals and expressions are told apart with a stack while
+# scanning, so each string is read once whatever its nesting.
+INTERPOLATION_TOKEN = re.compile(r'''
+    (?P<literal>\$\$\{|%%\{|\\.)            # escaped ${, %{ or character
+  | (?P<open>[$%]\{)                        # template interpolation
+  | (?P<quote>")
+  | (?P<brace>[{}])
+  | \bfor\s+(?P<for>[A-Za-z_][\w-]*(?:\s*,\s*[A-Za-z_][\w-]*)?)\s+in\b
+  | (?<![\w.-])(?P<ref>[A-Za-z_][\w-]*(?:\.[A-Za-z_][\w-]*)+)
+''', re.VERBOSE | re.DOTALL)
+
+# Reference roots Terraform defines itself
+BUILTIN_REFERENCES = frozenset({"path", "terraform", "self", "count",
+                                "each"})
+
+# Number of leading address parts for roots that aren't resource types
+REFERENCE_PARTS = {"var": 2, "local": 2, "module": 2, "data": 3}
+
+# Referring addresses listed per dangling reference
+REFERENCE_SOURCES_LIMIT = 5
+
+_TEXT, _STRING, _EXPRESSION, _BRACE = range(4)
+
+
+def scan_references(template: str) -> Iterator[str]:
+    """Addresses referenced by the interpolations of a template string
+
+    Yields ``var.x``, ``local.x``, ``module.x``, ``data.type.name`` and
+    ``type.name`` addresses; builtins and names bound by `for`
+    expressions are skipped.
+    """
+    if "{" not in template:
+        return
+    stack = [_TEXT]
+    bound: set = set()
+    for token in INTERPOLATION_TOKEN.finditer(template):
+        kind = token.lastgroup
+        mode = stack[-1]
+        if mode in (_TEXT, _STRING):
+            if kind == "open":
+                stack.append(_EXPRESSION)
+            elif kind == "quote" and mode == _STRING:
+                stack.pop()
+        elif kind == "ref":
+            parts = token.group("ref").split(".")
+            root = parts[0]
+            if root in BUILTIN_REFERENCES or root in bound:
+                continue
+            size = REFERENCE_PARTS.get(root, 2)
+            if len(parts) >= size:
+                yield ".".join(parts[:size])
+        elif kind == "quote":
+            stack.append(_STRING)
+        elif kind == "open" or token.group() == "{":
+            stack.append(_BRACE)
+        elif token.group() == "}":
+            stack.pop()
+            if len(stack) == 1:
+                bound.clear()
+        elif kind == "for":
+            bound.update(name.strip()
+                         for name in token.group("for").split(","))
+
+
+def block_references(block: Any) -> Iterator[str]:
+    """Addresses referenced by every string nested in a block"""
+    stack = [block]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str):
+            yield from scan_references(node)
+        elif isinstance(node, dict):
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+
+
+class ReferenceGraph:
+    """Defined addresses of a config and the references between them.
+
+    Built in a single pass over the config: every block becomes a node
+    keyed by its address, and its edges are the interpolations found in
+    its strings plus its ``provider`` and ``depends_on`` meta-arguments.
+    """
+
+    def __init__(self, config: Dict):
+        self.edges: Dict[str, List[str]] = {}
+        self.defined: set = set()
+        # (address, referenced from) for references that don't resolve
+        self.dangling: List[Tuple[str, str]] = []
+        self.reference_count = 0
+
+        for name, blocks in self._mapping(config.get("provider")):
+            for block in blocks if isinstance(blocks, list) else [blocks]:
+                alias = block.get("alias") if isinstance(block, dict) else None
+                self._add(f"provider.{name}.{alias}" if alias
+                          else f"provider.{name}", block)
+        for name, block in self._mapping(config.get("variable")):
+            self._add(f"var.{name}", block)
+        locals_blocks = config.get("locals")
+        if not isinstance(locals_blocks, list):
+            locals_blocks = [locals_blocks]
+        for locals_block in locals_blocks:
+            for name, value in self._mapping(locals_block):
+                self._add(f"local.{name}", value)
+        for name, block in self._mapping(config.get("module")):
+            self._add(f"module.{name}", block)
+        for name, block in self._mapping(config.get("output")):
+            self._add(f"output.{name}", block)
+        for root, prefix in (("resource", ""), ("data", "data.")):
+            for resource_type, blocks in self._mapping(config.get(root)):
+                for name, block in self._mapping(blocks):
+                    self._add(f"{prefix}{resource_type}.{name}", block)
+
+        for source, targets in self.edges.items():
+            self.reference_count += len(targets)
+            resolved = []
+            for target in targets:
+                if target in self.defined:
+                    resolved.append(target)
+                # Terraform creates unaliased provider configs implicitly
+                elif not (target.startswith("provider.")
+                          and target.count(".") == 1):
+                    self.dangling.append((target, source))
+            self.edges[source] = resolved
+
+    @staticmethod
+    def _mapping(node: Any) -> Iterator[Tuple[str, Any]]:
+        return iter(node.items()) if isinstance(node, dict) else iter(())
+
+    def _add(self, address: str, block: Any) -> None:
+        self.defined.add(address)
+        targets = list(block_references(block))
+        if isinstance(block, dict):
+            provider = block.get("provider")
+            if isinstance(provider, str):
+                targets.append(f"provider.{provider}")
+            depends_on = block.get("depends_on")
+            if isinstance(depends_on, list):
+                targets.extend(
+                    ".".join(parts[:REFERENCE_PARTS.get(parts[0], 2)])
+                    for parts in (str(item).split(".")
+                                  for item in depends_on))
+        self.edges.setdefault(address, []).extend(targets)
+
+    def cycles(self) -> List[List[str]]:
+        """One cycle per strongly connected component that has any
+
+        Iterative Tarjan, linear in addresses plus references.
+        """
+        index: Dict[str, int] = {}
+        lowlink: Dict[str, int] = {}
+        on_stack: set = set()
+        stack: List[str] = []
+        cycles = []
+
+        for root in self.edges:
+            if root in index:
+                continue
+            work = [(root, iter(self.edges[root]))]
+            index[root] = lowlink[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                node, targets = work[-1]
+                for target in targets:
+                    if target not in index:
+                        index[target] = lowlink[target] = len(index)
+                        stack.append(target)
+                        on_stack.add(target)
+                        work.append((target, iter(self.edges[target])))
+                        break
+                    if target in on_stack:
+                        lowlink[node] = min(lowlink[node], index[target])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[node])
+                    if lowlink[node] == index[node]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == node:
+                                break
+                        if len(component) > 1 or node in self.edges[node]:
+                            cycles.append(self.cycle_path(min(component),
+                                                          set(component)))
+        return cycles
+
+    def cycle_path(self, start: str, members: set) -> List[str]:
+        """Shortest cycle through ``start`` within a component"""
+        parents: Dict[str, str] = {}
+        queue = [start]
+        for node in queue:
+            for target in self.edges[node]:
+                if target == start:
+                    path = [node]
+                    while path[-1] != start:
+                        path.append(parents[path[-1]])
+                    return path[::-1]
+                if target in members and target not in parents:
+                    parents[target] = node
+                    queue.append(target)
+        return [start]
+
+
+REFERENCES_SPEC = SectionSpec(
+    name="references",
+    label="references",
+    config_label="reference",
+    key_fields=("address",),
+    meta_keys=(),
+    path=(),
+    subject="{address}",
+    messages={
+        "found": "✅ {references} references between {addresses} "
+                 "addresses resolve without cycles",
+        "dangling": "❌ {subject} is referenced but not defined",
+        "dangling_detail": "Referenced from {sources}",
+        "cycle": "❌ Reference cycle through {subject}",
+        "cycle_detail": "{sources}",
+    },
+)
+
+
+def check_references(config: Dict) -> SectionValidation:
+    """Report dangling references and reference cycles of a config"""
+    with profile_phase("check references"):
+        graph = ReferenceGraph(config)
+        cycles = graph.cycles()
+
+    sources: Dict[str, List[str]] = {}
+    for address, source in graph.dangling:
+        sources.setdefault(address, []).append(source)
+
     results = []
-    
-    for expected in expected_resources:
-        # Validate required fields in expected config
-        if "resource_type" not in expected:
-            results.append(ValidationResult(
-                found=False,
-                message=("❌ Invalid test configuration: "
-                        "missing 'resource_type'"),
-                detail=(f"Expected resource config: "
-                       f"{format_json_compact(expected)}")
-            ))
-            continue
-        
-        if "resource_name" not in expected:
-            results.append(ValidationResult(
-                found=False,
-                message=("❌ Invalid test configuration: "
-                        "missing 'resource_name'"),
-                detail=(f"Expected resource config: "
-                       f"{format_json_compact(expected)}")
-            ))
-            continue
-        
-        resource_type = expected["resource_type"]
-        resource_name = expected["resource_name"]
-        count_only = expected.get("count_only", False)
-        
-        actual_resources = actual_config.get("resource", {}).get(
-            resource_type, {}
-        )
-        actual_resource = actual_resources.get(resource_name)
-        
-        expected_props = {
-            k: v for k, v in expected.items()
-            if k not in ["resource_name", "resource_type", "count_only"]
-        }
-        
-        if actual_resource is None:
-            found = False
-            message = (f"❌ {resource_type}.{resource_name} missing "
-                      "(resource not found)")
-            detail = (f"Resource {resource_type}.{resource_name} "
-                     "not found in actual config")
-        elif count_only:
-            found = True
-            message = f"✅ {resource_type}.{resource_name} exists"
-            detail = None
-        else:
-            found = is_subset(expected_props, actual_resource)
-            if found:
-                message = (f"✅ {resource_type}.{resource_name} found with "
-                          "matching properties")
-                detail = None
-            else:
-                message = (f"❌ {resource_type}.{resource_name} missing "
-                          "(properties don't match)")
-                reason = get_mismatch_reason(expected_props, actual_resource)
-                detail = (
-                    f"Expected:\n{format_json_compact(expected_props)}\n"
-                    f"Actual:\n{format_json_compact(actual_resource)}\n"
-                    f"Reason: {reason}"
-                )
-        
+    for address, referrers in sorted(sources.items()):
+        referrers = sorted(set(referrers))
+        shown = ", ".join(referrers[:REFERENCE_SOURCES_LIMIT])
+        if len(referrers) > REFERENCE_SOURCES_LIMIT:
+            shown += f" and {len(referrers) - REFERENCE_SOURCES_LIMIT} more"
+        fields = {"address": address, "subject": address, "sources": shown}
         results.append(ValidationResult(
-            found=found,
-            message=message,
-            detail=detail
-        ))
-    
-    found_count = sum(1 for r in results if r.found)
+            found=False, outcome="dangling", spec=REFERENCES_SPEC,
+            fields=fields,
+            detail=REFERENCES_SPEC.message("dangling_detail", fields)))
+    for cycle in sorted(cycles):
+        fields = {"address": cycle[0], "subject": cycle[0],
+                  "sources": " → ".join(cycle + cycle[:1])}
+        results.append(ValidationResult(
+            found=False, outcome="cycle", spec=REFERENCES_SPEC,
+            fields=fields,
+            detail=REFERENCES_SPEC.message("cycle_detail", fields)))
+
+    resolved = graph.reference_count - len(graph.dangling)
+    if not results:
+        fields = {"address": "references", "subject": "references",
+                  "references": graph.reference_count,
+                  "addresses": len(graph.defined)}
+        results.append(ValidationResult(
+            found=True, outcome="found", spec=REFERENCES_SPEC,
+            fields=fields))
+
     return SectionValidation(
         all_found=all(r.found for r in results),
         results=results,
-        summary=f"{found_count}/{len(results)} expected resources found"
+        summary=(f"{resolved}/{graph.reference_count} references resolve, "
+                 f"{len(cycles)} cycles")
     )
 
 
-def validate_config(config_name: str, test_dir: Path) -> Tuple[bool, str]:
-    """Main validation function"""
-    actual_file = test_dir / f"{config_name}.tf.json"
-    expected_file = test_dir / "expected-results" / f"{config_name}.json"
-    
-    # Load configs
+# Decoders for JSON documents, fastest available first. orjson is only
+# imported when it is used.
+JSON_BACKENDS = ("orjson", "json")
+
+JSON_BACKEND = next(backend for backend in JSON_BACKENDS
+                    if importlib.util.find_spec(backend) is not None)
+
+
+def use_json_backend(backend: str) -> None:
+    """Select the decoder for expected and actual configs"""
+    global JSON_BACKEND
+    if importlib.util.find_spec(backend) is None:
+        raise ValueError(f"JSON backend '{backend}' is not installed")
+    JSON_BACKEND = backend
+
+
+@functools.lru_cache(maxsize=None)
+def backend_loads(backend: str) -> Callable[[Any], Any]:
+    return importlib.import_module(backend).loads
+
+
+def decode_json(data: Any) -> Any:
+    """Decode a JSON document from a bytes-like object
+
+    Whatever the fast backend rejects (NaN, integers beyond 64 bits, lone
+    surrogates, malformed input) is decoded again by the stdlib, so every
+    backend accepts the same documents and raises the same errors.
+    """
+    if JSON_BACKEND != "json":
+        try:
+            return backend_loads(JSON_BACKEND)(data)
+        except ValueError:
+            pass
+    return json.loads(data if isinstance(data, bytes) else bytes(data))
+
+
+@contextlib.contextmanager
+def mapped_file(path: Path) -> Iterator[Any]:
+    """Read-only memory map of a file, without copying it into a buffer"""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise json.JSONDecodeError("Expecting value", "", 0)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield buffer
+
+
+def load_json_file(path: Path) -> Any:
+    """Decode a whole JSON file through a memory map"""
+    with mapped_file(path) as buffer:
+        view = memoryview(buffer)
+        try:
+            return decode_json(view)
+        finally:
+            view.release()
+
+
+JSON_WHITESPACE = re.compile(rb'[ \t\n\r]*')
+JSON_STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+# Everything up to and including the next bracket outside a string
+JSON_NEXT_BRACKET = re.compile(
+    rb'[^"\[\]{}]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"\[\]{}]*)*([\[\]{}])',
+    re.DOTALL
+)
+JSON_SCALAR = re.compile(rb'[^,}\]\s]+')
+JSON_MEMBER_KEY = re.compile(
+    rb'[ \t\n\r]*"([^"\\]*(?:\\.[^"\\]*)*)"[ \t\n\r]*:[ \t\n\r]*',
+    re.DOTALL
+)
+JSON_MEMBER_END = re.compile(rb'[ \t\n\r]*([,}])')
+
+
+class SelectiveJSONLoader:
+    """Materialize only selected subtrees of a JSON document.
+
+    ``selection`` is a nested dict of object keys; a ``True`` leaf means the
+    value at that path is decoded, anything not selected is skipped with a
+    token scan and never turned into Python objects.
+
+    Skipped values are only scanned for string and bracket boundaries, so
+    malformed content inside them (``{"a": tru}``, ``[1}``) is accepted
+    as long as strings are terminated and brackets balance. Selected
+    values, member syntax along the selected paths and trailing data are
+    checked as strictly as by a full decode.
+    """
+
+    def __init__(self, buffer: Any):
+        self.buffer = buffer
+
+    def error(self, message: str, pos: int) -> json.JSONDecodeError:
+        doc = bytes(self.buffer[:pos]).decode("utf-8", "replace")
+        return json.JSONDecodeError(message, doc, len(doc))
+
+    def skip_whitespace(self, pos: int) -> int:
+        return JSON_WHITESPACE.match(self.buffer, pos).end()
+
+    def skip_value(self, pos: int) -> int:
+        """Return the position just past the value starting at pos"""
+        if pos >= len(self.buffer):
+            raise self.error("Expecting value", pos)
+
+        first = self.buffer[pos]
+        if first == ord('"'):
+            match = JSON_STRING.match(self.buffer, pos)
+            if not match:
+                raise self.error("Unterminated string", pos)
+            return match.end()
+
+        if first in b"{[":
+            depth = 1
+            end = pos + 1
+            next_bracket = JSON_NEXT_BRACKET.match
+            while depth:
+                match = next_bracket(self.buffer, end)
+                if not match:
+                    raise self.error("Unterminated container", pos)
+                end = match.end()
+                depth += 1 if self.buffer[end - 1] in b"{[" else -1
+            return end
+
+        match = JSON_SCALAR.match(self.buffer, pos)
+        if not match:
+            raise self.error("Expecting value", pos)
+        return match.end()
+
+    def decode_value(self, pos: int) -> Tuple[Any, int]:
+        end = self.skip_value(pos)
+        try:
+            return decode_json(self.buffer[pos:end]), end
+        except json.JSONDecodeError as e:
+            raise self.error(e.msg, pos + e.pos) from None
+
+    def load_object(self, pos: int, selection: Dict) -> Tuple[Dict, int]:
+        pos = self.skip_whitespace(pos)
+        if self.buffer[pos:pos + 1] != b"{":
+            raise self.error("Expecting '{'", pos)
+
+        result: Dict[str, Any] = {}
+        pos = self.skip_whitespace(pos + 1)
+        if self.buffer[pos:pos + 1] == b"}":
+            return result, pos + 1
+
+        member_key = JSON_MEMBER_KEY.match
+        member_end = JSON_MEMBER_END.match
+        while True:
+            match = member_key(self.buffer, pos)
+            if not match:
+                raise self.error(
+                    "Expecting property name enclosed in double quotes", pos)
+            raw_key = match.group(1)
+            key = (json.loads(b'"' + raw_key + b'"') if b"\\" in raw_key
+                   else raw_key.decode("utf-8"))
+            pos = match.end()
+
+            selected = selection.get(key)
+            if selected is None:
+                pos = self.skip_value(pos)
+            elif selected is True or self.buffer[pos:pos + 1] != b"{":
+                result[key], pos = self.decode_value(pos)
+            else:
+                result[key], pos = self.load_object(pos, selected)
+
+            match = member_end(self.buffer, pos)
+            if not match:
+                raise self.error("Expecting ',' delimiter", pos)
+            if match.group(1) == b"}":
+                return result, match.end()
+            pos = match.end()
+
+    def load(self, selection: Dict) -> Dict:
+        result, pos = self.load_object(0, selection)
+        if self.skip_whitespace(pos) != len(self.buffer):
+            raise self.error("Extra data", pos)
+        return result
+
+
+def load_json_selected(path: Path, selection: Dict) -> Dict:
+    """Stream a JSON object from disk, decoding only the selected paths"""
+    with mapped_file(path) as buffer:
+        return SelectiveJSONLoader(buffer).load(selection)
+
+
+@functools.lru_cache(maxsize=None)
+def validator_version() -> str:
+    """Hash of this validator's source, so caches never outlive a change"""
+    try:
+        source = Path(__file__).read_bytes()
+    except (NameError, OSError):
+        return "unknown"
+    return hashlib.sha256(source).hexdigest()[:16]
+
+
+def cache_key(*parts: bytes) -> str:
+    """Cache key over file contents and the validator version"""
+    digest = hashlib.sha256()
+    for part in (*parts, validator_version().encode(), __name__.encode()):
+        digest.update(hashlib.sha256(part).digest())
+    return digest.hexdigest()
+
+
+def default_cache_dir(test_dir: Path) -> Path:
+    """Per-user cache directory for a test directory
+
+    ``$XDG_CACHE_HOME/kontfix-validator/<digest of the test dir path>``,
+    outside the working tree: anything under tests/ is part of the flake's
+    kontfix input, and cached plans are unpickled, so they must not come
+    from a directory others can write to.
+    """
+    base = os.environ.get("XDG_CACHE_HOME", "")
+    root = Path(base) if os.path.isabs(base) else Path.home() / ".cache"
+    digest = hashlib.sha256(str(test_dir.resolve()).encode()).hexdigest()
+    return root / "kontfix-validator" / digest[:16]
+
+
+def write_cache_file(path: Path, data: bytes) -> None:
+    """Atomically write a cache entry, ignoring unwritable cache dirs"""
     try:
-        with open(actual_file) as f:
-            actual_config = json.load(f)
+        path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=path.parent, delete=False,
+                                         suffix=".tmp") as f:
+            f.write(data)
+        os.replace(f.name, path)
+    except OSError:
+        pass
+
+
+def touch_cache_file(path: Path) -> None:
+    """Mark a cache entry as recently used for LRU eviction"""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def prune_cache(cache_dir: Path, max_bytes: int) -> int:
+    """Evict least recently used cache entries until under max_bytes
+
+    Returns the number of evicted entries.
+    """
+    entries = []
+    for path in cache_dir.glob("*/*"):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    evicted = 0
+    for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+        if total <= max_bytes:
+            break
+        try:
+            path.unlink()
+        except OSError:
+            continue
+        total -= size
+        evicted += 1
+    return evicted
+
+
+def plan_stamp() -> bytes:
+    """Header of cached plans: only entries written by this validator
+    version are unpickled"""
+    return b"kontfix-plan:" + validator_version().encode() + b"\n"
+
+
+def load_plan(expected_file: Path,
+              cache_dir: Optional[Path] = None) -> ExpectationPlan:
+    """Load a compiled plan, reusing the on-disk cache when unchanged"""
+    source = expected_file.read_bytes()
+
+    cache_file = None
+    if cache_dir is not None:
+        cache_file = cache_dir / "plans" / f"{cache_key(source)}.pickle"
+        stamp = plan_stamp()
+        try:
+            with open(cache_file, "rb") as f:
+                if f.read(len(stamp)) == stamp:
+                    plan = pickle.load(f)
+                    touch_cache_file(cache_file)
+                    return plan
+        except FileNotFoundError:
+            pass
+        except Exception:
+            # Corrupt or incompatible entry, recompile below
+            pass
+
+    plan = compile_plan(decode_json(source))
+
+    if cache_file is not None:
+        write_cache_file(cache_file, plan_stamp() + pickle.dumps(
+            plan, protocol=pickle.HIGHEST_PROTOCOL))
+
+    return plan
+
+
+def load_actual(actual_file: Path, selection: Optional[Dict] = None
+                ) -> Tuple[Optional[Dict], str]:
+    """Parse an actual config, only the selected subtrees if given"""
+    try:
+        with profile_phase("load actual"):
+            if selection is not None:
+                return load_json_selected(actual_file, selection), ""
+            return load_json_file(actual_file), ""
     except FileNotFoundError:
-        return False, f"❌ Actual config not found: {actual_file}"
+        return None, f"❌ Actual config not found: {actual_file}"
     except json.JSONDecodeError as e:
-        return False, f"❌ Invalid JSON in actual config: {e}"
-    
+        return None, f"❌ Invalid JSON in actual config: {e}"
+
+
+def load_expected(expected_file: Path, cache_dir: Optional[Path] = None
+                  ) -> Tuple[Optional[ExpectationPlan], str]:
+    """Load the compiled expectations of an expected-results file"""
     try:
-        with open(expected_file) as f:
-            expected_config = json.load(f)
+        with profile_phase("load expected"):
+            return load_plan(expected_file, cache_dir), ""
     except FileNotFoundError:
-        return False, f"❌ Expected config not found: {expected_file}"
+        return None, f"❌ Expected config not found: {expected_file}"
     except json.JSONDecodeError as e:
-        return False, f"❌ Invalid JSON in expected config: {e}"
-    
-    # Run validations
-    provider_validation = validate_providers(
-        expected_config.get("providers", []),
-        actual_config
-    )
-    
-    control_plane_validation = validate_control_planes(
-        expected_config.get("control_planes", []),
-        actual_config
-    )
-    
-    resource_validation = validate_generic_resources(
-        expected_config.get("resources", []),
-        actual_config
-    )
-    
-    variable_validation = validate_variables(
-        expected_config.get("variables", []),
-        actual_config
-    )
-    
-    all_passed = (
-        provider_validation.all_found
-        and control_plane_validation.all_found
-        and resource_validation.all_found
-        and variable_validation.all_found
+        return None, f"❌ Invalid JSON in expected config: {e}"
+
+
+def load_configs(actual_file: Path, expected_file: Path,
+                 stream: bool = False,
+                 cache_dir: Optional[Path] = None
+                 ) -> Tuple[Optional[Dict], Optional[ExpectationPlan], str]:
+    """Load the actual config and the compiled expectations
+
+    With ``stream`` the expected config is read first and only the
+    actual-config subtrees it refers to are materialized.
+    """
+    if stream and not actual_file.is_file():
+        return None, None, f"❌ Actual config not found: {actual_file}"
+
+    if not stream:
+        actual_config, error = load_actual(actual_file)
+        if error:
+            return None, None, error
+
+    plan, error = load_expected(expected_file, cache_dir)
+    if error:
+        return None, None, error
+
+    if stream:
+        actual_config, error = load_actual(actual_file, plan.selection)
+        if error:
+            return None, None, error
+
+    return actual_config, plan, ""
+
+
+@dataclass
+class ConfigReport:
+    """Structured outcome of validating one config"""
+    config_name: str
+    passed: bool
+    validations: List[Tuple[SectionSpec, SectionValidation]] = field(
+        default_factory=list)
+    error: Optional[str] = None
+
+
+def build_report(config_name: str, test_dir: Path, stream: bool = False,
+                 cache_dir: Optional[Path] = None,
+                 references: bool = False) -> ConfigReport:
+    """Validate a config without rendering any report text
+
+    With ``references`` the report gains a section checking that every
+    interpolation resolves, which needs the whole config (no streaming).
+    """
+    actual_file = test_dir / f"{config_name}.tf.json"
+    expected_file = test_dir / "expected-results" / f"{config_name}.json"
+
+    # Load configs
+    actual_config, plan, error = load_configs(
+        actual_file, expected_file, stream and not references, cache_dir)
+    if error:
+        return ConfigReport(config_name, False, error=error)
+
+    # Run all sections against a shared index of the actual config
+    with profile_phase("index actual"):
+        index = ConfigIndex(actual_config)
+    return check_config(config_name, plan, index,
+                        check_references(actual_config) if references
+                        else None)
+
+
+def check_config(config_name: str, plan: ExpectationPlan,
+                 index: ConfigIndex,
+                 references: Optional[SectionValidation] = None
+                 ) -> ConfigReport:
+    """Validate an already loaded config against its compiled plan"""
+    validations = run_sections(plan, index)
+    if references is not None:
+        validations.append((REFERENCES_SPEC, references))
+    return ConfigReport(
+        config_name,
+        all(validation.all_found for _, validation in validations),
+        validations
     )
-    
+
+
+def render_text(report: ConfigReport, quiet: bool = False) -> str:
+    """Human-readable report; ``quiet`` keeps only failures"""
+    if report.error:
+        return report.error
+    if quiet and report.passed:
+        return ""
+
     # Format output
-    header = f"🧪 Partial Validation: {config_name}"
+    header = f"🧪 Partial Validation: {report.config_name}"
     separator = "=" * len(header)
     
     lines = [
@@ -535,71 +2116,1018 @@ def validate_config(config_name: str, test_dir: Path) -> Tuple[bool, str]:
     ]
     
     # Summaries with colors
-    lines.extend([
-        colorize(provider_validation.summary, 'blue'),
-        colorize(control_plane_validation.summary, 'blue'),
-        colorize(resource_validation.summary, 'blue'),
-        colorize(variable_validation.summary, 'blue'),
-        ""
-    ])
+    lines.extend(colorize(validation.summary, 'blue')
+                 for _, validation in report.validations)
+    lines.append("")
     
     # Detailed results
-    for validation in [provider_validation, control_plane_validation,
-                       resource_validation, variable_validation]:
+    for _, validation in report.validations:
         for result in validation.results:
             # Colorize messages
             if result.found:
-                lines.append(colorize(result.message, 'green'))
-            else:
-                lines.append(colorize(result.message, 'red'))
-            
-            if result.detail and not result.found:
+                if not quiet:
+                    lines.append(colorize(result.message, 'green'))
+                continue
+
+            lines.append(colorize(result.message, 'red'))
+            if result.detail:
                 detail_lines = result.detail.split('\n')
                 for detail_line in detail_lines:
                     lines.append(colorize(f"    → {detail_line}", 'yellow'))
     
     lines.append("")
-    if all_passed:
+    if report.passed:
         lines.append(colorize("✅ PASSED", 'green'))
     else:
         lines.append(colorize("❌ FAILED", 'red'))
     
     lines.append("")
     
-    # Add enhanced mode indicator
-    if ENHANCED_MODE:
-        lines.append(colorize("ℹ️  Enhanced mode: DeepDiff and colors enabled",
+    # Add enhanced mode indicator, only when colors are actually emitted
+    if load_colors() and not quiet:
+        lines.append(colorize("ℹ️  Enhanced mode: colors enabled",
                              'cyan'))
         lines.append("")
     
-    return all_passed, "\n".join(lines)
+    return "\n".join(lines)
+
+
+def result_to_dict(result: ValidationResult) -> Dict[str, Any]:
+    """Machine-readable form of a result, without expected/actual dumps"""
+    data: Dict[str, Any] = {
+        "found": result.found,
+        "outcome": result.outcome,
+        "message": result.message,
+    }
+    if result.subject is not None:
+        data["subject"] = result.subject
+    if not result.found:
+        if result.outcome == "mismatch":
+            data["reason"] = result.reason
+        elif result.detail:
+            data["detail"] = result.detail
+    return data
+
+
+def report_to_dict(report: ConfigReport,
+                   quiet: bool = False) -> Dict[str, Any]:
+    """Machine-readable form of a config report"""
+    data: Dict[str, Any] = {"config": report.config_name,
+                            "passed": report.passed}
+    if report.error:
+        data["error"] = report.error
+        return data
+
+    data["sections"] = [
+        {
+            "section": spec.name,
+            "found": sum(1 for r in validation.results if r.found),
+            "total": len(validation.results),
+            "results": [result_to_dict(r) for r in validation.results
+                        if not (quiet and r.found)],
+        }
+        for spec, validation in report.validations
+    ]
+    return data
+
+
+def render_json(report: ConfigReport, quiet: bool = False) -> str:
+    """One JSON object per config"""
+    return json.dumps(report_to_dict(report, quiet), ensure_ascii=False)
+
+
+# Outcomes caused by the expected file rather than the generated config
+JUNIT_ERROR_OUTCOMES = ("invalid", "unsupported")
+
+
+def render_junit(report: ConfigReport, quiet: bool = False) -> str:
+    """One JUnit <testsuite> per config, a <testcase> per expected entry"""
+    from xml.etree import ElementTree
+
+    suite = ElementTree.Element("testsuite", name=report.config_name)
+
+    if report.error:
+        case = ElementTree.SubElement(suite, "testcase", name="load",
+                                      classname=report.config_name)
+        ElementTree.SubElement(case, "error", message=report.error)
+        suite.set("tests", "1")
+        suite.set("failures", "0")
+        suite.set("errors", "1")
+        return ElementTree.tostring(suite, encoding="unicode")
+
+    tests = failures = errors = 0
+    for spec, validation in report.validations:
+        for result in validation.results:
+            tests += 1
+            is_error = result.outcome in JUNIT_ERROR_OUTCOMES
+            if not result.found:
+                errors += is_error
+                failures += not is_error
+            elif quiet:
+                continue
+
+            case = ElementTree.SubElement(
+                suite, "testcase",
+                name=result.subject or result.message,
+                classname=f"{report.config_name}.{spec.name}"
+            )
+            if not result.found:
+                element = ElementTree.SubElement(
+                    case, "error" if is_error else "failure",
+                    message=result.message)
+                element.text = result.reason or result.detail
+
+    suite.set("tests", str(tests))
+    suite.set("failures", str(failures))
+    suite.set("errors", str(errors))
+    return ElementTree.tostring(suite, encoding="unicode")
+
+
+RENDERERS: Dict[str, Callable[[ConfigReport, bool], str]] = {
+    "text": render_text,
+    "json": render_json,
+    "junit": render_junit,
+}
+
+
+def result_cache_file(config_name: str, test_dir: Path,
+                      cache_dir: Optional[Path] = None,
+                      stream: bool = False,
+                      output_format: str = "text",
+                      quiet: bool = False,
+                      references: bool = False) -> Optional[Path]:
+    """Where validate_config stores a config's result with these options
+
+    The key covers the config name, the actual file, the expected file,
+    the options and the validator version. None without a ``cache_dir``
+    or when an input can't be read.
+    """
+    if cache_dir is None:
+        return None
+    try:
+        key = cache_key(
+            config_name.encode(),
+            (test_dir / f"{config_name}.tf.json").read_bytes(),
+            (test_dir / "expected-results" / f"{config_name}.json"
+             ).read_bytes(),
+            (f"{ENHANCED_MODE}:{bool(load_colors())}:{stream}:"
+             f"{output_format}:{quiet}:{references}").encode()
+        )
+    except OSError:
+        return None
+    return cache_dir / "results" / f"{key}.json"
+
+
+def validate_config(config_name: str, test_dir: Path,
+                    stream: bool = False,
+                    cache_dir: Optional[Path] = None,
+                    output_format: str = "text",
+                    quiet: bool = False,
+                    references: bool = False) -> Tuple[bool, str]:
+    """Main validation function
+
+    With a ``cache_dir`` the report and exit status are stored in the
+    result_cache_file and replayed as long as none of its inputs change.
+    """
+    result_file = result_cache_file(config_name, test_dir, cache_dir,
+                                    stream, output_format, quiet, references)
+    if result_file is None:
+        # Uncached, or missing inputs, which the uncached path reports
+        return run_validation(config_name, test_dir, stream, cache_dir,
+                              output_format, quiet, references)
+
+    try:
+        with open(result_file, encoding="utf-8") as f:
+            cached = json.load(f)
+        touch_cache_file(result_file)
+        return cached["passed"], cached["output"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    passed, output = run_validation(config_name, test_dir, stream,
+                                    cache_dir, output_format, quiet,
+                                    references)
+    write_cache_file(result_file, json.dumps(
+        {"passed": passed, "output": output}).encode("utf-8"))
+    return passed, output
+
+
+def run_validation(config_name: str, test_dir: Path, stream: bool = False,
+                   cache_dir: Optional[Path] = None,
+                   output_format: str = "text",
+                   quiet: bool = False,
+                   references: bool = False) -> Tuple[bool, str]:
+    """Validate a config and render its report in the given format"""
+    report = build_report(config_name, test_dir, stream, cache_dir,
+                          references)
+    with profile_phase(f"render {output_format}"):
+        return report.passed, RENDERERS[output_format](report, quiet)
+
+
+# Levels below each top-level section down to its addressable blocks:
+# resource.<type>.<name> and data.<type>.<name> are blocks, and so are
+# variable.<name>, output.<name> and the rest. Sections not listed here
+# are compared as one block.
+DIFF_DEPTHS = {"resource": 2, "data": 2, "provider": 2, "variable": 1,
+               "output": 1, "module": 1, "locals": 1}
+
+DIFF_ADDRESS_PREFIXES = {"variable": "var", "locals": "local",
+                         "output": "output", "module": "module",
+                         "data": "data", "provider": "provider"}
+
+
+CANONICAL_ENCODER = json.JSONEncoder(sort_keys=True, separators=(",", ":"),
+                                     ensure_ascii=False)
+
+
+def canonical_json(value: Any) -> bytes:
+    """Key-sorted compact JSON, equal exactly for equal JSON values"""
+    return CANONICAL_ENCODER.encode(value).encode("utf-8")
+
+
+def diff_address(path: Tuple[str, ...]) -> str:
+    """Terraform address of a block path, e.g. data.<type>.<name>"""
+    section, parts = path[0], path[1:]
+    if section == "resource":
+        return ".".join(parts) or section
+    if section == "provider" and parts and parts[-1] == "":
+        parts = parts[:-1]
+    return ".".join((DIFF_ADDRESS_PREFIXES.get(section, section),) + parts)
+
+
+def normalize_for_diff(config: Dict) -> Dict:
+    """Key providers by alias and merge locals, so both are addressable"""
+    normalized = dict(config)
+    providers = config.get("provider")
+    if isinstance(providers, dict):
+        by_alias = {}
+        for name, blocks in providers.items():
+            aliases: Dict[str, Any] = {}
+            for position, block in enumerate(
+                    blocks if isinstance(blocks, list) else [blocks]):
+                alias = (block.get("alias", "") if isinstance(block, dict)
+                         else "")
+                if alias in aliases:
+                    alias = f"{alias}[{position}]"
+                aliases[alias] = block
+            by_alias[name] = aliases
+        normalized["provider"] = by_alias
+    local_blocks = config.get("locals")
+    if isinstance(local_blocks, list):
+        merged = {}
+        for block in local_blocks:
+            if isinstance(block, dict):
+                merged.update(block)
+        normalized["locals"] = merged
+    return normalized
+
+
+class MerkleTree:
+    """Digests of a config's blocks and of every level above them.
+
+    A block's digest hashes its canonical JSON; a level's digest hashes
+    the names and digests of its children, so two configs agree on a
+    subtree exactly when they agree on its digest.
+    """
+
+    def __init__(self, config: Dict):
+        self.root = normalize_for_diff(config)
+        self.digests: Dict[Tuple[str, ...], bytes] = {}
+        # Child names and block counts of the levels above the blocks
+        self.children: Dict[Tuple[str, ...], List[str]] = {}
+        self.blocks: Dict[Tuple[str, ...], int] = {}
+        self._build((), self.root, None)
+
+    def _build(self, path: Tuple[str, ...], node: Dict,
+               depth: Optional[int]) -> bytes:
+        digests = self.digests
+        hasher = hashlib.blake2b(digest_size=16)
+        names = sorted(node)
+        count = 0
+        for name in names:
+            child, value = path + (name,), node[name]
+            child_depth = (DIFF_DEPTHS.get(name, 0) if depth is None
+                           else depth - 1)
+            if child_depth == 0 or not isinstance(value, dict):
+                digest = hashlib.blake2b(canonical_json(value),
+                                         digest_size=16).digest()
+                digests[child] = digest
+                count += 1
+            else:
+                digest = self._build(child, value, child_depth)
+                count += self.blocks[child]
+            hasher.update(name.encode("utf-8") + b"\0")
+            hasher.update(digest)
+        self.children[path] = names
+        self.blocks[path] = count
+        digest = digests[path] = hasher.digest()
+        return digest
+
+    def node(self, path: Tuple[str, ...]) -> Any:
+        node = self.root
+        for name in path:
+            node = node[name]
+        return node
+
+    def addresses(self, path: Tuple[str, ...]) -> Iterator[Tuple[str, ...]]:
+        """Paths of the blocks at or below a path"""
+        stack = [path]
+        while stack:
+            path = stack.pop()
+            if path in self.children:
+                stack.extend(path + (name,) for name in self.children[path])
+            else:
+                yield path
+
+
+@dataclass
+class ConfigDiff:
+    """Changed addresses between two configs, with per-path changes"""
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    changed: Dict[str, List[Tuple[str, str, Any, Any]]] = field(
+        default_factory=dict)
+    unchanged: int = 0
+
+    @property
+    def identical(self) -> bool:
+        return not (self.added or self.removed or self.changed)
+
+
+def block_changes(old: Any, new: Any, path: str = "",
+                  changes: Optional[List] = None
+                  ) -> List[Tuple[str, str, Any, Any]]:
+    """(path, "+"/"-"/"~", old, new) for each differing value in a block
+
+    Subtrees are compared by canonical JSON and only differing ones are
+    descended into. Lists are compared position by position.
+    """
+    if changes is None:
+        changes = []
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in sorted(old.keys() | new.keys()):
+            key_path = f"{path}.{key}" if path else key
+            if key not in new:
+                changes.append((key_path, "-", old[key], None))
+            elif key not in old:
+                changes.append((key_path, "+", None, new[key]))
+            elif canonical_json(old[key]) != canonical_json(new[key]):
+                block_changes(old[key], new[key], key_path, changes)
+    elif isinstance(old, list) and isinstance(new, list):
+        for position in range(max(len(old), len(new))):
+            item_path = f"{path}[{position}]"
+            if position >= len(new):
+                changes.append((item_path, "-", old[position], None))
+            elif position >= len(old):
+                changes.append((item_path, "+", None, new[position]))
+            elif canonical_json(old[position]) != canonical_json(
+                    new[position]):
+                block_changes(old[position], new[position], item_path,
+                              changes)
+    else:
+        changes.append((path, "~", old, new))
+    return changes
+
+
+def diff_configs(old: Dict, new: Dict) -> ConfigDiff:
+    """Compare two configs top-down, skipping subtrees with equal digests"""
+    old_tree, new_tree = MerkleTree(old), MerkleTree(new)
+
+    diff = ConfigDiff()
+    stack: List[Tuple[str, ...]] = [()]
+    while stack:
+        path = stack.pop()
+        old_digest = old_tree.digests.get(path)
+        new_digest = new_tree.digests.get(path)
+        if old_digest == new_digest:
+            diff.unchanged += old_tree.blocks.get(path, 1)
+        elif old_digest is None:
+            diff.added.extend(map(diff_address, new_tree.addresses(path)))
+        elif new_digest is None:
+            diff.removed.extend(map(diff_address, old_tree.addresses(path)))
+        elif path in old_tree.children and path in new_tree.children:
+            names = (set(old_tree.children[path])
+                     | set(new_tree.children[path]))
+            stack.extend(path + (name,) for name in names)
+        else:
+            diff.changed[diff_address(path)] = block_changes(
+                old_tree.node(path), new_tree.node(path))
+
+    diff.added.sort()
+    diff.removed.sort()
+    diff.changed = dict(sorted(diff.changed.items()))
+    return diff
+
+
+def render_diff_text(diff: ConfigDiff, old_name: str, new_name: str) -> str:
+    """Changed addresses, each followed by its changed paths"""
+    header = f"🔍 Diff: {old_name} → {new_name}"
+    lines = [
+        colorize(header, 'cyan'),
+        colorize("=" * len(header), 'cyan'),
+        "",
+        colorize(f"{len(diff.added)} added, {len(diff.removed)} removed, "
+                 f"{len(diff.changed)} changed, {diff.unchanged} unchanged",
+                 'blue'),
+        "",
+    ]
+    lines.extend(colorize(f"+ {address}", 'green') for address in diff.added)
+    lines.extend(colorize(f"- {address}", 'red') for address in diff.removed)
+    for address, changes in diff.changed.items():
+        lines.append(colorize(f"~ {address}", 'yellow'))
+        for path, change, old, new in changes:
+            where = path or "(whole block)"
+            if change == "+":
+                lines.append(f"    + {where}: {describe(new)}")
+            elif change == "-":
+                lines.append(f"    - {where}: {describe(old)}")
+            else:
+                lines.append(f"    ~ {where}: {describe(old)} → "
+                             f"{describe(new)}")
+    if diff.identical:
+        lines.append(colorize("✅ No differences", 'green'))
+    lines.append("")
+    return "\n".join(lines)
+
+
+DIFF_CHANGE_NAMES = {"+": "added", "-": "removed", "~": "changed"}
+
+
+def render_diff_json(diff: ConfigDiff, old_name: str, new_name: str) -> str:
+    return json.dumps({
+        "old": old_name,
+        "new": new_name,
+        "added": diff.added,
+        "removed": diff.removed,
+        "changed": {
+            address: [{"path": path, "change": DIFF_CHANGE_NAMES[change],
+                       "old": old,
+                       "new": new}
+                      for path, change, old, new in changes]
+            for address, changes in diff.changed.items()
+        },
+        "unchanged": diff.unchanged,
+    }, indent=2)
+
+
+DIFF_RENDERERS: Dict[str, Callable[[ConfigDiff, str, str], str]] = {
+    "text": render_diff_text,
+    "json": render_diff_json,
+}
+
+
+def diff_main(argv: List[str]) -> int:
+    """`main.py diff OLD NEW`: exit 0 when identical, 1 when they differ"""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog=f"{Path(sys.argv[0]).name} diff",
+        description=("Compare two generated Terraform JSON configs and "
+                     "list added, removed and changed addresses")
+    )
+    parser.add_argument("old", type=Path, help="Old .tf.json output")
+    parser.add_argument("new", type=Path, help="New .tf.json output")
+    parser.add_argument(
+        "--format",
+        dest="output_format",
+        choices=sorted(DIFF_RENDERERS),
+        default="text",
+        help="Report format (default: text)"
+    )
+    parser.add_argument(
+        "--json-backend",
+        choices=JSON_BACKENDS,
+        default=JSON_BACKEND,
+        help=f"Decoder for both configs (default: {JSON_BACKEND})"
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        use_json_backend(args.json_backend)
+    except ValueError as e:
+        parser.error(str(e))
+
+    configs = []
+    for path in (args.old, args.new):
+        try:
+            config = load_json_file(path)
+        except OSError as e:
+            parser.error(f"cannot read {path}: {e.strerror}")
+        except ValueError as e:
+            parser.error(f"invalid JSON in {path}: {e}")
+        if not isinstance(config, dict):
+            parser.error(f"{path} is not a JSON object")
+        configs.append(config)
+
+    with profile_phase("diff"):
+        diff = diff_configs(*configs)
+    print(DIFF_RENDERERS[args.output_format](diff, str(args.old),
+                                             str(args.new)))
+    return 0 if diff.identical else 1
+
+
+def discover_configs(test_dir: Path) -> List[str]:
+    """Find every generated config that has a matching expected result"""
+    expected_dir = test_dir / "expected-results"
+    suffix = ".tf.json"
+    return sorted(
+        path.name[:-len(suffix)]
+        for path in test_dir.glob(f"*{suffix}")
+        if (expected_dir / f"{path.name[:-len(suffix)]}.json").is_file()
+    )
+
+
+def _validate_config_job(job: Tuple[str, Path, Dict[str, Any]]
+                         ) -> Tuple[Tuple[str, bool, str], float]:
+    """Worker entry point returning the outcome and its validation time"""
+    config_name, test_dir, options = job
+    if PROFILER is not None:
+        PROFILER.config = config_name
+    start = time.perf_counter()
+    outcome = validate_config(config_name, test_dir, **options)
+    seconds = time.perf_counter() - start
+    if PROFILER is not None:
+        PROFILER.configs[config_name] = seconds
+    return (config_name, *outcome), seconds
+
+
+def _profile_config_job(job: Tuple[str, Path, Dict[str, Any]]
+                        ) -> Tuple[Tuple[str, bool, str], float,
+                                   Dict[str, Any]]:
+    """Worker entry point also returning the worker's profile"""
+    enable_profiling()
+    outcome, seconds = _validate_config_job(job)
+    return outcome, seconds, PROFILER.snapshot()
+
+
+def validate_configs(config_names: List[str], test_dir: Path,
+                     jobs: int = 1,
+                     durations: Optional[Dict[str, float]] = None,
+                     **options: Any) -> Iterator[Tuple[str, bool, str]]:
+    """Validate several configs, optionally across worker processes
+
+    Outcomes are yielded in the order of ``config_names`` regardless of
+    which worker finishes first, so reports stay deterministic. When
+    ``durations`` is given, each config's validation time, as measured by
+    the worker that ran it, is stored in it before its outcome is yielded.
+    Extra keyword options are passed on to validate_config.
+    """
+    work = [(config_name, test_dir, options) for config_name in config_names]
+
+    def finished(outcome: Tuple[str, bool, str],
+                 seconds: float) -> Tuple[str, bool, str]:
+        if durations is not None:
+            durations[outcome[0]] = seconds
+        return outcome
+
+    if jobs <= 1 or len(work) <= 1:
+        for job in work:
+            yield finished(*_validate_config_job(job))
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=min(jobs, len(work))) as executor:
+        if PROFILER is None:
+            for outcome, seconds in executor.map(_validate_config_job, work):
+                yield finished(outcome, seconds)
+            return
+        for outcome, seconds, snapshot in executor.map(_profile_config_job,
+                                                       work):
+            PROFILER.merge(snapshot)
+            yield finished(outcome, seconds)
+
+
+def format_summary(outcomes: List[Tuple[str, bool, str]],
+                   quiet: bool = False) -> str:
+    """Format a per-config summary for a batch run"""
+    passed_count = sum(1 for _, passed, _ in outcomes if passed)
+    header = f"📋 Summary: {passed_count}/{len(outcomes)} configs passed"
+
+    lines = [colorize(header, 'cyan'), colorize("=" * len(header), 'cyan')]
+    for config_name, passed, _ in outcomes:
+        if passed:
+            if not quiet:
+                lines.append(colorize(f"✅ {config_name}", 'green'))
+        else:
+            lines.append(colorize(f"❌ {config_name}", 'red'))
+    lines.append("")
+
+    failed = [config_name for config_name, passed, _ in outcomes
+              if not passed]
+    if failed:
+        lines.append(colorize(f"💥 Failed configs ({len(failed)}):", 'red'))
+        lines.extend(colorize(f"    → {config_name}", 'red')
+                     for config_name in failed)
+        lines.append("")
+
+    return "\n".join(lines)
+
+
+def combine_outputs(outcomes: List[Tuple[str, bool, str]],
+                    output_format: str) -> str:
+    """Join per-config JSON or JUnit outputs into a single document"""
+    outputs = [output for _, _, output in outcomes]
+    if output_format == "json":
+        passed = all(passed for _, passed, _ in outcomes)
+        return (f'{{"passed": {json.dumps(passed)}, '
+                f'"configs": [{", ".join(outputs)}]}}')
+    return ('<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<testsuites name="kontfix">{"".join(outputs)}</testsuites>')
+
+
+def file_stamp(path: Path) -> Optional[Tuple[int, int, int]]:
+    """Identity of a file's current content (None if it doesn't exist)
+
+    The inode is included because build outputs are replaced by copies
+    of Nix store files, whose size may not change.
+    """
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+class Watcher:
+    """Revalidates the configs whose generated or expected file changed.
+
+    Each config's parsed actual config (as a ConfigIndex) and compiled
+    plan are kept in memory with the stamp of the file they came from, so
+    a change to one file only re-reads that file. Without explicit config
+    names, configs are rediscovered on every poll.
+    """
+
+    def __init__(self, test_dir: Path,
+                 config_names: Optional[List[str]] = None,
+                 stream: bool = False, output_format: str = "text",
+                 quiet: bool = False, references: bool = False):
+        self.test_dir = test_dir
+        self.config_names = config_names
+        self.stream = stream and not references
+        self.references = references
+        self.output_format = output_format
+        self.quiet = quiet
+        self.plans: Dict[str, Tuple[Any, Optional[ExpectationPlan], str]] = {}
+        self.indexes: Dict[str, Tuple[Any, Optional[ConfigIndex], str]] = {}
+        self.reference_checks: Dict[str, SectionValidation] = {}
+
+    def poll(self) -> List[Tuple[str, bool, str]]:
+        """Revalidate every config that changed since the last poll"""
+        names = self.config_names or discover_configs(self.test_dir)
+        for stale in set(self.plans) - set(names):
+            self.plans.pop(stale, None)
+            self.indexes.pop(stale, None)
+            self.reference_checks.pop(stale, None)
+
+        outcomes = []
+        for config_name in names:
+            report = self.revalidate(config_name)
+            if report is not None:
+                outcomes.append((
+                    config_name, report.passed,
+                    RENDERERS[self.output_format](report, self.quiet)
+                ))
+        return outcomes
+
+    def revalidate(self, config_name: str) -> Optional[ConfigReport]:
+        """Report for a config, or None if neither of its files changed"""
+        actual_file = self.test_dir / f"{config_name}.tf.json"
+        expected_file = (self.test_dir / "expected-results"
+                         / f"{config_name}.json")
+        actual_stamp = file_stamp(actual_file)
+        expected_stamp = file_stamp(expected_file)
+
+        plan_entry = self.plans.get(config_name)
+        plan_changed = plan_entry is None or plan_entry[0] != expected_stamp
+        if plan_changed:
+            plan_entry = (expected_stamp, *load_expected(expected_file))
+            self.plans[config_name] = plan_entry
+        _, plan, plan_error = plan_entry
+
+        index_entry = self.indexes.get(config_name)
+        if (index_entry is None or index_entry[0] != actual_stamp
+                # Streamed configs only hold what the old plan selected
+                or (self.stream and plan_changed)):
+            selection = plan.selection if self.stream and plan else None
+            actual_config, error = load_actual(actual_file, selection)
+            index_entry = (actual_stamp,
+                           ConfigIndex(actual_config) if not error else None,
+                           error)
+            self.indexes[config_name] = index_entry
+            if self.references and not error:
+                self.reference_checks[config_name] = check_references(
+                    actual_config)
+        elif not plan_changed:
+            return None
+        _, index, actual_error = index_entry
+
+        if actual_error or plan_error:
+            return ConfigReport(config_name, False,
+                                error=actual_error or plan_error)
+        return check_config(config_name, plan, index,
+                            self.reference_checks.get(config_name))
+
+
+class InotifyWaiter:
+    """Wakes watch mode as soon as a file in the watched directories
+    changes, via Linux inotify; watch mode polls on a timer without it."""
+
+    IN_MODIFY = 0x2
+    IN_CLOSE_WRITE = 0x8
+    IN_MOVED_TO = 0x80
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    def __init__(self, directories: List[Path]):
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = (self.IN_MODIFY | self.IN_CLOSE_WRITE | self.IN_MOVED_TO
+                | self.IN_CREATE | self.IN_DELETE)
+        for directory in directories:
+            if directory.is_dir() and libc.inotify_add_watch(
+                    self.fd, os.fsencode(directory), mask) < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), "inotify_add_watch failed")
+
+    def wait(self, timeout: float) -> None:
+        import select
+
+        if select.select([self.fd], [], [], timeout)[0]:
+            # Let the writer finish, then drop the queued events
+            time.sleep(0.05)
+            try:
+                while os.read(self.fd, 65536):
+                    pass
+            except BlockingIOError:
+                pass
+
+
+def make_waiter(test_dir: Path, interval: float,
+                polling: bool = False) -> Callable[[], None]:
+    """Block until the next poll is due
+
+    Uses inotify on Linux, with ``interval`` as a fallback timeout, and
+    plain sleeping otherwise or when ``polling`` is set.
+    """
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            waiter = InotifyWaiter([test_dir, test_dir / "expected-results"])
+            return lambda: waiter.wait(interval)
+        except (OSError, AttributeError):
+            pass
+    return lambda: time.sleep(interval)
+
+
+def watch(watcher: Watcher, wait: Callable[[], None],
+          polls: Optional[int] = None) -> bool:
+    """Print reports whenever configs change, until interrupted
+
+    Returns whether every watched config passed on its latest check.
+    ``polls`` bounds the number of polls, for tests.
+    """
+    latest: Dict[str, bool] = {}
+    count = 0
+    try:
+        while polls is None or count < polls:
+            count += 1
+            outcomes = watcher.poll()
+            for config_name, passed, output in outcomes:
+                latest[config_name] = passed
+                if output:
+                    print(output, flush=True)
+            for stale in set(latest) - set(watcher.plans):
+                del latest[stale]
+            if outcomes:
+                failed = sum(1 for passed in latest.values() if not passed)
+                stamp = time.strftime("%H:%M:%S")
+                print(colorize(
+                    f"👀 {stamp} revalidated {len(outcomes)} config(s); "
+                    f"{len(latest) - failed}/{len(latest)} passing, "
+                    "waiting for changes...",
+                    'red' if failed else 'cyan'
+                ), flush=True)
+            if polls is None or count < polls:
+                wait()
+    except KeyboardInterrupt:
+        pass
+    return all(latest.values())
 
 
 def main():
     """CLI entry point"""
     import argparse
 
+    if sys.argv[1:2] == ["diff"]:
+        sys.exit(diff_main(sys.argv[2:]))
+
     parser = argparse.ArgumentParser(
-        description="Validate Terraform JSON configs"
+        description="Validate Terraform JSON configs",
+        epilog=("Run `%(prog)s diff OLD NEW` to compare two generated "
+                "configs instead")
     )
     parser.add_argument(
-        "config_name",
+        "config_names",
+        nargs="*",
+        metavar="config_name",
         help="Name of the config to validate (without .tf.json)"
     )
+    parser.add_argument(
+        "--all",
+        action="store_true",
+        help=("Validate every *.tf.json that has a matching "
+              "expected-results/*.json")
+    )
     parser.add_argument(
         "--test-dir",
         type=Path,
         default=Path.cwd(),
         help="Directory containing test configs (default: current directory)"
     )
+    parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        default=1,
+        metavar="N",
+        help=("Validate configs in N worker processes "
+              "(default: 1, 0 for one per CPU)")
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help=("Stream-parse actual configs, materializing only the "
+              "sections the expected results refer to. Pays off on large "
+              "configs only, and doesn't detect malformed JSON in the "
+              "skipped sections")
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        help=("Directory for compiled plans and cached results "
+              "(default: $XDG_CACHE_HOME/kontfix-validator/<digest of "
+              "the test dir path>)")
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Neither read nor write the validation cache"
+    )
+    parser.add_argument(
+        "--cache-max-size",
+        type=int,
+        default=256,
+        metavar="MB",
+        help=("Evict least recently used cache entries above this size "
+              "(default: 256)")
+    )
+    parser.add_argument(
+        "--format",
+        dest="output_format",
+        choices=sorted(RENDERERS),
+        default="text",
+        help="Report format (default: text)"
+    )
+    parser.add_argument(
+        "--quiet", "-q",
+        action="store_true",
+        help="Only print failures"
+    )
+    parser.add_argument(
+        "--json-backend",
+        choices=JSON_BACKENDS,
+        default=JSON_BACKEND,
+        help=("Decoder for expected and actual configs "
+              f"(default: {JSON_BACKEND}, the fastest installed)")
+    )
+    parser.add_argument(
+        "--check-references",
+        action="store_true",
+        help=("Also check that every interpolation resolves to a defined "
+              "resource, data source, variable or provider alias and that "
+              "references have no cycles (reads whole configs, no --stream)")
+    )
+
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="table",
+        choices=["table", "json"],
+        help=("Print per-phase timings, is_subset counters and the slowest "
+              "entries to stderr (default format: table). Cached results "
+              "skip validation, so combine with --no-cache for cold timings")
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=10,
+        metavar="N",
+        help="Number of slowest configs and entries to list (default: 10)"
+    )
+    parser.add_argument(
+        "--cprofile",
+        type=Path,
+        metavar="FILE",
+        help=("Write cProfile stats for the whole run to FILE "
+              "(implies --jobs 1)")
+    )
+
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help=("Keep running and revalidate configs whose .tf.json or "
+              "expected results change")
+    )
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=1.0,
+        metavar="SECONDS",
+        help="Polling interval in watch mode (default: 1.0)"
+    )
+    parser.add_argument(
+        "--watch-poll",
+        action="store_true",
+        help="Poll on the interval instead of using inotify"
+    )
 
     args = parser.parse_args()
 
-    passed, output = validate_config(args.config_name, args.test_dir)
-    print(output)
+    try:
+        use_json_backend(args.json_backend)
+    except ValueError as e:
+        parser.error(str(e))
+
+    config_names = list(args.config_names)
+    if args.all:
+        config_names.extend(name for name in discover_configs(args.test_dir)
+                            if name not in config_names)
+    if not config_names and not (args.watch and args.all):
+        parser.error("no configs given (pass config names or --all)")
+
+    if args.watch:
+        watcher = Watcher(args.test_dir,
+                          None if args.all else config_names,
+                          stream=args.stream,
+                          output_format=args.output_format,
+                          quiet=args.quiet,
+                          references=args.check_references)
+        wait = make_waiter(args.test_dir, args.watch_interval,
+                           polling=args.watch_poll)
+        sys.exit(0 if watch(watcher, wait) else 1)
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    cache_dir = (None if args.no_cache
+                 else args.cache_dir or default_cache_dir(args.test_dir))
+
+    text_output = args.output_format == "text"
+
+    profiler = enable_profiling() if args.profile else None
+    cprofile = None
+    if args.cprofile:
+        import cProfile
+        jobs = 1
+        cprofile = cProfile.Profile()
+        cprofile.enable()
+
+    outcomes = []
+    for outcome in validate_configs(config_names, args.test_dir, jobs,
+                                    stream=args.stream,
+                                    cache_dir=cache_dir,
+                                    output_format=args.output_format,
+                                    quiet=args.quiet,
+                                    references=args.check_references):
+        if text_output and outcome[2]:
+            print(outcome[2], flush=True)
+        outcomes.append(outcome)
+
+    if cprofile is not None:
+        cprofile.disable()
+        cprofile.dump_stats(args.cprofile)
+
+    if profiler is not None:
+        if args.profile == "json":
+            print(json.dumps(profiler.summary(args.profile_top), indent=2),
+                  file=sys.stderr)
+        else:
+            print(profiler.format_table(args.profile_top), file=sys.stderr)
+
+    if not text_output:
+        print(combine_outputs(outcomes, args.output_format))
+    elif len(outcomes) > 1:
+        print(format_summary(outcomes, args.quiet))
+
+    if cache_dir is not None and cache_dir.is_dir():
+        prune_cache(cache_dir, args.cache_max_size * 1024 * 1024)
 
-    sys.exit(0 if passed else 1)
+    sys.exit(0 if all(passed for _, passed, _ in outcomes) else 1)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
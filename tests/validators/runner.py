@@ -0,0 +1,602 @@
+#!/usr/bin/env python3
+"""
+Test runner for the kontfix test cases.
+Builds every case with `nix run .#build-<case>` on a bounded job pool,
+checks each error case with a single `nix run .#build-error-<case>`
+(output and exit status from the same invocation) and validates the
+generated configs in-process with the partial JSON validator. Generated
+configs are cached by the content of everything their build depends on.
+With `--shard i/n` only one of n shards runs, balanced by the build and
+validation times recorded in a timing history.
+"""
+
+import hashlib
+import heapq
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import main as validator  # noqa: E402
+
+
+@dataclass
+class BuildResult:
+    """Outcome of one `nix run` build app"""
+    case: str
+    error_case: bool
+    returncode: int
+    output: str
+    seconds: float
+
+    @property
+    def app(self) -> str:
+        return (f"build-error-{self.case}" if self.error_case
+                else f"build-{self.case}")
+
+
+class BuildCache:
+    """Content-addressed store of generated <case>.tf.json files.
+
+    A case's key covers its case file, every file of the kontfix source
+    tree (outside tests/), both flake.lock files and the test flake, so
+    an unchanged key means `nix run .#build-<case>` would produce the
+    same output. Entries live under ``<cache_dir>/builds`` and are evicted
+    together with the validator's cache.
+    """
+
+    def __init__(self, cache_dir: Path, test_dir: Path,
+                 source_root: Optional[Path] = None):
+        self.directory = cache_dir / "builds"
+        self.test_dir = test_dir
+        self.source_root = source_root or test_dir.parent
+        self.hits = 0
+        self.misses = 0
+        self._inputs: Optional[bytes] = None
+
+    def shared_inputs(self) -> bytes:
+        """Digest of the inputs every case depends on"""
+        if self._inputs is None:
+            digest = hashlib.sha256()
+            digest.update(f"{sys.platform}-{platform.machine()}".encode())
+            for path in (self.test_dir / "flake.nix",
+                         self.test_dir / "flake.lock",
+                         self.source_root / "flake.lock"):
+                digest.update(file_digest(path))
+            digest.update(tree_digest(self.source_root,
+                                      exclude={self.test_dir.name}))
+            self._inputs = digest.digest()
+        return self._inputs
+
+    def key(self, case: str) -> str:
+        case_file = self.test_dir / "cases" / f"{case}.nix"
+        return hashlib.sha256(
+            self.shared_inputs() + case.encode() + b"\0"
+            + file_digest(case_file)
+        ).hexdigest()
+
+    def restore(self, case: str) -> bool:
+        """Put the cached output for a case in place, if there is one"""
+        entry = self.directory / f"{self.key(case)}.tf.json"
+        try:
+            data = entry.read_bytes()
+        except OSError:
+            self.misses += 1
+            return False
+        validator.write_cache_file(self.test_dir / f"{case}.tf.json", data)
+        validator.touch_cache_file(entry)
+        self.hits += 1
+        return True
+
+    def store(self, case: str) -> None:
+        """Remember a freshly built output"""
+        try:
+            data = (self.test_dir / f"{case}.tf.json").read_bytes()
+        except OSError:
+            return
+        validator.write_cache_file(
+            self.directory / f"{self.key(case)}.tf.json", data)
+
+
+def file_digest(path: Path) -> bytes:
+    """sha256 of a file's content, or of nothing for a missing file"""
+    try:
+        return hashlib.sha256(path.read_bytes()).digest()
+    except OSError:
+        return hashlib.sha256(b"").digest()
+
+
+def tree_digest(root: Path, exclude: set) -> bytes:
+    """sha256 over the relative paths and contents of a directory tree
+
+    Hidden entries (VCS metadata, tool caches) and the top-level
+    directories in ``exclude`` are skipped.
+    """
+    digest = hashlib.sha256()
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories[:] = sorted(
+            name for name in subdirectories
+            if not name.startswith(".")
+            and not (name in exclude and Path(directory) == root)
+        )
+        for name in sorted(files):
+            if name.startswith("."):
+                continue
+            path = Path(directory) / name
+            digest.update(path.relative_to(root).as_posix().encode()
+                          + b"\0" + file_digest(path))
+    return digest.digest()
+
+
+# Kinds of recorded timings: building a case, validating its output and
+# running an error case's build
+TIMING_KINDS = ("build", "validate", "error")
+
+# Weight of the newest measurement in a case's recorded time
+TIMING_WEIGHT = 0.5
+
+
+class TimingHistory:
+    """Seconds each case took in previous runs, kept in a JSON file.
+
+    Times are moving averages per kind, so one slow run on a busy machine
+    doesn't skew the estimates. Every shard must read the same history
+    to agree on the partition; each run only updates the cases it ran.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.times = self.load(path)
+        self.measured: Dict[Tuple[str, str], float] = {}
+
+    @staticmethod
+    def load(path: Path) -> Dict[str, Dict[str, float]]:
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        if not isinstance(data, dict):
+            data = {}
+        times: Dict[str, Dict[str, float]] = {}
+        for kind in TIMING_KINDS:
+            entries = data.get(kind)
+            times[kind] = {
+                case: float(seconds)
+                for case, seconds in (entries.items()
+                                      if isinstance(entries, dict) else ())
+                if isinstance(seconds, (int, float)) and seconds >= 0
+            }
+        return times
+
+    def __bool__(self) -> bool:
+        return any(self.times.values())
+
+    def record(self, kind: str, case: str, seconds: float) -> None:
+        self.measured[kind, case] = seconds
+
+    def estimate(self, kind: str, case: str) -> Optional[float]:
+        return self.times[kind].get(case)
+
+    def save(self) -> None:
+        """Fold this run's measurements into the file's current content"""
+        if not self.measured:
+            return
+        times = self.load(self.path)
+        for (kind, case), seconds in self.measured.items():
+            previous = times[kind].get(case)
+            times[kind][case] = round(
+                seconds if previous is None
+                else previous + TIMING_WEIGHT * (seconds - previous), 3)
+        validator.write_cache_file(self.path, json.dumps(
+            {kind: dict(sorted(times[kind].items())) for kind in TIMING_KINDS},
+            indent=2).encode("utf-8") + b"\n")
+        self.times = times
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """`i/n` with 1 <= i <= n, as (i, n)"""
+    index, _, count = spec.partition("/")
+    try:
+        shard = (int(index), int(count))
+    except ValueError:
+        raise ValueError(f"invalid shard '{spec}', expected i/n "
+                         "such as 2/4") from None
+    if not 1 <= shard[0] <= shard[1]:
+        raise ValueError(f"invalid shard '{spec}', i must be between 1 "
+                         "and n")
+    return shard
+
+
+def lpt_partition(costs: Dict[Tuple[str, str], float],
+                  count: int) -> List[List[Tuple[str, str]]]:
+    """Longest processing time first: the costliest remaining item goes
+    to the least loaded shard. Ties break on names and shard numbers, so
+    every node computes the same partition."""
+    shards: List[List[Tuple[str, str]]] = [[] for _ in range(count)]
+    loads = [(0.0, index) for index in range(count)]
+    for item in sorted(costs, key=lambda item: (-costs[item], item)):
+        load, index = heapq.heappop(loads)
+        shards[index].append(item)
+        heapq.heappush(loads, (load + costs[item], index))
+    return shards
+
+
+def stable_shard(item: Tuple[str, str], count: int) -> int:
+    """Shard of an item by a hash that is the same on every machine"""
+    digest = hashlib.sha256("\0".join(item).encode()).digest()
+    return int.from_bytes(digest[:8], "big") % count
+
+
+def item_costs(cases: Sequence[str], error_cases: Sequence[str],
+               history: TimingHistory) -> Dict[Tuple[str, str], float]:
+    """Estimated seconds per case: build plus validation for regular cases,
+    the error build for error cases. Cases missing from the history cost
+    the mean of their kind, or of all recorded times."""
+    recorded = [seconds for times in history.times.values()
+                for seconds in times.values()]
+    overall = sum(recorded) / len(recorded) if recorded else 0.0
+
+    def estimate(kind: str, case: str) -> float:
+        seconds = history.estimate(kind, case)
+        if seconds is not None:
+            return seconds
+        times = history.times[kind]
+        return sum(times.values()) / len(times) if times else overall
+
+    costs = {("case", case): estimate("build", case)
+             + estimate("validate", case) for case in cases}
+    costs.update((("error-case", case), estimate("error", case))
+                 for case in error_cases)
+    return costs
+
+
+def shard_cases(cases: Sequence[str], error_cases: Sequence[str],
+                shard: Tuple[int, int], history: TimingHistory
+                ) -> Tuple[List[str], List[str], str]:
+    """The cases and error cases of one shard, plus how it was chosen
+
+    With a timing history the shards are balanced by estimated time;
+    without one every case goes to a shard picked by a hash of its name.
+    """
+    index, count = shard
+    costs = item_costs(cases, error_cases, history)
+    if history:
+        items = set(lpt_partition(costs, count)[index - 1])
+        selected = sum(costs[item] for item in items)
+        note = (f"estimated {selected:.1f}s of {sum(costs.values()):.1f}s "
+                f"from {history.path.name}")
+    else:
+        items = {item for item in costs if stable_shard(item, count)
+                 == index - 1}
+        note = "no timing history, partitioned by name"
+    return ([case for case in cases if ("case", case) in items],
+            [case for case in error_cases if ("error-case", case) in items],
+            note)
+
+
+def discover_cases(directory: Path) -> List[str]:
+    """Case names from the *.nix files of a cases directory"""
+    if not directory.is_dir():
+        return []
+    return sorted(path.stem for path in directory.glob("*.nix"))
+
+
+def run_build(nix: str, case: str, error_case: bool,
+              test_dir: Path) -> BuildResult:
+    """Run a build app once, capturing its combined output and status"""
+    app = f"build-error-{case}" if error_case else f"build-{case}"
+    start = time.perf_counter()
+    try:
+        process = subprocess.run(
+            [nix, "run", f".#{app}"], cwd=test_dir,
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            stdin=subprocess.DEVNULL
+        )
+        returncode = process.returncode
+        output = process.stdout.decode("utf-8", errors="replace")
+    except OSError as e:
+        returncode, output = 127, f"{nix}: {e}"
+    return BuildResult(case, error_case, returncode, output,
+                       time.perf_counter() - start)
+
+
+def run_builds(nix: str, builds: List[Tuple[str, bool]], test_dir: Path,
+               jobs: int) -> Iterator[BuildResult]:
+    """Run build apps on a pool of `jobs` workers, yielding as they finish"""
+    if not builds:
+        return
+    with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(builds)))
+                            ) as executor:
+        futures = [executor.submit(run_build, nix, case, error_case,
+                                   test_dir)
+                   for case, error_case in builds]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def expected_error_found(expected: str, output: str) -> bool:
+    """Same check as `grep -qF "$expected"`: any pattern line occurs"""
+    patterns = expected.rstrip("\n").split("\n")
+    return any(pattern in output for pattern in patterns)
+
+
+def check_error_case(result: BuildResult,
+                     test_dir: Path) -> Tuple[bool, str]:
+    """Whether an error build failed with its expected message"""
+    expected_file = test_dir / "expected-errors" / f"{result.case}.txt"
+    if not expected_file.is_file():
+        return False, f"❌ ./expected-errors/{result.case}.txt not found."
+
+    expected_error = expected_file.read_text().rstrip("\n")
+    if result.returncode == 0:
+        return False, f"❌ {result.case}: build succeeded but should have failed!"
+    if expected_error_found(expected_error, result.output):
+        return True, f"✅ {result.case} error test passed"
+    return False, "\n".join([
+        f"❌ {result.case} error test failed",
+        f"   Expected error: {expected_error}",
+        "   Actual output:",
+        result.output.rstrip("\n"),
+    ])
+
+
+def cached_results(cases: List[str], test_dir: Path, **options) -> set:
+    """Cases whose validation result validate_config would replay"""
+    cached = set()
+    for case in cases:
+        result_file = validator.result_cache_file(case, test_dir, **options)
+        if result_file is not None and result_file.is_file():
+            cached.add(case)
+    return cached
+
+
+def run(test_dir: Path, nix: str = "nix", jobs: int = 1,
+        cases: Optional[List[str]] = None,
+        error_cases: Optional[List[str]] = None,
+        build_cache: Optional[BuildCache] = None,
+        timings: Optional[TimingHistory] = None,
+        **options) -> bool:
+    """Build, check and validate the given cases; True if all passed
+
+    ``cases`` and ``error_cases`` default to the *.nix files under cases/
+    and error-cases/. With a ``build_cache``, cases whose inputs are
+    unchanged reuse their cached output instead of being rebuilt. Build
+    and validation times are recorded in ``timings``, except for reused
+    outputs and replayed results. Extra keyword options go to
+    validate_configs.
+    """
+    if cases is None:
+        cases = discover_cases(test_dir / "cases")
+    if error_cases is None:
+        error_cases = discover_cases(test_dir / "error-cases")
+
+    results: Dict[Tuple[str, bool], BuildResult] = {}
+    stale = cases
+    if build_cache is not None:
+        stale = []
+        for case in cases:
+            if build_cache.restore(case):
+                results[case, False] = BuildResult(case, False, 0, "", 0.0)
+                print(f"♻️  Reused cached {case}.tf.json", flush=True)
+            else:
+                stale.append(case)
+
+    builds = ([(case, False) for case in stale]
+              + [(case, True) for case in error_cases])
+    print(f"🚀 Building {len(stale)} configurations and "
+          f"{len(error_cases)} error cases ({jobs} jobs)...", flush=True)
+
+    for result in run_builds(nix, builds, test_dir, jobs):
+        results[result.case, result.error_case] = result
+        if timings is not None:
+            timings.record("error" if result.error_case else "build",
+                           result.case, result.seconds)
+        if result.error_case:
+            print(f"🔨 Ran {result.app} ({result.seconds:.1f}s)", flush=True)
+        elif result.returncode == 0:
+            if build_cache is not None:
+                build_cache.store(result.case)
+            print(f"✅ Built {result.case} ({result.seconds:.1f}s)",
+                  flush=True)
+        else:
+            print(f"❌ Build failed for {result.case} "
+                  f"(exit {result.returncode})", flush=True)
+            print(result.output.rstrip("\n"), flush=True)
+
+    if build_cache is not None:
+        print(f"📦 Build cache: {build_cache.hits} hits, "
+              f"{build_cache.misses} misses", flush=True)
+
+    all_passed = True
+
+    # Validate every built config that has expected results
+    validate: List[str] = []
+    for case in cases:
+        if results[case, False].returncode != 0:
+            all_passed = False
+        elif not (test_dir / f"{case}.tf.json").is_file():
+            print(f"❌ {case}.tf.json not found.")
+            all_passed = False
+        elif not (test_dir / "expected-results" / f"{case}.json").is_file():
+            print(f"❌ ./expected-results/{case}.json not found, "
+                  f"can't validate {case}")
+            all_passed = False
+        else:
+            validate.append(case)
+
+    if validate:
+        print("")
+        print("🧪 Running regular tests...", flush=True)
+        # Replayed results take no time, so they'd skew the estimates
+        cached = (cached_results(validate, test_dir, **options)
+                  if timings is not None else set())
+        outcomes = []
+        # Timed in the workers, so overlapping validations don't blur
+        durations: Dict[str, float] = {}
+        for outcome in validator.validate_configs(validate, test_dir, jobs,
+                                                  durations=durations,
+                                                  **options):
+            if timings is not None and outcome[0] not in cached:
+                timings.record("validate", outcome[0], durations[outcome[0]])
+            if outcome[2]:
+                print(outcome[2], flush=True)
+            outcomes.append(outcome)
+        if len(outcomes) > 1:
+            print(validator.format_summary(outcomes))
+        all_passed &= all(passed for _, passed, _ in outcomes)
+
+    if error_cases:
+        print("")
+        print("🧪 Testing error cases...")
+        for case in error_cases:
+            passed, message = check_error_case(results[case, True], test_dir)
+            print(message)
+            all_passed &= passed
+
+    print("")
+    if all_passed:
+        print("🎉 All tests passed!")
+    else:
+        print("💥 Some tests failed!")
+    return all_passed
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """CLI entry point"""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Build and validate kontfix test cases"
+    )
+    parser.add_argument(
+        "suite",
+        nargs="?",
+        choices=["all", "builds", "errors"],
+        default="all",
+        help=("Run regular cases, error cases or both "
+              "(default: all)")
+    )
+    parser.add_argument(
+        "--cases",
+        nargs="+",
+        metavar="CASE",
+        help="Only run these cases (regular or error)"
+    )
+    parser.add_argument(
+        "--test-dir",
+        type=Path,
+        default=Path.cwd(),
+        help="Directory containing the test flake (default: current directory)"
+    )
+    parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Run N builds at a time (default: 0, one per CPU)"
+    )
+    parser.add_argument(
+        "--nix",
+        default=os.environ.get("NIX", "nix"),
+        help="nix executable to run build apps with (default: $NIX or nix)"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Neither read nor write the validation cache"
+    )
+    parser.add_argument(
+        "--no-build-cache",
+        action="store_true",
+        help="Rebuild every case instead of reusing cached outputs"
+    )
+    parser.add_argument(
+        "--source-root",
+        type=Path,
+        help=("kontfix source tree the build cache keys on "
+              "(default: parent of --test-dir)")
+    )
+    parser.add_argument(
+        "--check-references",
+        action="store_true",
+        help=("Also check that every interpolation in the generated "
+              "configs resolves and that references have no cycles")
+    )
+    parser.add_argument(
+        "--shard",
+        metavar="I/N",
+        help=("Only run shard I of N (1-based), balanced by the timing "
+              "history or, without one, partitioned by case name")
+    )
+    parser.add_argument(
+        "--timings",
+        type=Path,
+        metavar="FILE",
+        help=("Timing history to balance shards by and to record this "
+              "run's times in (default: <test-dir>/.test-timings.json)")
+    )
+    parser.add_argument(
+        "--cache-max-size",
+        type=int,
+        default=256,
+        metavar="MB",
+        help=("Evict least recently used cache entries above this size "
+              "(default: 256)")
+    )
+
+    args = parser.parse_args(argv)
+
+    try:
+        shard = parse_shard(args.shard) if args.shard else None
+    except ValueError as e:
+        parser.error(str(e))
+
+    cases = discover_cases(args.test_dir / "cases")
+    error_cases = discover_cases(args.test_dir / "error-cases")
+    if args.cases:
+        unknown = set(args.cases) - set(cases) - set(error_cases)
+        if unknown:
+            parser.error(f"unknown cases: {', '.join(sorted(unknown))}")
+        cases = [case for case in cases if case in args.cases]
+        error_cases = [case for case in error_cases if case in args.cases]
+    if args.suite == "builds":
+        error_cases = []
+    elif args.suite == "errors":
+        cases = []
+
+    timings = TimingHistory(args.timings
+                            or args.test_dir / ".test-timings.json")
+    if shard is not None:
+        cases, error_cases, note = shard_cases(cases, error_cases, shard,
+                                               timings)
+        print(f"🧩 Shard {shard[0]}/{shard[1]}: {len(cases)} cases and "
+              f"{len(error_cases)} error cases ({note})", flush=True)
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    store_dir = validator.default_cache_dir(args.test_dir)
+    build_cache = (None if args.no_build_cache
+                   else BuildCache(store_dir, args.test_dir, args.source_root))
+
+    passed = run(args.test_dir, args.nix, jobs, cases, error_cases,
+                 build_cache=build_cache, timings=timings,
+                 cache_dir=None if args.no_cache else store_dir,
+                 references=args.check_references)
+    timings.save()
+
+    if store_dir.is_dir():
+        validator.prune_cache(store_dir, args.cache_max_size * 1024 * 1024)
+
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Tests for the benchmark fixtures: the synthetic inputs have to be what
+the benchmarks assume they are.
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import bench  # noqa: E402
+import main as validator  # noqa: E402
+
+
+@pytest.mark.parametrize("edits", [None, 1, 10])
+def test_edited_copy_changes_exactly_the_requested_resources(edits):
+    _, actual = bench.kontfix_output(12, group_size=4)
+    resources = sum(len(blocks) for blocks in actual["resource"].values())
+    # All but the removed resource, which used to be a possible target
+    edits = resources - 1 if edits is None else edits
+
+    for seed in range(3):
+        diff = validator.diff_configs(
+            actual, bench.edited_copy(actual, edits, seed))
+        assert len(diff.changed) == edits
+        assert diff.added == ["bench_added.added"]
+        assert len(diff.removed) == 1
+        assert diff.removed[0] not in diff.changed
+
+
+def test_startup_runs_bypass_the_result_cache(tmp_path):
+    config_name = bench.write_passing_case(tmp_path)
+    command = bench.startup_command(bench.VALIDATOR, tmp_path, config_name)
+    assert "--no-cache" in command
+
+    # Later runs would otherwise replay the first run's report
+    cache_dir = tmp_path / "cache"
+    env = dict(os.environ, XDG_CACHE_HOME=str(cache_dir))
+    subprocess.run(command, check=True, stdout=subprocess.DEVNULL, env=env)
+    assert not cache_dir.exists()
+
+    # A baseline from before the cache has no flag to pass
+    baseline = tmp_path / "main-baseline.py"
+    baseline.write_text('parser.add_argument("--jobs")\n')
+    assert "--no-cache" not in bench.startup_command(
+        baseline, tmp_path, config_name)
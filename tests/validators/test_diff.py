@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Tests for the diff subcommand.
+"""
+
+import copy
+import json
+
+import pytest
+
+from derived_cases import validator
+
+pytestmark = pytest.mark.usefixtures("plain_output")
+
+
+def test_diff_reports_changed_addresses_and_paths(tmp_path, capsys,
+                                                  monkeypatch):
+    old = {
+        "provider": {"konnect": [{"alias": "au", "server_url": "au"},
+                                 {"alias": "us", "server_url": "us"}]},
+        "variable": {"cp_admin_token": {"type": "string"}},
+        "resource": {"konnect_gateway_control_plane": {
+            "au-test": {"name": "test", "labels": {"env": "test"},
+                        "proxy_urls": [{"host": "a"}, {"host": "b"}]},
+            "au-demo": {"name": "demo"},
+            "us-test": {"name": "us", "auth_type": "pki_client_certs"}}},
+    }
+    new = copy.deepcopy(old)
+    new["provider"]["konnect"][1]["server_url"] = "us-v2"
+    new["variable"]["id_admin_token"] = {"type": "string"}
+    cps = new["resource"]["konnect_gateway_control_plane"]
+    del cps["au-demo"]
+    cps["au-test"]["labels"] = {"env": "prod", "team": "kong"}
+    cps["au-test"]["proxy_urls"].pop()
+    new["data"] = {"vault_policy_document": {"au-test": {}}}
+
+    diff = validator.diff_configs(old, new)
+    assert diff.added == ["data.vault_policy_document.au-test",
+                          "var.id_admin_token"]
+    assert diff.removed == ["konnect_gateway_control_plane.au-demo"]
+    assert diff.changed == {
+        "konnect_gateway_control_plane.au-test": [
+            ("labels.env", "~", "test", "prod"),
+            ("labels.team", "+", None, "kong"),
+            ("proxy_urls[1]", "-", {"host": "b"}, None)],
+        "provider.konnect.us": [("server_url", "~", "us", "us-v2")],
+    }
+    assert diff.unchanged == 3
+    assert validator.diff_configs(old, copy.deepcopy(old)).identical
+    # Equal in Python, but not as JSON
+    assert validator.diff_configs({"locals": [{"n": 1}]},
+                                  {"locals": [{"n": 1.0}]}).changed == {
+        "local.n": [("", "~", 1, 1.0)]}
+
+    (tmp_path / "old.tf.json").write_text(json.dumps(old))
+    (tmp_path / "new.tf.json").write_text(json.dumps(new, indent=2))
+    monkeypatch.chdir(tmp_path)
+    assert validator.diff_main(["old.tf.json", "new.tf.json"]) == 1
+    output = capsys.readouterr().out
+    assert "2 added, 1 removed, 2 changed, 3 unchanged" in output
+    assert '    ~ labels.env: "test" → "prod"' in output
+    assert "- konnect_gateway_control_plane.au-demo" in output
+
+    assert validator.diff_main(["--format", "json",
+                                "old.tf.json", "old.tf.json"]) == 0
+    assert json.loads(capsys.readouterr().out)["unchanged"] == 6
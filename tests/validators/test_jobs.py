@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Tests for --jobs: validating configs in worker processes prints the same
+reports, in the same order, with the same exit code as a serial run.
+"""
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+from derived_cases import (
+    TESTS_DIR,
+    VALIDATORS_DIR,
+    derive_case,
+    write_broken_case,
+)
+
+
+def write_matching_case(case, tmp_dir, name, padding=0):
+    """Write the matching variant of a case, with `padding` extra resources"""
+    expected = json.loads(
+        (TESTS_DIR / "expected-results" / f"{case}.json").read_text())
+    case_expected, actual = derive_case(expected, broken=False)
+    actual["resource"]["null_resource"] = {
+        f"padding-{i}": {"triggers": {"index": str(i)}}
+        for i in range(padding)}
+    (tmp_dir / "expected-results").mkdir(exist_ok=True)
+    (tmp_dir / "expected-results" / f"{name}.json").write_text(
+        json.dumps(case_expected))
+    (tmp_dir / f"{name}.tf.json").write_text(json.dumps(actual))
+
+
+def run_validator(tmp_dir, *args):
+    return subprocess.run(
+        [sys.executable, str(VALIDATORS_DIR / "main.py"), *args,
+         "--test-dir", str(tmp_dir), "--no-cache"],
+        capture_output=True, text=True, check=False)
+
+
+@pytest.mark.parametrize("broken, returncode", [((), 0), (("b",), 1)])
+def test_parallel_run_reports_like_a_serial_run(broken, returncode,
+                                                tmp_path):
+    # The first config takes longest, so workers finish out of order
+    write_matching_case("cp-groups", tmp_path, "a", padding=50_000)
+    for name, case in (("b", "cp"), ("c", "module-defaults")):
+        if name in broken:
+            write_broken_case(case, tmp_path, name)
+        else:
+            write_matching_case(case, tmp_path, name)
+
+    serial = run_validator(tmp_path, "a", "b", "c", "-j", "1")
+    parallel = run_validator(tmp_path, "a", "b", "c", "-j", "2")
+
+    assert serial.returncode == parallel.returncode == returncode
+    assert parallel.stdout == serial.stdout
+    headers = [parallel.stdout.index(f"Partial Validation: {name}\n")
+               for name in ("a", "b", "c")]
+    assert headers == sorted(headers)
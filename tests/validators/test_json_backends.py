@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Tests for the JSON backends: every installed decoder reads configs alike.
+"""
+
+import pytest
+
+from derived_cases import JSON_BACKENDS, validator
+
+pytestmark = pytest.mark.usefixtures("plain_output")
+
+
+@pytest.mark.parametrize("json_backend", JSON_BACKENDS)
+def test_json_backends_decode_alike(json_backend, tmp_path, monkeypatch):
+    monkeypatch.setattr(validator, "JSON_BACKEND", json_backend)
+    # Documents only the stdlib decoder accepts
+    path = tmp_path / "config.tf.json"
+    path.write_bytes(b'{"n": NaN, "big": 18446744073709551616, '
+                     b'"inf": 1e400, "s": "\\ud800"}')
+    decoded = validator.load_json_file(path)
+    assert decoded["big"] == 2 ** 64 and decoded["inf"] == float("inf")
+    assert decoded["s"] == "\ud800" and decoded["n"] != decoded["n"]
+
+    for content, error in ((b"", "Expecting value: line 1 column 1 (char 0)"),
+                           (b'{"a": [1,}', "Expecting value: line 1 "
+                                           "column 10 (char 9)")):
+        path.write_bytes(content)
+        assert validator.load_actual(path) == (
+            None, f"❌ Invalid JSON in actual config: {error}")
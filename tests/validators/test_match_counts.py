@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests for name patterns and match counts in expected entries.
+"""
+
+import json
+
+import pytest
+
+from derived_cases import validator
+
+pytestmark = pytest.mark.usefixtures("plain_output")
+
+
+def test_name_patterns_and_match_counts(tmp_path):
+    actual = {"resource": {
+        "konnect_gateway_control_plane": {
+            f"{region}-cp-{i}": {"name": f"cp-{i}",
+                                 "cluster_type": "CLUSTER_TYPE_CONTROL_PLANE"}
+            for region in ("au", "us") for i in range(6)
+        },
+        "konnect_system_account": {
+            f"{region}-cp-{i}": {"provider": "konnect.id_admin"}
+            for region in ("au", "us") for i in range(6)
+        },
+    }}
+    actual["resource"]["konnect_gateway_control_plane"]["au-cpg"] = {
+        "cluster_type": "CLUSTER_TYPE_CONTROL_PLANE_GROUP"}
+    actual["resource"]["konnect_system_account"]["us-cp-4"] = {
+        "provider": "konnect.us"}
+    system_accounts = {"resource_type": "konnect_system_account",
+                       "provider": "konnect.id_admin"}
+    expected = {
+        "control_planes": [
+            {"resource_name": "*", "matches": 12,
+             "cluster_type": "CLUSTER_TYPE_CONTROL_PLANE"},
+            {"resource_name": "/(au|us)-cp-[0-9]+/", "min_matches": 13},
+            {"resource_name": "au-cp-?", "count_only": True},
+            {"resource_name": "/[/", "matches": 1},
+            {"resource_name": "us-*", "matches": 6, "max_matches": 8},
+            {"resource_name": "au-*", "min_matches": 5, "max_matches": 2},
+        ],
+        "resources": [
+            dict(system_accounts, resource_name="au-*"),
+            dict(system_accounts, resource_name="us-*"),
+            dict(system_accounts, resource_name="eu-*"),
+            dict(system_accounts, resource_name="us-cp-4", max_matches=0),
+            dict(system_accounts, resource_name="*", matches=-1),
+        ],
+    }
+    (tmp_path / "expected-results").mkdir()
+    (tmp_path / "expected-results" / "bulk.json").write_text(
+        json.dumps(expected))
+    (tmp_path / "bulk.tf.json").write_text(json.dumps(actual))
+
+    for stream in (False, True):
+        passed, output = validator.validate_config("bulk", tmp_path,
+                                                   stream=stream)
+        assert not passed
+        assert ("✅ 12 matches of Control plane * have expected properties "
+                "(exactly 12)") in output
+        assert ("❌ 12 matches of Control plane /(au|us)-cp-[0-9]+/ have "
+                "expected properties, expected at least 13") in output
+        assert "✅ Control plane au-cp-? exists" in output
+        assert "❌ Invalid test configuration: bad pattern '/[/'" in output
+        assert ("✅ All 6 matches of konnect_system_account.au-* have "
+                "matching properties") in output
+        assert ("❌ 1/6 matches of konnect_system_account.us-* don't match "
+                "expected properties") in output
+        assert ("Not matching: us-cp-4\n    → Reason for us-cp-4: "
+                "expected 'konnect.id_admin', got 'konnect.us' at provider"
+                ) in output
+        assert ("❌ konnect_system_account.eu-* missing (resource not found)"
+                in output)
+        assert ("✅ 0 matches of konnect_system_account.us-cp-4 have "
+                "expected properties (at most 0)") in output
+        assert ("❌ Invalid test configuration: 'matches' must be a "
+                "non-negative integer") in output
+        assert ("❌ Invalid test configuration: 'matches' can't be "
+                "combined with 'min_matches' or 'max_matches'") in output
+        assert ("❌ Invalid test configuration: 'min_matches' is greater "
+                "than 'max_matches'") in output
+
+    # One scan of the type's names per pattern, shared across entries
+    index = validator.ConfigIndex(actual)
+    pattern = validator.compile_name_pattern("au-*")
+    parent = ("resource", "konnect_system_account")
+    assert index.matching_names(parent, pattern) == [
+        f"au-cp-{i}" for i in range(6)]
+    assert index.matching_names(parent, pattern) is index.matching_names(
+        parent, validator.compile_name_pattern("au-*"))
+    assert validator.compile_name_pattern("au-test") is None
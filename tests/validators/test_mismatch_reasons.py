@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Tests for the mismatch reasons that follow the expected paths.
+Replays the cases with lists in their expected blocks against the reports
+recorded in validators/reports/list-mismatches/, with each list's last
+item narrowly missed.
+
+Regenerate the recorded reports with:
+    python validators/test_mismatch_reasons.py --update
+"""
+
+import json
+import sys
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from derived_cases import (
+    CASES,
+    REPORTS_DIR,
+    TESTS_DIR,
+    derive_list_case,
+    validator,
+)
+
+LIST_REPORTS_DIR = REPORTS_DIR / "list-mismatches"
+
+pytestmark = pytest.mark.usefixtures("plain_output")
+
+
+def has_list(value: Any) -> bool:
+    if isinstance(value, dict):
+        return any(map(has_list, value.values()))
+    return isinstance(value, list)
+
+
+LIST_CASES = [
+    case for case in CASES
+    if any(has_list(entry) for section in ("control_planes", "resources")
+           for entry in json.loads(
+               (TESTS_DIR / "expected-results" / f"{case}.json"
+                ).read_text()).get(section, []))
+]
+
+
+def render_list_case(case: str, tmp_dir: Path) -> str:
+    """Validation report for the list-mismatch variant of a case"""
+    expected = json.loads(
+        (TESTS_DIR / "expected-results" / f"{case}.json").read_text())
+    case_expected, actual = derive_list_case(expected)
+    (tmp_dir / "expected-results").mkdir(exist_ok=True)
+    (tmp_dir / "expected-results" / f"{case}.json").write_text(
+        json.dumps(case_expected))
+    (tmp_dir / f"{case}.tf.json").write_text(json.dumps(actual))
+
+    passed, output = validator.validate_config(case, tmp_dir)
+    return f"exit: {0 if passed else 1}\n{output}"
+
+
+@pytest.mark.parametrize("case", LIST_CASES)
+def test_list_mismatch_reports_match_recorded(case, tmp_path):
+    recorded = (LIST_REPORTS_DIR / f"{case}.txt").read_text(encoding="utf-8")
+    report = render_list_case(case, tmp_path)
+    assert report == recorded
+    # Every list diagnostic names the unmatched item and its closest match
+    assert report.startswith("exit: 1\n") and "has no match" in report
+
+
+def test_mismatch_reason_follows_expected_paths():
+    expected = {"name": "au-test", "config": {"port": 443},
+                "members": [{"id": "a"}, {"id": "b"}], "tags": ["x"]}
+    actual = {"name": "au-test", "extra": {"ignored": True},
+              "config": {"port": 8443, "host": "ignored"},
+              "members": [{"id": "a", "role": "r"}, {"id": "bb"}],
+              "tags": "x"}
+
+    assert validator.get_mismatch_reason(expected, actual) == "; ".join([
+        "expected 443, got 8443 at config.port",
+        "members[1] {\"id\": \"b\"} has no match; closest is members[1]: "
+        "expected 'b', got 'bb' at members[1].id",
+        "expected array, got string at tags",
+    ])
+    assert validator.get_mismatch_reason(
+        {"config": {"port": 8443}, "members": [{"id": "bb"}]}, actual) is None
+
+    members = [{"id": f"cp-{i}"} for i in range(10_000)]
+    reason = validator.get_mismatch_reason(
+        {"members": [{"id": "cp-x"}] * 5}, {"members": members})
+    assert reason.startswith('members[0] {"id": "cp-x"} has no match')
+    assert reason.endswith("2 more unmatched items in members")
+
+
+
+if __name__ == "__main__" and "--update" in sys.argv:
+    import tempfile
+
+    validator.ENHANCED_MODE = False
+    validator._COLORS = {}
+    LIST_REPORTS_DIR.mkdir(exist_ok=True)
+    for case in LIST_CASES:
+        with tempfile.TemporaryDirectory() as tmp:
+            (LIST_REPORTS_DIR / f"{case}.txt").write_text(
+                render_list_case(case, Path(tmp)), encoding="utf-8")
+    print(f"Recorded {len(LIST_CASES)} reports in {LIST_REPORTS_DIR}")
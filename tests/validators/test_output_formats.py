@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Tests for the report formats: text, JSON and JUnit, quiet mode and the
+enhanced mode banner.
+"""
+
+import json
+
+import pytest
+
+from derived_cases import validator, write_broken_case
+
+pytestmark = pytest.mark.usefixtures("plain_output")
+
+
+def test_structured_formats(tmp_path):
+    write_broken_case("cp-groups", tmp_path)
+
+    _, text = validator.validate_config("case", tmp_path)
+    passed, output = validator.validate_config("case", tmp_path,
+                                               output_format="json")
+    report = json.loads(output)
+    assert not passed and report["passed"] is False
+    failures = [result for section in report["sections"]
+                for result in section["results"] if not result["found"]]
+    assert failures and all(result["message"] in text for result in failures)
+
+    _, quiet = validator.validate_config("case", tmp_path,
+                                         output_format="json", quiet=True)
+    quiet_results = [result for section in json.loads(quiet)["sections"]
+                     for result in section["results"]]
+    assert quiet_results == failures
+
+    from xml.etree import ElementTree
+    _, junit = validator.validate_config("case", tmp_path,
+                                         output_format="junit")
+    suite = ElementTree.fromstring(junit)
+    assert int(suite.get("failures")) + int(suite.get("errors")) == len(
+        failures)
+    assert int(suite.get("tests")) == sum(
+        section["total"] for section in report["sections"])
+
+
+def test_enhanced_mode_banner_only_with_colors(tmp_path, monkeypatch):
+    write_broken_case("cp", tmp_path)
+    banner = "Enhanced mode: colors enabled"
+    # colorama is installed but stdout isn't a terminal
+    monkeypatch.setattr(validator, "ENHANCED_MODE", True)
+    assert banner not in validator.validate_config("case", tmp_path)[1]
+
+    monkeypatch.setattr(validator, "_COLORS", {
+        color: "" for color in ("green", "red", "yellow", "blue", "cyan",
+                                "reset")})
+    assert banner in validator.validate_config("case", tmp_path)[1]
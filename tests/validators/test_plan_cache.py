@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tests for the compiled plan cache and where it lives.
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from derived_cases import TESTS_DIR, validator
+
+pytestmark = pytest.mark.usefixtures("plain_output")
+
+
+def test_plan_cache_hits_misses_and_invalidation(tmp_path, monkeypatch):
+    expected_file = tmp_path / "case.json"
+    expected_file.write_text(json.dumps(
+        {"variables": [{"name": "cp_admin_token"}]}))
+    cache_dir = tmp_path / "cache"
+    compiled = []
+    compile_plan = validator.compile_plan
+    monkeypatch.setattr(validator, "compile_plan", lambda expected: (
+        compiled.append(expected) or compile_plan(expected)))
+
+    def load():
+        plan = validator.load_plan(expected_file, cache_dir)
+        return plan.sections["variables"][0].raw, len(compiled)
+
+    # A miss compiles and stores the plan, a hit replays it
+    assert load() == ({"name": "cp_admin_token"}, 1)
+    assert load() == ({"name": "cp_admin_token"}, 1)
+    entries = list((cache_dir / "plans").iterdir())
+    assert len(entries) == 1
+
+    # Changed expectations miss
+    expected_file.write_text(json.dumps({"variables": [{"name": "x"}]}))
+    assert load() == ({"name": "x"}, 2)
+
+    # Entries without this version's stamp are recompiled, not unpickled
+    expected_file.write_text(json.dumps(
+        {"variables": [{"name": "cp_admin_token"}]}))
+    entries[0].write_bytes(b"kontfix-plan:0000\n" + b"not a pickle")
+    assert load() == ({"name": "cp_admin_token"}, 3)
+    assert entries[0].read_bytes().startswith(validator.plan_stamp())
+    assert load() == ({"name": "cp_admin_token"}, 3)
+
+    # A new validator version stops reusing every entry
+    monkeypatch.setattr(validator, "validator_version", lambda: "next")
+    assert load() == ({"name": "cp_admin_token"}, 4)
+
+
+def test_default_cache_dir_is_outside_the_test_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg"))
+    cache_dir = validator.default_cache_dir(TESTS_DIR)
+    assert cache_dir.parent == tmp_path / "xdg" / "kontfix-validator"
+    assert cache_dir != validator.default_cache_dir(tmp_path)
+
+    monkeypatch.setenv("XDG_CACHE_HOME", "relative")
+    assert validator.default_cache_dir(TESTS_DIR).parents[1] == (
+        Path.home() / ".cache")
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Tests for --profile.
+"""
+
+import pytest
+
+from derived_cases import validator, write_broken_case
+
+pytestmark = pytest.mark.usefixtures("plain_output")
+
+
+def test_profile_records_phases_and_restores_checks(tmp_path):
+    write_broken_case("cp-groups", tmp_path)
+
+    plain = validator.is_subset
+    profiler = validator.enable_profiling()
+    try:
+        outcomes = list(validator.validate_configs(["case"], tmp_path))
+    finally:
+        validator.disable_profiling()
+
+    assert validator.is_subset is plain
+    assert validator.PROFILER is None
+    summary = profiler.summary()
+    phases = {row["phase"] for row in summary["phases"]}
+    assert {"load actual", "load expected", "section resources",
+            "mismatch diagnostics", "render text"} <= phases
+    assert summary["subset_calls"] > 0 and summary["max_depth"] > 0
+    assert [row["config"] for row in summary["slowest_configs"]] == ["case"]
+    assert outcomes == [("case",
+                         *validator.validate_config("case", tmp_path))]
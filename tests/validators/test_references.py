@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Tests for --check-references.
+"""
+
+import json
+
+import pytest
+
+from derived_cases import validator
+
+pytestmark = pytest.mark.usefixtures("plain_output")
+
+
+def test_reference_check_reports_dangling_references_and_cycles(tmp_path):
+    config = {
+        "provider": {"konnect": [{"alias": "au",
+                                  "personal_access_token":
+                                      "${var.cp_admin_token}"}]},
+        "variable": {"cp_admin_token": {"type": "string"}},
+        "data": {"vault_policy_document": {"au-test_readonly": {}}},
+        "resource": {
+            "konnect_gateway_control_plane": {
+                "au-test": {"provider": "konnect.au"},
+                "au-demo": {"provider": "konnect.us"}},
+            "aws_secretsmanager_secret_version": {"au-test": {
+                "secret_string": (
+                    '${jsonencode({\n cp_id = '
+                    'konnect_gateway_control_plane.au-test.id\n url = '
+                    '"${regex(\"^https://([^.]+)\\\\.\", '
+                    'konnect_gateway_control_plane.au-test.config'
+                    '.control_plane_endpoint)[0]}.au.cp.konghq.com"\n'
+                    ' ids = [for cp in var.extra : cp.id]\n'
+                    ' dir = path.module\n})}'),
+                "policy": "${data.vault_policy_document.au-test_readonly.hcl}",
+                "escaped": "$${var.not_a_reference}"}},
+            "tls_private_key": {"a": {"depends_on": ["tls_private_key.b"]},
+                                "b": {"key": "${tls_private_key.a.id}"}},
+            "local_file": {"self": {"content": "${local_file.self.id}"}},
+        },
+    }
+    validation = validator.check_references(config)
+    messages = [result.message for result in validation.results]
+    assert messages == [
+        "❌ provider.konnect.us is referenced but not defined",
+        "❌ var.extra is referenced but not defined",
+        "❌ Reference cycle through local_file.self",
+        "❌ Reference cycle through tls_private_key.a",
+    ]
+    assert validation.results[1].detail == (
+        "Referenced from aws_secretsmanager_secret_version.au-test")
+    assert validation.results[3].detail == (
+        "tls_private_key.a → tls_private_key.b → tls_private_key.a")
+    assert validation.summary == "8/10 references resolve, 2 cycles"
+
+    # Opt-in section of the regular report
+    (tmp_path / "expected-results").mkdir()
+    (tmp_path / "expected-results" / "refs.json").write_text(json.dumps(
+        {"variables": [{"variable_name": "cp_admin_token"}]}))
+    (tmp_path / "refs.tf.json").write_text(json.dumps(config))
+    assert validator.validate_config("refs", tmp_path)[0]
+    passed, output = validator.validate_config("refs", tmp_path,
+                                               references=True)
+    assert not passed
+    assert "8/10 references resolve, 2 cycles" in output
+
+    del config["resource"]["tls_private_key"]
+    del config["resource"]["local_file"]
+    config["variable"]["extra"] = {}
+    config["resource"]["konnect_gateway_control_plane"]["au-demo"] = {}
+    (tmp_path / "refs.tf.json").write_text(json.dumps(config))
+    passed, output = validator.validate_config("refs", tmp_path,
+                                               references=True)
+    assert passed
+    assert "✅ 6 references between 7 addresses resolve" in output
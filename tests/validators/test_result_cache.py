@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Tests for the result cache and its pruning.
+"""
+
+import os
+
+import pytest
+
+from derived_cases import validator, write_broken_case
+
+pytestmark = pytest.mark.usefixtures("plain_output")
+
+
+def test_result_cache_is_keyed_by_config_name(tmp_path):
+    cache_dir = tmp_path / "cache"
+    for name in ("alpha", "beta"):
+        write_broken_case("cp", tmp_path, name)
+
+    outputs = {name: validator.validate_config(name, tmp_path,
+                                               cache_dir=cache_dir)[1]
+               for name in ("alpha", "beta")}
+    assert "🧪 Partial Validation: alpha" in outputs["alpha"]
+    assert "🧪 Partial Validation: beta" in outputs["beta"]
+    # Replayed from the cache, each under its own name
+    assert {name: validator.validate_config(name, tmp_path,
+                                            cache_dir=cache_dir)[1]
+            for name in ("alpha", "beta")} == outputs
+    validator.validate_config("beta", tmp_path, stream=True,
+                              cache_dir=cache_dir)
+    assert len(list((cache_dir / "results").iterdir())) == 3
+
+
+def test_prune_cache_evicts_least_recently_used(tmp_path):
+    cache_dir = tmp_path / "cache"
+    entries = []
+    for index in range(6):
+        entry = cache_dir / ("plans" if index % 2 else "results") / (
+            f"{index}.json")
+        validator.write_cache_file(entry, b"x" * 100)
+        os.utime(entry, (1000 + index, 1000 + index))
+        entries.append(entry)
+    # Reading an old entry makes it recently used
+    validator.touch_cache_file(entries[0])
+
+    assert validator.prune_cache(cache_dir, 1000) == 0
+    assert validator.prune_cache(cache_dir, 350) == 3
+    assert [entry.exists() for entry in entries] == [
+        True, False, False, False, True, True]
+    assert validator.prune_cache(cache_dir, 0) == 3
+    assert not any(entry.exists() for entry in entries)
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Tests for the test runner, with a fake `nix` standing in for the build
+apps: `build-<case>` copies outputs/<case>.tf.json into place and
+`build-error-<case>` prints errors/<case>.txt and fails.
+"""
+
+import json
+import os
+import shutil
+import stat
+import sys
+from pathlib import Path
+
+import pytest
+
+VALIDATORS_DIR = Path(__file__).resolve().parent
+
+sys.path.insert(0, str(VALIDATORS_DIR))
+
+import runner  # noqa: E402
+
+FAKE_NIX = """#!{python}
+import shutil, sys, time
+from pathlib import Path
+
+app = sys.argv[2].split("#", 1)[1]
+fixtures = Path({fixtures!r})
+with open(fixtures / "calls.log", "a") as log:
+    log.write(f"start {{app}}\\n")
+time.sleep(0.2)
+with open(fixtures / "calls.log", "a") as log:
+    log.write(f"end {{app}}\\n")
+
+if app.startswith("build-error-"):
+    message = fixtures / "errors" / (app[len("build-error-"):] + ".txt")
+    if not message.is_file():
+        print("built fine")
+        sys.exit(0)
+    print("error: evaluation aborted with the following error message:")
+    print(message.read_text())
+    sys.exit(1)
+
+case = app[len("build-"):]
+output = fixtures / "outputs" / f"{{case}}.tf.json"
+if not output.is_file():
+    print(f"error: attribute '{{app}}' failed to evaluate", file=sys.stderr)
+    sys.exit(1)
+shutil.copy(output, f"{{case}}.tf.json")
+print(f"Generated {{case}}.tf.json")
+"""
+
+
+@pytest.fixture
+def test_dir(tmp_path):
+    """A kontfix tree whose test flake has two cases and two error cases"""
+    fixtures = tmp_path / "fixtures"
+    (fixtures / "outputs").mkdir(parents=True)
+    (fixtures / "errors").mkdir()
+    nix = fixtures / "nix"
+    nix.write_text(FAKE_NIX.format(python=sys.executable,
+                                   fixtures=str(fixtures)))
+    nix.chmod(nix.stat().st_mode | stat.S_IEXEC)
+
+    (tmp_path / "kontfix" / "lib").mkdir(parents=True)
+    (tmp_path / "kontfix" / "lib" / "utils.nix").write_text("{ }\n")
+    tests = tmp_path / "kontfix" / "tests"
+    for directory in ("cases", "error-cases", "expected-results",
+                      "expected-errors"):
+        (tests / directory).mkdir(parents=True)
+
+    for case, name in (("cp", "test"), ("cp-demo", "demo")):
+        (tests / "cases" / f"{case}.nix").write_text("{ }\n")
+        (fixtures / "outputs" / f"{case}.tf.json").write_text(json.dumps(
+            {"resource": {"konnect_gateway_control_plane": {
+                f"au-{name}": {"name": name}}}}))
+        (tests / "expected-results" / f"{case}.json").write_text(json.dumps(
+            {"control_planes": [{"resource_name": "au-test",
+                                 "name": "test"}]}))
+
+    for case in ("cycle", "bad-region"):
+        (tests / "error-cases" / f"{case}.nix").write_text("{ }\n")
+        (tests / "expected-errors" / f"{case}.txt").write_text(
+            f"Control plane {case} is invalid\n")
+    (fixtures / "errors" / "cycle.txt").write_text(
+        "Control plane cycle is invalid")
+    (fixtures / "errors" / "bad-region.txt").write_text(
+        "Control plane has invalid region 'mars'")
+
+    return tests, str(nix), fixtures / "calls.log"
+
+
+def test_runner_builds_once_and_validates_in_process(test_dir, capsys):
+    tests, nix, log = test_dir
+
+    passed = runner.run(tests, nix, jobs=4)
+    output = capsys.readouterr().out
+
+    assert not passed
+    assert "✅ Built cp" in output and "✅ Built cp-demo" in output
+    # cp matches its expected results, cp-demo doesn't
+    assert "📋 Summary: 1/2 configs passed" in output
+    assert "✅ cycle error test passed" in output
+    assert "❌ bad-region error test failed" in output
+    assert "Control plane has invalid region 'mars'" in output
+
+    events = [line.split() for line in log.read_text().splitlines()]
+    started = [app for event, app in events if event == "start"]
+    # Each build app ran exactly once, error builds included
+    assert sorted(started) == ["build-cp", "build-cp-demo",
+                               "build-error-bad-region", "build-error-cycle"]
+    # and several ran at a time on the job pool
+    assert [event for event, _ in events[:2]] == ["start", "start"]
+
+
+def test_runner_reports_failed_and_unexpectedly_passing_builds(test_dir,
+                                                               capsys):
+    tests, nix, _ = test_dir
+    (tests / "cases" / "broken.nix").write_text("{ }\n")
+    os.remove(tests.parent.parent / "fixtures" / "errors" / "bad-region.txt")
+
+    passed = runner.run(tests, nix, jobs=2,
+                        cases=["cp", "broken"], error_cases=["bad-region"])
+    output = capsys.readouterr().out
+
+    assert not passed
+    assert "❌ Build failed for broken (exit 1)" in output
+    assert "attribute 'build-broken' failed to evaluate" in output
+    assert "build succeeded but should have failed" in output
+    assert "✅ PASSED" in output
+
+
+def test_runner_fails_cases_without_expected_results(test_dir, capsys):
+    tests, nix, _ = test_dir
+    (tests / "expected-results" / "cp-demo.json").unlink()
+
+    passed = runner.run(tests, nix, jobs=2, error_cases=[])
+    output = capsys.readouterr().out
+
+    assert not passed
+    assert "❌ ./expected-results/cp-demo.json not found" in output
+    # The case with expected results is still validated, and passes
+    assert "📋 Summary" not in output and "✅ PASSED" in output
+
+
+def test_build_cache_rebuilds_only_stale_cases(test_dir, capsys):
+    tests, nix, log = test_dir
+    cache = tests.parent.parent / "cache"
+
+    def started():
+        runner.run(tests, nix, jobs=2, error_cases=[],
+                   build_cache=runner.BuildCache(cache, tests))
+        calls = log.read_text().splitlines() if log.exists() else []
+        log.unlink(missing_ok=True)
+        apps = [line.split()[1] for line in calls if line.startswith("start")]
+        return sorted(apps), capsys.readouterr().out
+
+    apps, output = started()
+    assert apps == ["build-cp", "build-cp-demo"]
+    assert "📦 Build cache: 0 hits, 2 misses" in output
+
+    # Unchanged inputs restore the cached outputs without running nix
+    os.remove(tests / "cp.tf.json")
+    apps, output = started()
+    assert apps == []
+    assert "📦 Build cache: 2 hits, 0 misses" in output
+    assert "♻️  Reused cached cp.tf.json" in output
+    assert (tests / "cp.tf.json").is_file()
+    assert "📋 Summary: 1/2 configs passed" in output
+
+    # A changed case file only invalidates that case
+    (tests / "cases" / "cp.nix").write_text("{ region = \"au\"; }\n")
+    apps, output = started()
+    assert apps == ["build-cp"]
+    assert "📦 Build cache: 1 hits, 1 misses" in output
+
+    # A changed kontfix module invalidates every case
+    (tests.parent / "lib" / "utils.nix").write_text("{ x = 1; }\n")
+    apps, output = started()
+    assert apps == ["build-cp", "build-cp-demo"]
+
+
+def test_shards_balance_recorded_times(tmp_path):
+    history_file = tmp_path / "timings.json"
+    history_file.write_text(json.dumps({
+        "build": {"a": 9.0, "b": 7.0, "c": 4.0, "d": 3.0, "e": 2.0},
+        "validate": {"a": 1.0},
+        "error": {"x": 6.0},
+    }))
+    history = runner.TimingHistory(history_file)
+    cases, error_cases = ["a", "b", "c", "d", "e", "new"], ["x", "y"]
+
+    shards = [runner.shard_cases(cases, error_cases, (index, 3), history)
+              for index in (1, 2, 3)]
+    # Each case runs on exactly one shard
+    assert sorted(case for shard in shards for case in shard[0]) == cases
+    assert sorted(case for shard in shards for case in shard[1]) == (
+        error_cases)
+    # Unrecorded times are the mean of their kind: b is 7+1, new 5+1
+    costs = runner.item_costs(cases, error_cases, history)
+    assert costs["case", "b"] == 8.0 and costs["case", "new"] == 6.0
+    assert costs["error-case", "y"] == 6.0
+    # 10+5, 8+6+3 and 6+6+4 seconds
+    assert [shard[:2] for shard in shards] == [
+        (["a", "c"], []), (["b", "e"], ["y"]), (["d", "new"], ["x"])]
+    assert "estimated 15.0s of 48.0s" in shards[0][2]
+
+
+def test_shards_fall_back_to_stable_hashing(tmp_path):
+    history = runner.TimingHistory(tmp_path / "missing.json")
+    cases = [f"case-{index}" for index in range(40)]
+
+    first = [runner.shard_cases(cases, ["cycle"], (index, 4), history)
+             for index in range(1, 5)]
+    assert first == [runner.shard_cases(cases, ["cycle"], (index, 4),
+                                        history) for index in range(1, 5)]
+    assert sorted(case for shard in first for case in shard[0]) == sorted(
+        cases)
+    assert all(shard[0] for shard in first)
+    assert all("no timing history" in shard[2] for shard in first)
+
+
+@pytest.mark.parametrize("spec", ["2", "0/2", "3/2", "a/b", "1/0"])
+def test_invalid_shards_are_rejected(spec):
+    with pytest.raises(ValueError, match="invalid shard"):
+        runner.parse_shard(spec)
+
+
+def test_runner_records_build_and_validation_times(test_dir, capsys,
+                                                   monkeypatch):
+    tests, nix, _ = test_dir
+    cache_dir = tests.parent.parent / "cache"
+    history_file = tests / "timings.json"
+    history_file.write_text(json.dumps({"build": {"cp": 10.0}}))
+    # Validation is timed without instrumenting the subset checks
+    monkeypatch.setattr(runner.validator, "enable_profiling", None)
+
+    def run():
+        timings = runner.TimingHistory(history_file)
+        runner.run(tests, nix, jobs=2, cases=["cp", "cp-demo"],
+                   error_cases=["cycle"], timings=timings,
+                   cache_dir=cache_dir)
+        timings.save()
+        return timings.measured, json.loads(history_file.read_text())
+
+    measured, recorded = run()
+    # The new build time is averaged with the recorded 10s
+    assert 5.0 < recorded["build"]["cp"] < 6.0
+    assert 0.1 < recorded["build"]["cp-demo"] < 1.0
+    assert set(recorded["validate"]) == {"cp", "cp-demo"}
+    assert set(recorded["error"]) == {"cycle"}
+
+    # Results replayed from the validation cache aren't recorded
+    measured, rerecorded = run()
+    assert ("build", "cp") in measured
+    assert not any(kind == "validate" for kind, _ in measured)
+    assert rerecorded["validate"] == recorded["validate"]
+
+
+
+def test_runner_times_validations_in_the_workers(test_dir, monkeypatch):
+    tests, nix, log = test_dir
+    outputs = log.parent / "outputs"
+    # Two slow configs validate side by side, then a fast one. Timing the
+    # outcomes as they arrive would charge both slow ones to the first
+    config = json.loads((outputs / "cp-demo.tf.json").read_text())
+    config["resource"]["null_resource"] = {
+        f"padding-{i}": {"triggers": {"index": str(i)}}
+        for i in range(100_000)}
+    for case in ("slow", "also-slow"):
+        (tests / "cases" / f"{case}.nix").write_text("{ }\n")
+        (outputs / f"{case}.tf.json").write_text(json.dumps(config))
+        shutil.copy(tests / "expected-results" / "cp-demo.json",
+                    tests / "expected-results" / f"{case}.json")
+    monkeypatch.setattr(runner.validator, "enable_profiling", None)
+
+    timings = runner.TimingHistory(tests / "timings.json")
+    runner.run(tests, nix, jobs=2, cases=["slow", "also-slow", "cp"],
+               error_cases=[], timings=timings)
+    seconds = {case: seconds for (kind, case), seconds
+               in timings.measured.items() if kind == "validate"}
+
+    assert seconds["slow"] > 5 * seconds["cp"]
+    assert seconds["also-slow"] > 5 * seconds["cp"]
+
+
+def test_expected_error_matches_like_grep():
+    assert runner.expected_error_found("two\nlines", "only two here")
+    assert not runner.expected_error_found("absent", "output")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Regression test for the section engine.
+Replays every case in tests/cases against the reports recorded in
+validators/reports/, once matching and once broken (see derived_cases).
+
+Regenerate the recorded reports with:
+    python validators/test_section_engine.py --update
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+from derived_cases import (
+    CASES,
+    JSON_BACKENDS,
+    REPORTS_DIR,
+    render_case,
+    validator,
+)
+
+pytestmark = pytest.mark.usefixtures("plain_output")
+
+
+@pytest.mark.parametrize("json_backend", JSON_BACKENDS)
+@pytest.mark.parametrize("case", CASES)
+def test_reports_match_recorded(case, json_backend, tmp_path, monkeypatch):
+    monkeypatch.setattr(validator, "JSON_BACKEND", json_backend)
+    recorded = (REPORTS_DIR / f"{case}.txt").read_text(encoding="utf-8")
+    assert render_case(case, tmp_path) == recorded
+
+
+def test_data_sources_and_outputs_sections(tmp_path):
+    actual = {
+        "data": {"vault_policy_document": {
+            "au-test_readonly": {"rule": [{"path": "kv/au-test"}]}}},
+        "output": {"au-test_endpoint": {"value": "${konnect.au-test.id}"}},
+    }
+    expected = {
+        "data_sources": [
+            {"resource_type": "vault_policy_document",
+             "resource_name": "au-test_readonly",
+             "rule": [{"path": "kv/au-test"}]},
+            {"resource_type": "vault_policy_document",
+             "resource_name": "au-demo_readonly",
+             "should_not_exist": True},
+        ],
+        "outputs": [
+            {"output_name": "au-test_endpoint", "count_only": True},
+            {"output_name": "au-demo_endpoint"},
+        ],
+    }
+    (tmp_path / "expected-results").mkdir()
+    (tmp_path / "expected-results" / "extra.json").write_text(
+        json.dumps(expected))
+    (tmp_path / "extra.tf.json").write_text(json.dumps(actual))
+
+    for stream in (False, True):
+        passed, output = validator.validate_config("extra", tmp_path,
+                                                   stream=stream)
+        assert not passed
+        assert "2/2 expected data sources found" in output
+        assert "1/2 expected outputs found" in output
+        assert ("✅ data.vault_policy_document.au-demo_readonly "
+                "does not exist as expected") in output
+        assert "❌ Output au-demo_endpoint missing (output not found)" in output
+
+
+if __name__ == "__main__" and "--update" in sys.argv:
+    import tempfile
+
+    validator.ENHANCED_MODE = False
+    validator._COLORS = {}
+    REPORTS_DIR.mkdir(exist_ok=True)
+    for case in CASES:
+        with tempfile.TemporaryDirectory() as tmp:
+            (REPORTS_DIR / f"{case}.txt").write_text(
+                render_case(case, Path(tmp)), encoding="utf-8")
+    print(f"Recorded {len(CASES)} reports in {REPORTS_DIR}")
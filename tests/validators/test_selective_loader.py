@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Tests for the selective JSON loader behind --stream.
+"""
+
+import json
+
+import pytest
+
+from derived_cases import validator
+
+pytestmark = pytest.mark.usefixtures("plain_output")
+
+
+def test_selective_loader_matches_full_decode():
+    document = (b'{"sk\\"ip": {"a": ["}", "\\"]{", {"b": [[]]}]}, '
+                b'"k\\u00e9y": {"x": 1, "y": "q\\\\"}, '
+                b'"r": {"t": {"n": [1, {"z": "}"}]}, "u": [2], "v": {}},'
+                b' "e": {}}')
+    full = json.loads(document)
+
+    def load(selection):
+        return validator.SelectiveJSONLoader(document).load(selection)
+
+    assert load({}) == {}
+    assert load({"sk\"ip": True, "kéy": True}) == {
+        key: full[key] for key in ("sk\"ip", "kéy")}
+    # Nested selections skip the siblings at every level
+    assert load({"r": {"t": {"n": True}, "v": {"w": True}}, "e": {}}) == {
+        "r": {"t": {"n": full["r"]["t"]["n"]}, "v": {}}, "e": {}}
+    assert load({"r": {"u": {"deeper": True}}}) == {"r": {"u": [2]}}
+
+
+@pytest.mark.parametrize("document, error", [
+    (b'{"b": tru}', "Expecting value"),
+    (b'{"a": "x}', "Unterminated string"),
+    (b'{"a": [1, 2', "Unterminated container"),
+    (b'{"a": 1', "Expecting ',' delimiter"),
+    (b'{"a": 1 "b": 2}', "Expecting ',' delimiter"),
+    (b'{a: 1}', "Expecting property name"),
+    (b'{"a": 1} x', "Extra data"),
+    (b'[]', "Expecting '{'"),
+])
+def test_selective_loader_rejects_malformed_input(document, error):
+    with pytest.raises(json.JSONDecodeError, match=error):
+        validator.SelectiveJSONLoader(document).load({"b": True})
+
+
+def test_selective_loader_only_scans_skipped_values():
+    # Malformed values outside the selection aren't decoded, so they pass
+    for document in (b'{"a": tru, "b": 1}', b'{"a": [1}, "b": 1}',
+                     b'{"a": {"x": }, "b": 1}'):
+        assert validator.SelectiveJSONLoader(document).load(
+            {"b": True}) == {"b": 1}
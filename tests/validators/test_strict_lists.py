@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Tests for strict one-to-one list matching.
+"""
+
+import json
+
+import pytest
+
+from derived_cases import validator
+
+pytestmark = pytest.mark.usefixtures("plain_output")
+
+
+def test_strict_lists_need_distinct_matches(tmp_path):
+    member = {"id": "${konnect_gateway_control_plane.au-test.id}"}
+    actual = {"resource": {"konnect_gateway_control_plane_membership": {
+        "au-cpg": {"members": [member, {"id": "other"}],
+                   "tags": ["a", "b"]}}}}
+    entry = {"resource_type": "konnect_gateway_control_plane_membership",
+             "resource_name": "au-cpg", "members": [member, member]}
+    (tmp_path / "expected-results").mkdir()
+    (tmp_path / "cpg.tf.json").write_text(json.dumps(actual))
+
+    for strict, expect_pass in ((False, True), (True, False)):
+        expected = {"resources": [dict(entry, strict_lists=strict)]}
+        (tmp_path / "expected-results" / "cpg.json").write_text(
+            json.dumps(expected))
+        passed, output = validator.validate_config("cpg", tmp_path)
+        assert passed is expect_pass
+    assert ("members[1] {\"id\": \"${konnect_gateway_control_plane.au-test"
+            ".id}\"} has no unused match; members[0] is already matched by "
+            "members[0]") in output
+
+    assert validator.is_subset(["a", "a"], ["a", "b"])
+    assert not validator.is_subset(["a", "a"], ["a", "b"], strict=True)
+    assert validator.is_subset(["a", "a"], ["a", "a", "b"], strict=True)
+
+    # Greedy picks the first candidate; the augmenting path must undo it
+    expected = [{"t": 1}, {"t": 1, "r": 2}]
+    assert validator.is_subset(expected, [{"t": 1, "r": 2}, {"t": 1}],
+                               strict=True)
+
+    size = 5_000
+    members = [{"id": f"cp-{i}", "team": f"t{i % 7}"} for i in range(size)]
+    expected = [{"id": f"cp-{i}"} for i in reversed(range(size))]
+    assert validator.is_subset(expected, members, strict=True)
+    assert not validator.is_subset(expected + [{"id": "cp-0"}],
+                                   members + [{"id": "cp-x"}], strict=True)
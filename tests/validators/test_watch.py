@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Tests for --watch.
+"""
+
+import pytest
+
+from derived_cases import validator, write_broken_case
+
+pytestmark = pytest.mark.usefixtures("plain_output")
+
+
+def test_watch_revalidates_only_changed_configs(tmp_path, capsys):
+    write_broken_case("cp", tmp_path, "one")
+    write_broken_case("cp-groups", tmp_path, "two")
+    watcher = validator.Watcher(tmp_path)
+
+    assert [name for name, _, _ in watcher.poll()] == ["one", "two"]
+    assert watcher.poll() == []
+    plan = watcher.plans["two"][1]
+    index = watcher.indexes["two"][1]
+
+    # Only the generated file changed: the compiled plan is reused
+    actual_file = tmp_path / "two.tf.json"
+    actual_file.write_text(actual_file.read_text() + "\n")
+    assert [name for name, _, _ in watcher.poll()] == ["two"]
+    assert watcher.plans["two"][1] is plan
+    assert watcher.indexes["two"][1] is not index
+
+    # A half-written expected file is reported, then picked up once fixed
+    expected_file = tmp_path / "expected-results" / "two.json"
+    expected = expected_file.read_text()
+    expected_file.write_text(expected[:10])
+    (outcome,) = watcher.poll()
+    assert outcome[:2] == ("two", False)
+    assert "Invalid JSON in expected config" in outcome[2]
+    index = watcher.indexes["two"][1]
+    expected_file.write_text(expected)
+    assert [name for name, _, _ in watcher.poll()] == ["two"]
+    assert watcher.indexes["two"][1] is index
+
+    # New configs are discovered, removed ones dropped
+    write_broken_case("cp", tmp_path, "three")
+    (tmp_path / "one.tf.json").unlink()
+    assert [name for name, _, _ in watcher.poll()] == ["three"]
+    assert set(watcher.plans) == {"two", "three"}
+
+    edits = iter([lambda: actual_file.write_text("{}")])
+    passed = validator.watch(watcher, lambda: next(edits)(), polls=2)
+    assert not passed
+    assert "revalidated 1 config(s); 0/1 passing" in capsys.readouterr().out